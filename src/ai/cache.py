@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+from src.core.config import settings
+
+class LLMCache:
+    """
+    Content-addressed, size-bounded on-disk cache for LLM outputs.
+
+    Entries are keyed by a hash of (kind, provider, model, prompt template, input),
+    so the same abstract summarized with the same prompt and model is only paid for
+    once, even across reset_db.py. Text is stored as UTF-8, embeddings as packed
+    float32 (what pgvector stores anyway). Least recently used entries are evicted
+    once the total payload exceeds max_bytes.
+
+    The get/set methods are coroutines: SQLite calls block (disk I/O, the lock),
+    so they run in a worker thread instead of on the event loop.
+    """
+
+    def __init__(self, path: str, max_bytes: int, enabled: bool = True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total_bytes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, kind TEXT NOT NULL, value BLOB NOT NULL,"
+                " size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_last_access ON entries (last_access)")
+            self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(kind: str, provider: str, model: str, template: str, text: str) -> str:
+        h = hashlib.sha256()
+        for part in (kind, provider, model, template, text):
+            h.update(part.encode("utf-8"))
+            h.update(b"\x00")
+        return h.hexdigest()
+
+    # --- Text ---
+
+    async def get_text(self, key: str) -> Optional[str]:
+        value = (await asyncio.to_thread(self._get_many, [key])).get(key)
+        return value.decode("utf-8") if value is not None else None
+
+    async def set_text(self, key: str, kind: str, value: str):
+        await asyncio.to_thread(self._set_many, [(key, kind, value.encode("utf-8"))])
+
+    # --- Vectors ---
+
+    async def get_vectors(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = await asyncio.to_thread(self._get_many, keys)
+        return {k: array("f", v).tolist() for k, v in found.items()}
+
+    async def set_vectors(self, items: Dict[str, List[float]]):
+        await asyncio.to_thread(self._set_many, [(k, "embedding", array("f", v).tobytes()) for k, v in items.items()])
+
+    # --- Internals ---
+
+    def _get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        if not self.enabled or not keys:
+            return {}
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            # SQLite caps bound parameters, so look up in chunks
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = conn.execute(f"SELECT key, value FROM entries WHERE key IN ({marks})", chunk).fetchall()
+                found.update(rows)
+                if rows:
+                    now = time.time()
+                    conn.executemany("UPDATE entries SET last_access = ? WHERE key = ?", [(now, k) for k, _ in rows])
+            conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def _set_many(self, rows: Iterable[tuple]):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            for key, kind, value in rows:
+                old = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, kind, value, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, kind, value, len(value), now)
+                )
+                self._total_bytes += len(value) - (old[0] if old else 0)
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection):
+        while self._total_bytes > self.max_bytes:
+            candidates = conn.execute("SELECT key, size FROM entries ORDER BY last_access LIMIT 256").fetchall()
+            if not candidates:
+                self._total_bytes = 0
+                return
+            victims = []
+            for key, size in candidates:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                victims.append((key,))
+                self._total_bytes -= size
+            conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM entries")
+            conn.commit()
+            self._total_bytes = 0
+
+llm_cache = LLMCache(
+    path=settings.LLM_CACHE_PATH,
+    max_bytes=settings.LLM_CACHE_MAX_MB * 1024 * 1024,
+    enabled=settings.LLM_CACHE_ENABLED
+)
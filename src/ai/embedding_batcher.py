@@ -0,0 +1,73 @@
+import asyncio
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+EmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+class EmbeddingBatcher:
+    """
+    Micro-batches concurrent embedding requests.
+
+    Callers await embed(text) and get their own vector back. Behind the scenes
+    texts are queued and sent to embed_fn in one request as soon as either
+    max_batch_size texts are waiting or the oldest one has waited max_wait seconds.
+    """
+
+    def __init__(self, embed_fn: EmbedFn, max_batch_size: int = 100, max_wait: float = 0.025):
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches_sent = 0
+        self.texts_sent = 0
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight = set()
+
+    async def embed(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Futures and timers are bound to a loop; start fresh on a new one.
+            self._pending = []
+            self._timer = None
+            self._loop = loop
+
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            task = self._loop.create_task(self._send(batch))
+            # Keep a reference so the task isn't garbage collected mid-flight
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]):
+        texts = [text for text, _ in batch]
+        try:
+            vectors = await self.embed_fn(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"Embedding provider returned {len(vectors)} vectors for {len(texts)} texts")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches_sent += 1
+        self.texts_sent += len(texts)
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
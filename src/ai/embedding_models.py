@@ -0,0 +1,53 @@
+import hashlib
+from typing import Tuple
+
+from langchain_openai import OpenAIEmbeddings
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+from src.core.config import settings
+from src.ai.mock_embeddings import MockEmbeddings
+
+# An embedding model is identified by "<provider>:<model>", e.g.
+# "openai:text-embedding-ada-002". Stored vectors are keyed by this id, so
+# changing provider or model never mixes incompatible vectors.
+
+MOCK_MODEL_ID = f"mock:{MockEmbeddings.model}"
+
+def make_model_id(provider: str, model: str) -> str:
+    return f"{provider}:{model}"
+
+def split_model_id(model_id: str) -> Tuple[str, str]:
+    provider, _, model = model_id.partition(":")
+    return provider, model
+
+def configured_model_id() -> str:
+    """The model new embeddings are written with, from AI_PROVIDER and its key."""
+    if settings.AI_PROVIDER == "openai" and settings.OPENAI_API_KEY:
+        return make_model_id("openai", settings.OPENAI_EMBEDDING_MODEL)
+    if settings.AI_PROVIDER == "gemini" and settings.GEMINI_API_KEY:
+        return make_model_id("gemini", settings.GEMINI_EMBEDDING_MODEL)
+    return MOCK_MODEL_ID
+
+def model_slug(model_id: str) -> str:
+    """Short stable token for index and directory names (Postgres identifiers max out at 63 chars)."""
+    return hashlib.sha1(model_id.encode("utf-8")).hexdigest()[:10]
+
+def can_embed(model_id: str) -> bool:
+    """Whether this process has the credentials to call model_id."""
+    provider, _ = split_model_id(model_id)
+    return {
+        "mock": True,
+        "openai": bool(settings.OPENAI_API_KEY),
+        "gemini": bool(settings.GEMINI_API_KEY),
+    }.get(provider, False)
+
+def create_embedding_client(model_id: str):
+    """LangChain embeddings client for model_id. Retries are handled by call_with_retry, not the client."""
+    provider, model = split_model_id(model_id)
+    if provider == "mock":
+        return MockEmbeddings()
+    if provider == "openai" and settings.OPENAI_API_KEY:
+        return OpenAIEmbeddings(api_key=settings.OPENAI_API_KEY, model=model, max_retries=0)
+    if provider == "gemini" and settings.GEMINI_API_KEY:
+        return GoogleGenerativeAIEmbeddings(google_api_key=settings.GEMINI_API_KEY, model=model)
+    raise ValueError(f"Cannot create embeddings client for '{model_id}' (unknown provider or missing API key)")
@@ -0,0 +1,42 @@
+import hashlib
+import math
+import re
+from typing import List
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-.][a-z0-9]+)*")
+
+class MockEmbeddings:
+    """
+    Deterministic, offline stand-in for a real embedding model (AI_PROVIDER=mock).
+
+    Uses the hashing trick over word unigrams and bigrams, so texts that share
+    vocabulary land close together. Good enough for local development and CI
+    search, free, and unit length like the real providers.
+    """
+    model = "mock-hashing-v1"
+
+    def __init__(self, dim: int = 1536):
+        self.dim = dim
+
+    def embed(self, text: str) -> List[float]:
+        tokens = _TOKEN.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        vector = [0.0] * self.dim
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign
+
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm == 0:
+            # Keep empty input well defined under cosine distance
+            vector[0] = 1.0
+            return vector
+        return [v / norm for v in vector]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.embed(text)
@@ -1,67 +1,286 @@
-from typing import List, Optional
+import asyncio
+from typing import Callable, List, Optional, TypeVar
 from langchain_core.documents import Document
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+from langchain_openai import ChatOpenAI
+from langchain_google_genai import ChatGoogleGenerativeAI
 from src.core.config import settings
+from src.ai.cache import LLMCache, llm_cache
+from src.ai.embedding_batcher import EmbeddingBatcher
+from src.ai.embedding_models import MOCK_MODEL_ID, configured_model_id, create_embedding_client, split_model_id
+from src.ai.mock_embeddings import MockEmbeddings
+from src.ai.rate_limit import LLMCallFailed, call_with_retry, estimate_tokens, get_limiter
+
+# Prompt templates live at module level so they can be part of the cache key:
+# editing a prompt naturally invalidates every cached output produced with it.
+
+PASS_1_TEMPLATE = """
+        You are a research assistant. Summarize the following paper abstract into a "Pass 1" summary.
+        Requirements:
+        1. One engaging "hook" sentence.
+        2. Three bullet points highlighting the key contributions.
+
+        Abstract: {text}
+        """
+
+PASS_2_TEMPLATE = """
+        You are a research assistant. Analyze the following text (abstract) for a "Pass 2" deep dive.
+        Extract:
+        - Key Claims
+        - Methodology insights
+        - Potential limitations inferred from the abstract
+
+        Text: {text}
+        """
+
+# Embeddings have no prompt; the version tag stands in for one in the cache key.
+EMBEDDING_TEMPLATE = "embedding:v1"
+
+DIGEST_TEMPLATE = """
+        You are an expert tech editor writing a "Daily AI Research Digest".
+        You have been provided with two sources of information:
+        1. **Industry News & Blogs**: High-level updates, product launches, and company news.
+        2. **Research Papers**: Academic pre-prints (ArXiv).
+
+        **Goal**: Write a comprehensive, structured blog post that covers the most important developments.
+
+        **Requirements**:
+        - **Don't miss the News**: The 'Industry News' section often contains the "gold" (major announcements). Ensure these are highlighted if significant.
+        - **Group by Topic**: Do not just list the research papers. Group them by topic (e.g., "LLM Architectures", "Computer Vision", "Robotics", "Safety"). If they are already grouped under `Topic:` headers, keep those groups (you may rename them) and build each topic around its representative paper, listed first.
+        - **Links are Critical**: You MUST link to the sources. Use Markdown format: `[Title](URL)`.
+        - **Formatting**: Use Markdown with clear headers.
+
+        **Structure**:
+        # [Catchy Headline for the Day]
+
+        ## 🚨 Top Stories
+        (Synthesize the biggest news from the Industry News section. ALWAYS link to the source: `[Article Title](URL)`.)
+
+        ## 🧠 Research Deep Dive
+        (Group the research papers by topic. For each topic, provide a summary of the key advancements. Cite papers using `[Paper Title](URL)`.)
+
+        ## ⚡ Quick Hits
+        (Bullet points for other interesting items that didn't fit above, mixed news and research. Link them!)
+
+        ---
+        **Input Data**:
+
+        ### SECTION 1: INDUSTRY NEWS & BLOGS
+        {news_text}
+
+        ### SECTION 2: RESEARCH PAPERS
+        {research_text}
+        """
+
+T = TypeVar("T")
+
+# Map-reduce digest for days too big for one prompt: every chunk of items is
+# turned into notes (map, in parallel), then the notes are merged into the post.
+
+DIGEST_MAP_TEMPLATE = """
+        You are helping an editor write a "Daily AI Research Digest".
+        Below is part {part} of {parts} of today's items. Write compact notes on them for the editor.
+
+        **Requirements**:
+        - Cover EVERY item below. Do not drop any.
+        - One bullet per item, starting with its link in Markdown format: `[Title](URL)`, followed by the key takeaway in one or two sentences.
+        - Put the Industry News items under `## News`.
+        - Group the research papers by topic under `## Research`, with one `### Topic` header per topic. Keep any groups given under `Topic:` headers (you may rename them).
+        - No introduction or conclusion.
+
+        ---
+        ### SECTION 1: INDUSTRY NEWS & BLOGS
+        {news_text}
+
+        ### SECTION 2: RESEARCH PAPERS
+        {research_text}
+        """
+
+DIGEST_MERGE_TEMPLATE = """
+        Merge these partial notes for a "Daily AI Research Digest" into one set of notes in the same format.
+        Merge research topics that cover the same subject. Keep EVERY item and its link; you may shorten the takeaways.
+
+        {notes}
+        """
+
+DIGEST_REDUCE_TEMPLATE = """
+        You are an expert tech editor writing a "Daily AI Research Digest".
+        You have been provided with notes on all of today's items: industry news and blogs, and research papers (ArXiv) grouped by topic.
+
+        **Goal**: Write a comprehensive, structured blog post that covers the most important developments.
+
+        **Requirements**:
+        - **Don't miss the News**: The news items often contain the "gold" (major announcements). Ensure these are highlighted if significant.
+        - **Group by Topic**: Use the topics in the notes, merging related ones.
+        - **Cover everything**: Every item in the notes must appear in the post, at least in Quick Hits.
+        - **Links are Critical**: You MUST link to the sources. Use Markdown format: `[Title](URL)`.
+        - **Formatting**: Use Markdown with clear headers.
+
+        **Structure**:
+        # [Catchy Headline for the Day]
+
+        ## 🚨 Top Stories
+        (Synthesize the biggest news. ALWAYS link to the source: `[Article Title](URL)`.)
+
+        ## 🧠 Research Deep Dive
+        (For each topic, provide a summary of the key advancements. Cite papers using `[Paper Title](URL)`.)
+
+        ## ⚡ Quick Hits
+        (Bullet points for the remaining items, mixed news and research. Link them!)
+
+        ---
+        **Notes**:
+
+        {notes}
+        """
+
+def pack_by_tokens(items: List[T], budget: int, min_size: int = 1, text: Callable[[T], str] = str) -> List[List[T]]:
+    """
+    Split items, in order, into groups of at most `budget` estimated tokens of text(item).
+    An item larger than the budget gets a group of its own; with min_size=2
+    every group (but possibly the last) holds at least two items.
+    """
+    groups, current, tokens = [], [], 0
+    for item in items:
+        size = estimate_tokens(text(item))
+        if current and tokens + size > budget and len(current) >= min_size:
+            groups.append(current)
+            current, tokens = [], 0
+        current.append(item)
+        tokens += size
+    if current:
+        groups.append(current)
+    return groups
 
 class AIProcessor:
-    def __init__(self):
+    def __init__(self, cache: LLMCache = llm_cache):
         self.provider = settings.AI_PROVIDER
         self.llm = self._get_llm()
-        self.embeddings = self._get_embeddings()
+        # Model new embeddings are written with; reads may use another (see src/services/embedding_models.py)
+        self.embedding_model_id = configured_model_id()
+        # Offline fallback so search still works without an API key (mock mode, CI)
+        self.mock_embeddings = MockEmbeddings()
+        self.cache = cache
+        self._embedding_clients = {}
+        self._embedding_batchers = {}
 
     def _get_llm(self):
         if self.provider == "openai" and settings.OPENAI_API_KEY:
-            return ChatOpenAI(api_key=settings.OPENAI_API_KEY, model=settings.OPENAI_MODEL)
+            # Retries are handled by call_with_retry, not by the client
+            return ChatOpenAI(api_key=settings.OPENAI_API_KEY, model=settings.OPENAI_MODEL, max_retries=0)
         elif self.provider == "gemini" and settings.GEMINI_API_KEY:
-            return ChatGoogleGenerativeAI(google_api_key=settings.GEMINI_API_KEY, model="gemini-pro")
+            return ChatGoogleGenerativeAI(google_api_key=settings.GEMINI_API_KEY, model="gemini-pro", max_retries=0)
         return None # Mock fallback handled in methods
 
-    def _get_embeddings(self):
-        if self.provider == "openai" and settings.OPENAI_API_KEY:
-            return OpenAIEmbeddings(api_key=settings.OPENAI_API_KEY)
-        elif self.provider == "gemini" and settings.GEMINI_API_KEY:
-            return GoogleGenerativeAIEmbeddings(google_api_key=settings.GEMINI_API_KEY, model="models/embedding-001")
-        return None
+    def _embedding_client(self, model_id: str):
+        if model_id not in self._embedding_clients:
+            self._embedding_clients[model_id] = create_embedding_client(model_id)
+        return self._embedding_clients[model_id]
 
-    async def generate_summary(self, text: str, pass_level: int = 1) -> str:
+    def _embedding_batcher(self, model_id: str) -> EmbeddingBatcher:
+        if model_id not in self._embedding_batchers:
+            self._embedding_batchers[model_id] = EmbeddingBatcher(
+                lambda texts: self._embed_batch(model_id, texts),
+                max_batch_size=settings.EMBEDDING_BATCH_SIZE,
+                max_wait=settings.EMBEDDING_BATCH_MAX_WAIT_MS / 1000
+            )
+        return self._embedding_batchers[model_id]
+
+    @property
+    def llm_model(self) -> str:
+        return getattr(self.llm, "model_name", None) or getattr(self.llm, "model", "") or ""
+
+    def _llm_key(self, kind: str, template: str, text: str) -> str:
+        return self.cache.make_key(kind, self.provider, self.llm_model, template, text)
+
+    def _embedding_key(self, model_id: str, text: str) -> str:
+        provider, model = split_model_id(model_id)
+        return self.cache.make_key("embedding", provider, model, EMBEDDING_TEMPLATE, text)
+
+    async def _invoke(self, template: str, inputs: dict, expected_output_tokens: int) -> str:
+        """Run a prompt through the provider limiter with retries. Raises LLMCallFailed."""
+        chain = PromptTemplate.from_template(template) | self.llm | StrOutputParser()
+        prompt_tokens = estimate_tokens(template) + sum(estimate_tokens(v) for v in inputs.values())
+        return await call_with_retry(
+            lambda: chain.ainvoke(inputs),
+            get_limiter(self.provider, "llm"),
+            estimated_tokens=prompt_tokens + expected_output_tokens
+        )
+
+    async def generate_summary(self, text: str, pass_level: int = 1, use_cache: bool = True) -> str:
+        """Raises LLMCallFailed if the provider keeps failing, so errors never end up stored as summaries."""
         if not self.llm:
             return f"[Mock Summary Pass {pass_level}] Configure AI_PROVIDER to enable real AI. Text: {text[:50]}..."
 
-        template = """
-        You are a research assistant. Summarize the following paper abstract into a "Pass 1" summary.
-        Requirements:
-        1. One engaging "hook" sentence.
-        2. Three bullet points highlighting the key contributions.
-        
-        Abstract: {text}
-        """ if pass_level == 1 else """
-        You are a research assistant. Analyze the following text (abstract) for a "Pass 2" deep dive.
-        Extract:
-        - Key Claims
-        - Methodology insights
-        - Potential limitations inferred from the abstract
-        
-        Text: {text}
+        template = PASS_1_TEMPLATE if pass_level == 1 else PASS_2_TEMPLATE
+        key = self._llm_key(f"summary_pass_{pass_level}", template, text)
+        if use_cache and (cached := await self.cache.get_text(key)) is not None:
+            return cached
+
+        summary = await self._invoke(template, {"text": text}, expected_output_tokens=400 if pass_level == 1 else 800)
+        await self.cache.set_text(key, f"summary_pass_{pass_level}", summary)
+        return summary
+
+    async def _embed_batch(self, model_id: str, texts: List[str]) -> List[List[float]]:
+        client = self._embedding_client(model_id)
+        return await call_with_retry(
+            lambda: client.aembed_documents(texts),
+            get_limiter(split_model_id(model_id)[0], "embedding"),
+            estimated_tokens=sum(estimate_tokens(t) for t in texts)
+        )
+
+    async def get_embedding(self, text: str, use_cache: bool = True, model_id: Optional[str] = None) -> List[float]:
+        """
+        Embed a document. Concurrent calls are coalesced into batched requests.
+        Raises LLMCallFailed rather than returning a placeholder vector.
+        """
+        return (await self.get_embeddings([text], use_cache=use_cache, model_id=model_id))[0]
+
+    async def get_embeddings(self, texts: List[str], use_cache: bool = True, model_id: Optional[str] = None) -> List[List[float]]:
+        """
+        Embed many documents with model_id (default: the configured model).
+        Cached vectors are served from disk; the rest are sent as
+        EMBEDDING_BATCH_SIZE-sized requests.
+        Raises LLMCallFailed if any text could not be embedded (successes are still cached).
         """
-            
-        try:
-            chain = PromptTemplate.from_template(template) | self.llm | StrOutputParser()
-            return await chain.ainvoke({"text": text})
-        except Exception as e:
-            return f"Error generating summary: {e}"
-
-    async def get_embedding(self, text: str) -> List[float]:
-        if not self.embeddings:
-            return [0.0] * 1536
-            
-        try:
-            return await self.embeddings.aembed_query(text)
-        except Exception as e:
-            print(f"Embedding error: {e}")
-            return [0.0] * 1536
+        model_id = model_id or self.embedding_model_id
+        if model_id == MOCK_MODEL_ID:
+            return [self.mock_embeddings.embed(text) for text in texts]
+
+        keys = [self._embedding_key(model_id, text) for text in texts]
+        cached = await self.cache.get_vectors(keys) if use_cache else {}
+        todo = [(key, text) for key, text in zip(keys, texts) if key not in cached]
+
+        batcher = self._embedding_batcher(model_id)
+        fresh = await asyncio.gather(*(batcher.embed(text) for _, text in todo), return_exceptions=True)
+        computed = {key: vector for (key, _), vector in zip(todo, fresh) if not isinstance(vector, BaseException)}
+        await self.cache.set_vectors(computed)
+
+        errors = [e for e in fresh if isinstance(e, BaseException)]
+        if errors:
+            raise errors[0] if isinstance(errors[0], LLMCallFailed) else LLMCallFailed(str(errors[0]))
+
+        vectors = {**cached, **computed}
+        return [vectors[key] for key in keys]
+
+    async def get_query_embedding(self, text: str, model_id: Optional[str] = None) -> List[float]:
+        """
+        Embed a search query with model_id (default: the configured model), which must
+        match the model of the vectors being searched.
+        Sent on its own so interactive searches never wait on a batch.
+        """
+        model_id = model_id or self.embedding_model_id
+        if model_id == MOCK_MODEL_ID:
+            return self.mock_embeddings.embed(text)
+
+        client = self._embedding_client(model_id)
+        return await call_with_retry(
+            lambda: client.aembed_query(text),
+            get_limiter(split_model_id(model_id)[0], "embedding"),
+            estimated_tokens=estimate_tokens(text),
+            max_retries=1
+        )
 
     async def generate_blog_post(self, papers: List[Document]) -> str:
         # Legacy method kept for compatibility if needed, or redirect to new logic
@@ -69,13 +288,13 @@ class AIProcessor:
         # Simpler: just keep it as legacy fallback.
         if not self.llm:
             return "## Daily Digest (Mock)\n\nReal AI not configured."
-            
+
         summaries = "\n\n".join([f"Title: {p.metadata['title']}\nSummary: {p.page_content}" for p in papers])
-        
+
         template = """
         You are an expert tech editor writing a "Daily AI Research Digest".
         Write a cohesive, engaging blog post summarizing the following key research papers, engineering blogs, and industry news from today.
-        
+
         Style: Professional yet accessible, like a TechCrunch or TheVerge article.
         Structure:
         - Catchy Title for the day
@@ -83,61 +302,73 @@ class AIProcessor:
         - "Highlight of the Day" (pick the most interesting paper or blog post)
         - Quick hits for the others
         - Conclusion
-        
+
         Papers:
         {summaries}
         """
-        
+
         chain = PromptTemplate.from_template(template) | self.llm | StrOutputParser()
         return await chain.ainvoke({"summaries": summaries})
 
-    async def generate_structured_digest(self, news_items: List[str], research_papers: List[str]) -> str:
+    async def _cached_llm_text(self, kind: str, template: str, inputs: dict, expected_output_tokens: int, use_cache: bool = True) -> str:
+        key = self._llm_key(kind, template, "\x00".join(str(v) for v in inputs.values()))
+        if use_cache and (cached := await self.cache.get_text(key)) is not None:
+            return cached
+        text = await self._invoke(template, inputs, expected_output_tokens=expected_output_tokens)
+        await self.cache.set_text(key, kind, text)
+        return text
+
+    async def generate_structured_digest(self, news_items: List[str], research_papers: List[str], use_cache: bool = True) -> str:
+        """
+        Write the digest post for news_items and research_papers.
+        A day that fits in DIGEST_CHUNK_TOKENS is written in a single call. Bigger
+        days are map-reduced: chunks of items are turned into notes concurrently,
+        and the notes are merged into the post, so no item is left out and the
+        wall-clock time is set by the parallel map phase, not the prompt length.
+        Raises LLMCallFailed if the provider keeps failing.
+        """
         if not self.llm:
             return "## Daily Digest (Mock)\n\nReal AI not configured."
-            
-        news_text = "\n---\n".join(news_items)
-        research_text = "\n---\n".join(research_papers)
-        
-        template = """
-        You are an expert tech editor writing a "Daily AI Research Digest".
-        You have been provided with two sources of information:
-        1. **Industry News & Blogs**: High-level updates, product launches, and company news.
-        2. **Research Papers**: Academic pre-prints (ArXiv).
-        
-        **Goal**: Write a comprehensive, structured blog post that covers the most important developments.
-        
-        **Requirements**:
-        - **Don't miss the News**: The 'Industry News' section often contains the "gold" (major announcements). Ensure these are highlighted if significant.
-        - **Group by Topic**: Do not just list the research papers. Group them by topic (e.g., "LLM Architectures", "Computer Vision", "Robotics", "Safety").
-        - **Links are Critical**: You MUST link to the sources. Use Markdown format: `[Title](URL)`.
-        - **Formatting**: Use Markdown with clear headers.
-        
-        **Structure**:
-        # [Catchy Headline for the Day]
-        
-        ## 🚨 Top Stories
-        (Synthesize the biggest news from the Industry News section. ALWAYS link to the source: `[Article Title](URL)`.)
-        
-        ## 🧠 Research Deep Dive
-        (Group the research papers by topic. For each topic, provide a summary of the key advancements. Cite papers using `[Paper Title](URL)`.)
-        
-        ## ⚡ Quick Hits
-        (Bullet points for other interesting items that didn't fit above, mixed news and research. Link them!)
-        
-        ---
-        **Input Data**:
-        
-        ### SECTION 1: INDUSTRY NEWS & BLOGS
-        {news_text}
-        
-        ### SECTION 2: RESEARCH PAPERS
-        {research_text}
-        """
-        
-        try:
-            chain = PromptTemplate.from_template(template) | self.llm | StrOutputParser()
-            return await chain.ainvoke({"news_text": news_text, "research_text": research_text})
-        except Exception as e:
-            return f"Error generating digest: {e}"
+
+        tagged = [("news", item) for item in news_items] + [("research", item) for item in research_papers]
+        budget = settings.DIGEST_CHUNK_TOKENS
+        if sum(estimate_tokens(item) for _, item in tagged) <= budget:
+            return await self._cached_llm_text(
+                "digest", DIGEST_TEMPLATE,
+                {"news_text": "\n---\n".join(news_items), "research_text": "\n---\n".join(research_papers)},
+                expected_output_tokens=4000, use_cache=use_cache
+            )
+
+        # Map: notes per chunk, all chunks at once (the provider limiter bounds concurrency)
+        chunks = pack_by_tokens(tagged, budget, text=lambda tagged_item: tagged_item[1])
+        notes = await asyncio.gather(*(
+            self._cached_llm_text(
+                "digest_map", DIGEST_MAP_TEMPLATE,
+                {
+                    "part": str(i + 1),
+                    "parts": str(len(chunks)),
+                    "news_text": "\n---\n".join(item for kind, item in chunk if kind == "news") or "(none)",
+                    "research_text": "\n---\n".join(item for kind, item in chunk if kind == "research") or "(none)",
+                },
+                expected_output_tokens=settings.DIGEST_NOTES_TOKENS, use_cache=use_cache
+            )
+            for i, chunk in enumerate(chunks)
+        ))
+
+        # Reduce: merge notes in groups until they fit in one final prompt
+        while len(notes) > 1 and sum(estimate_tokens(n) for n in notes) > settings.DIGEST_REDUCE_TOKENS:
+            groups = pack_by_tokens(list(notes), settings.DIGEST_REDUCE_TOKENS, min_size=2)
+            notes = await asyncio.gather(*(
+                self._cached_llm_text(
+                    "digest_merge", DIGEST_MERGE_TEMPLATE, {"notes": "\n\n---\n\n".join(group)},
+                    expected_output_tokens=settings.DIGEST_NOTES_TOKENS, use_cache=use_cache
+                ) if len(group) > 1 else asyncio.sleep(0, result=group[0])
+                for group in groups
+            ))
+
+        return await self._cached_llm_text(
+            "digest_reduce", DIGEST_REDUCE_TEMPLATE, {"notes": "\n\n---\n\n".join(notes)},
+            expected_output_tokens=4000, use_cache=use_cache
+        )
 
 ai_processor = AIProcessor()
@@ -0,0 +1,172 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from src.core.config import settings
+
+T = TypeVar("T")
+
+# Conservative defaults per provider (entry-level paid tiers). Each can be
+# overridden through settings, e.g. LLM_REQUESTS_PER_MINUTE=5000.
+PROVIDER_LIMITS = {
+    "openai": {
+        "llm": {"rpm": 500, "tpm": 200_000},
+        "embedding": {"rpm": 3_000, "tpm": 1_000_000},
+    },
+    "gemini": {
+        "llm": {"rpm": 360, "tpm": 120_000},
+        "embedding": {"rpm": 1_500, "tpm": 1_000_000},
+    },
+}
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+class LLMCallFailed(Exception):
+    """Raised when a provider call still fails after all retries."""
+
+class TokenBucket:
+    """
+    Classic token bucket refilled continuously at rate_per_minute.
+    acquire() waits until enough tokens are available.
+    """
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1):
+        # A single oversized request must not wait forever
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+class ProviderLimiter:
+    """
+    Requests/min and tokens/min buckets plus a concurrency cap for one provider endpoint.
+    """
+    def __init__(self, rpm: int, tpm: int, max_concurrency: int):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int = 1):
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or loop is not self._loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self.requests._lock = asyncio.Lock()
+            self.tokens._lock = asyncio.Lock()
+            self._loop = loop
+
+        async with self._semaphore:
+            await self.requests.acquire(1)
+            await self.tokens.acquire(estimated_tokens)
+            yield
+
+_limiters: Dict[tuple, ProviderLimiter] = {}
+
+def get_limiter(provider: str, kind: str) -> ProviderLimiter:
+    """Return the shared limiter for (provider, kind), where kind is "llm" or "embedding"."""
+    if (provider, kind) not in _limiters:
+        defaults = PROVIDER_LIMITS.get(provider, PROVIDER_LIMITS["openai"])[kind]
+        if kind == "llm":
+            rpm = settings.LLM_REQUESTS_PER_MINUTE or defaults["rpm"]
+            tpm = settings.LLM_TOKENS_PER_MINUTE or defaults["tpm"]
+            concurrency = settings.LLM_MAX_CONCURRENCY
+        else:
+            rpm = settings.EMBEDDING_REQUESTS_PER_MINUTE or defaults["rpm"]
+            tpm = settings.EMBEDDING_TOKENS_PER_MINUTE or defaults["tpm"]
+            concurrency = settings.EMBEDDING_MAX_CONCURRENCY
+        _limiters[(provider, kind)] = ProviderLimiter(rpm, tpm, concurrency)
+    return _limiters[(provider, kind)]
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)."""
+    return max(1, len(text) // 4)
+
+def _status_code(exc: Exception) -> Optional[int]:
+    for attr in ("status_code", "code", "status"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None)
+
+def is_retryable(exc: Exception) -> bool:
+    status = _status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    # Network level failures carry no status code
+    return isinstance(exc, (asyncio.TimeoutError, ConnectionError)) or "timeout" in type(exc).__name__.lower() \
+        or "connection" in type(exc).__name__.lower()
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """Seconds requested by a Retry-After header, if the error carries one."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    ceiling = min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+async def call_with_retry(
+    fn: Callable[[], Awaitable[T]],
+    limiter: ProviderLimiter,
+    estimated_tokens: int = 1,
+    max_retries: Optional[int] = None
+) -> T:
+    """
+    Run fn under the limiter, retrying transient failures (429/5xx/timeouts) with
+    jittered exponential backoff that honours Retry-After.
+    Raises LLMCallFailed once retries are exhausted or the error is not transient.
+    """
+    max_retries = settings.LLM_MAX_RETRIES if max_retries is None else max_retries
+    for attempt in range(max_retries + 1):
+        async with limiter.slot(estimated_tokens):
+            try:
+                return await fn()
+            except Exception as e:
+                error = e
+        if not is_retryable(error) or attempt == max_retries:
+            raise LLMCallFailed(f"{type(error).__name__}: {error}") from error
+        delay = retry_after_seconds(error)
+        if delay is None:
+            delay = backoff_delay(attempt)
+        # Sleep outside the slot so other callers can use the concurrency while we wait
+        await asyncio.sleep(min(delay, settings.LLM_RETRY_MAX_DELAY))
@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from sqlalchemy import func, select, text
+
+from src.ai.embedding_models import model_slug
+from src.core.config import settings
+from src.db.models import PaperEmbedding
+from src.db.postgres import AsyncSessionLocal, engine, init_postgres
+from src.db.vector_index import distance_expr, embedding_expr, index_name, index_size_bytes
+from src.db.vector_store import NumpyIndex, NumpyVectorStore, PgVectorStore
+
+# Recall@k vs. latency for quantized search. Queries are stored vectors picked at
+# random; ground truth is an exact full-precision scan. For each re-rank candidate
+# count we report mean recall@k and per-query latency, then the smallest count
+# reaching the target recall (use it as VECTOR_RERANK_CANDIDATES).
+
+CANDIDATES = (10, 25, 50, 100, 200, 400, 800)
+
+def recall(found, truth) -> float:
+    return len(set(found) & set(truth)) / max(len(truth), 1)
+
+def report(label, rows, target):
+    print(f"\n{label}")
+    print(f"{'candidates':>10} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for candidates, rec, latencies in rows:
+        latencies = sorted(latencies)
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        print(f"{candidates:>10} {rec:>9.3f} {statistics.median(latencies):>8.1f} {p95:>8.1f}")
+    reached = [c for c, rec, _ in rows if rec >= target]
+    print(f"Smallest candidate count with recall >= {target}: {reached[0] if reached else 'not reached'}")
+
+async def timed_ids(store, model_id, vector, k, candidates=None):
+    start = time.perf_counter()
+    hits = await store.search(vector, model_id, limit=k, candidates=candidates)
+    return [h.unique_id for h in hits], (time.perf_counter() - start) * 1000
+
+def timed_index_ids(index, vector, k, candidates=None):
+    start = time.perf_counter()
+    hits = index.search(vector, k, 0, None, None, None, None, candidates)
+    return [h.unique_id for h in hits], (time.perf_counter() - start) * 1000
+
+async def benchmark_numpy(k, queries, target):
+    model = await NumpyVectorStore(settings.NUMPY_INDEX_PATH).active_model()
+    if model is None:
+        print(f"No vectors in {settings.NUMPY_INDEX_PATH}. Seed first.")
+        return
+    path = os.path.join(settings.NUMPY_INDEX_PATH, model_slug(model.model_id))
+    exact = NumpyIndex(path, dim=model.dimensions, dtype=settings.NUMPY_INDEX_DTYPE)
+    count = len(exact)
+    rng = np.random.default_rng(0)
+    vectors = [exact.vector(i) for i in rng.choice(count, min(queries, count), replace=False)]
+
+    baseline = [timed_index_ids(exact, v, k) for v in vectors]
+    truth = [ids for ids, _ in baseline]
+    full = exact.bytes_per_vector()
+    print(f"{model.model_id}: {count} vectors, k={k}, {len(vectors)} queries")
+    print(f"Exact {exact.dtype.name} scan: {full} bytes/vector, p50 {statistics.median(ms for _, ms in baseline):.1f} ms")
+
+    for mode in ("halfvec", "int8", "binary"):
+        index = NumpyIndex(path, dim=model.dimensions, dtype=settings.NUMPY_INDEX_DTYPE, quantization=mode)
+        len(index) # loads the index, building the quantized copy on first use
+        rows = []
+        for candidates in CANDIDATES:
+            results = [timed_index_ids(index, v, k, candidates) for v in vectors]
+            rows.append((
+                candidates,
+                statistics.mean(recall(ids, t) for (ids, _), t in zip(results, truth)),
+                [ms for _, ms in results]
+            ))
+        per_vector = index.bytes_per_vector()
+        report(f"{mode}: {per_vector} bytes/vector ({full / per_vector:.1f}x smaller)", rows, target)
+
+async def exact_ids(model, vector, k):
+    """Ground truth: force a sequential scan so no ANN index is involved."""
+    async with AsyncSessionLocal() as session:
+        await session.execute(text("SET LOCAL enable_indexscan = off"))
+        await session.execute(text("SET LOCAL enable_bitmapscan = off"))
+        result = await session.execute(
+            select(PaperEmbedding.unique_id)
+            .where(PaperEmbedding.model_id == model.model_id)
+            .order_by(distance_expr(embedding_expr(model.dimensions), vector))
+            .limit(k)
+        )
+        return list(result.scalars().all())
+
+async def benchmark_pgvector(k, queries, target):
+    await init_postgres()
+    store = PgVectorStore()
+    model = await store.active_model()
+    if model is None:
+        print("No embeddings in Postgres. Seed first.")
+        return
+    in_model = PaperEmbedding.model_id == model.model_id
+    async with AsyncSessionLocal() as session:
+        total = (await session.execute(select(func.count()).select_from(PaperEmbedding).where(in_model))).scalar_one()
+        result = await session.execute(
+            select(PaperEmbedding.embedding).where(in_model).order_by(func.random()).limit(queries)
+        )
+        vectors = [list(v) for v in result.scalars().all()]
+    async with engine.connect() as conn:
+        size = await index_size_bytes(conn, model.model_id)
+        table = (await conn.execute(text(f"SELECT pg_total_relation_size('{PaperEmbedding.__tablename__}')"))).scalar_one()
+
+    print(f"{model.model_id}: {total} vectors, k={k}, {len(vectors)} queries")
+    print(f"Index {index_name(model.model_id)}: {size / 2**20:.1f} MiB" if size else "No ANN index (VECTOR_INDEX_TYPE=none)")
+    print(f"Table incl. indexes: {table / 2**20:.1f} MiB")
+
+    truth = [await exact_ids(model, v, k) for v in vectors]
+    rows = []
+    for candidates in CANDIDATES if settings.VECTOR_QUANTIZATION != "none" else (k,):
+        results = [await timed_ids(store, model.model_id, v, k, candidates) for v in vectors]
+        rows.append((
+            candidates,
+            statistics.mean(recall(ids, t) for (ids, _), t in zip(results, truth)),
+            [ms for _, ms in results]
+        ))
+    report(f"{settings.VECTOR_INDEX_TYPE}, quantization={settings.VECTOR_QUANTIZATION}", rows, target)
+
+async def benchmark_vectors():
+    parser = argparse.ArgumentParser(description="Measure recall@k and latency of quantized vector search.")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    args = parser.parse_args()
+
+    if settings.VECTOR_BACKEND == "numpy":
+        await benchmark_numpy(args.k, args.queries, args.target_recall)
+    else:
+        await benchmark_pgvector(args.k, args.queries, args.target_recall)
+
+if __name__ == "__main__":
+    # numpy backend: compares every quantization mode on the local index.
+    # pgvector: measures the configured index; switch VECTOR_QUANTIZATION and rerun to compare.
+    asyncio.run(benchmark_vectors())
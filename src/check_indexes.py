@@ -0,0 +1,89 @@
+import asyncio
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.db.mongo import get_mongo_client, init_mongo
+from src.db.models import Paper, DailyDigest, UserAnnotation, WorkItem
+
+# The queries behind the UI and ingestion, with representative arguments.
+# (name, model, command): command is a find or aggregate, without the collection.
+_end = datetime.utcnow()
+_start = _end - timedelta(days=1)
+_window = {"published_date": {"$gte": _start, "$lt": _end}}
+
+HOT_QUERIES = [
+    ("feed: papers by date", Paper, {"find": {"filter": _window, "sort": {"published_date": -1}}}),
+    ("feed: latest papers", Paper, {"find": {"filter": {}, "sort": {"published_date": -1}, "limit": 20}}),
+    ("digest: papers in window", Paper, {"find": {"filter": _window}}),
+    ("digest: by date", DailyDigest, {"find": {"filter": {"date": {"$gte": _start, "$lt": _end}}, "limit": 1}}),
+    ("archive: page", Paper, {"find": {"filter": {}, "sort": {"published_date": -1, "_id": -1}, "limit": 51}}),
+    ("archive: page by source", Paper, {"find": {
+        "filter": {"source": {"$in": ["arxiv"]}, **_window}, "sort": {"published_date": -1, "_id": -1}, "limit": 51
+    }}),
+    ("archive: facets in window", Paper, {"aggregate": {"pipeline": [
+        {"$match": _window}, {"$group": {"_id": "$source", "count": {"$sum": 1}}}
+    ]}}),
+    ("ingest: existing ids", Paper, {"find": {"filter": {"unique_id": {"$in": ["2401.00001", "2401.00002"]}}}}),
+    ("ingest: failed items", Paper, {"find": {"filter": {"needs_retry": True}, "limit": 200}}),
+    ("ingest: claim work item", WorkItem, {"find": {"filter": {"$or": [
+        {"status": "queued"}, {"status": "leased", "lease_expires_at": {"$lt": _end}}
+    ]}, "sort": {"created_at": 1}, "limit": 1}}),
+    ("library: bookmarks", UserAnnotation, {"find": {"filter": {"is_bookmarked": True}, "sort": {"updated_at": -1}}}),
+    ("feed: bookmark statuses", UserAnnotation, {"find": {
+        "filter": {"unique_id": {"$in": ["2401.00001", "2401.00002"]}, "is_bookmarked": True}
+    }}),
+]
+
+def _plan_stages(node, stages: list, indexes: set):
+    """Collect every plan stage name and index used, at any depth of an explain document."""
+    if isinstance(node, dict):
+        if isinstance(node.get("stage"), str):
+            stages.append(node["stage"])
+        if isinstance(node.get("indexName"), str):
+            indexes.add(node["indexName"])
+        for key, value in node.items():
+            # Rejected plans were not used; don't report their stages
+            if key != "rejectedPlans":
+                _plan_stages(value, stages, indexes)
+    elif isinstance(node, list):
+        for item in node:
+            _plan_stages(item, stages, indexes)
+
+async def explain(model, command: dict) -> dict:
+    db = get_mongo_client().researcher
+    kind, spec = next(iter(command.items()))
+    body = {kind: model.get_settings().name, **spec}
+    if kind == "aggregate":
+        body["cursor"] = {}
+    return await db.command({"explain": body, "verbosity": "queryPlanner"})
+
+async def check_indexes() -> bool:
+    """Explain every hot query; returns False if any of them scans a whole collection."""
+    print("Initializing MongoDB (creates any missing declared indexes)...")
+    await init_mongo()
+
+    ok = True
+    for name, model, command in HOT_QUERIES:
+        stages, indexes = [], set()
+        _plan_stages(await explain(model, command), stages, indexes)
+        if "COLLSCAN" in stages:
+            ok = False
+            verdict = "COLLSCAN"
+        elif "SORT" in stages:
+            verdict = "in-memory sort"
+        elif "EOF" in stages and not indexes:
+            verdict = "empty collection"
+        else:
+            verdict = "ok"
+        print(f"  {verdict:<16} {name:<28} indexes: {', '.join(sorted(indexes)) or '-'}")
+
+    print("All hot queries use an index." if ok else "Some hot queries scan a whole collection; check Settings.indexes in src/db/models.py.")
+    return ok
+
+if __name__ == "__main__":
+    # Run after changing a query or the declared indexes. Exits non-zero on a collection scan.
+    sys.exit(0 if asyncio.run(check_indexes()) else 1)
@@ -0,0 +1,51 @@
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Coroutine, Dict, Optional
+
+# A single long-lived event loop on a daemon thread, shared by every Streamlit
+# session in the process. Blocking code (the UI) submits coroutines with
+# run_async() instead of spinning up a loop per call, so database clients,
+# connection pools and rate limiters created on the loop are reused across reruns.
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_start_lock = threading.Lock()
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """The background loop, started on first use."""
+    global _loop, _thread
+    with _start_lock:
+        if _loop is None or not _thread.is_alive():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(target=_loop.run_forever, name="async-runtime", daemon=True)
+            _thread.start()
+    return _loop
+
+def run_async(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """Run coro on the background loop and block the calling thread until it finishes."""
+    loop = get_loop()
+    if threading.current_thread() is _thread:
+        coro.close()
+        raise RuntimeError("run_async() called from the runtime loop; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+# loop -> {key: task}. Keyed by loop because clients and pools are bound to the
+# loop they were created on; scripts using asyncio.run() get their own.
+_once: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]]" = weakref.WeakKeyDictionary()
+
+async def run_once(key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Await factory() once per event loop; later and concurrent callers share its result.
+    A failed run is forgotten so the next caller retries.
+    """
+    tasks = _once.setdefault(asyncio.get_running_loop(), {})
+    task = tasks.get(key)
+    if task is None:
+        task = tasks[key] = asyncio.ensure_future(factory())
+    try:
+        return await asyncio.shield(task)
+    except BaseException:
+        if task.done() and (task.cancelled() or task.exception() is not None) and tasks.get(key) is task:
+            del tasks[key]
+        raise
@@ -0,0 +1,153 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Union
+
+import numpy as np
+from beanie.odm.operators.find.comparison import In
+from pymongo.errors import BulkWriteError
+from sqlalchemy import String, any_, bindparam, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+
+from src.db.models import Paper, PaperEmbedding, PaperIdView
+from src.db.postgres import AsyncSessionLocal
+from src.db.read_cache import PAPERS, read_cache
+
+# Batched helpers for ingestion and seeding: a few queries per batch of items
+# instead of a few round trips per item.
+
+async def find_existing_ids(unique_ids: Sequence[str]) -> Set[str]:
+    """Return the subset of unique_ids already stored in Mongo (one $in query)."""
+    if not unique_ids:
+        return set()
+    found = await Paper.find(In(Paper.unique_id, list(unique_ids))).project(PaperIdView).to_list()
+    return {p.unique_id for p in found}
+
+async def find_ids_missing_embeddings(unique_ids: Sequence[str], model_id: str) -> Set[str]:
+    """Return the subset of unique_ids with no model_id row in paper_embeddings (one = ANY(...) query)."""
+    if not unique_ids:
+        return set()
+    ids_param = bindparam("ids", value=list(unique_ids), type_=ARRAY(String))
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(PaperEmbedding.unique_id).where(
+                PaperEmbedding.unique_id == any_(ids_param), PaperEmbedding.model_id == model_id
+            )
+        )
+        present = set(result.scalars().all())
+    return set(unique_ids) - present
+
+async def find_embeddings(unique_ids: Sequence[str], model_id: str) -> Dict[str, np.ndarray]:
+    """model_id vectors of the unique_ids that have one (one = ANY(...) query)."""
+    if not unique_ids:
+        return {}
+    ids_param = bindparam("ids", value=list(unique_ids), type_=ARRAY(String))
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(PaperEmbedding.unique_id, PaperEmbedding.embedding).where(
+                PaperEmbedding.unique_id == any_(ids_param), PaperEmbedding.model_id == model_id
+            )
+        )
+        return {uid: np.asarray(vector, dtype=np.float32) for uid, vector in result.all()}
+
+async def insert_papers(papers: List[Paper]) -> List[Paper]:
+    """
+    Insert papers with a single unordered insert_many.
+    Documents rejected as duplicates (e.g. inserted concurrently elsewhere) are
+    skipped; the papers actually written are returned.
+    """
+    if not papers:
+        return []
+    try:
+        await Paper.insert_many(papers, ordered=False)
+        return papers
+    except BulkWriteError as e:
+        failed = {err["index"] for err in e.details.get("writeErrors", [])}
+        non_duplicate = [err for err in e.details.get("writeErrors", []) if err.get("code") != 11000]
+        if non_duplicate:
+            raise
+        return [p for i, p in enumerate(papers) if i not in failed]
+    finally:
+        read_cache.invalidate(PAPERS)
+
+async def flag_for_retry(unique_ids: Sequence[str], error: str):
+    """Mark stored papers for the retry pass (retry_failed_items) after an AI or vector step failed."""
+    if not unique_ids:
+        return
+    try:
+        await Paper.find(In(Paper.unique_id, list(unique_ids))).update(
+            {"$set": {"needs_retry": True, "last_error": error}}
+        )
+    finally:
+        read_cache.invalidate(PAPERS)
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # paper_embeddings uses TIMESTAMP WITHOUT TIME ZONE, like Mongo's naive UTC datetimes
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def embedding_row(paper: Union[Paper, dict], vector: List[float], model_id: str) -> dict:
+    """Build a paper_embeddings row, denormalizing the fields search filters and displays."""
+    data = paper.model_dump() if isinstance(paper, Paper) else paper
+    return {
+        "unique_id": data["unique_id"],
+        "model_id": model_id,
+        "embedding": vector,
+        "source": data.get("source"),
+        "published_date": _naive_utc(data.get("published_date")),
+        "title": data.get("title"),
+        "pdf_url": data.get("pdf_url"),
+        "categories": data.get("categories") or [],
+    }
+
+async def insert_embeddings(rows: Iterable[dict]) -> int:
+    """
+    Bulk insert rows built by embedding_row(), ignoring (unique_id, model_id) pairs
+    that already have one. Returns the number of rows submitted.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    stmt = insert(PaperEmbedding).on_conflict_do_nothing(
+        index_elements=[PaperEmbedding.unique_id, PaperEmbedding.model_id]
+    )
+    async with AsyncSessionLocal() as session:
+        await session.execute(stmt, rows)
+        await session.commit()
+    return len(rows)
+
+async def backfill_embedding_metadata(batch_size: int = 500, log_fn=print) -> int:
+    """
+    Copy source/published_date/title/pdf_url/categories from Mongo onto
+    paper_embeddings rows written before those columns existed.
+    Returns the number of rows updated.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(PaperEmbedding.id, PaperEmbedding.unique_id, PaperEmbedding.model_id)
+                .where(PaperEmbedding.title.is_(None), PaperEmbedding.id > last_id)
+                .order_by(PaperEmbedding.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            papers = await Paper.find(In(Paper.unique_id, [r.unique_id for r in rows])).to_list()
+            by_id = {p.unique_id: p for p in papers}
+            values = []
+            for row in rows:
+                if paper := by_id.get(row.unique_id):
+                    meta = embedding_row(paper, [], row.model_id)
+                    del meta["unique_id"], meta["model_id"], meta["embedding"]
+                    values.append({"id": row.id, **meta})
+            if values:
+                await session.execute(update(PaperEmbedding), values)
+                await session.commit()
+                updated += len(values)
+    if updated:
+        log_fn(f"Backfilled search metadata for {updated} embeddings.")
+    return updated
@@ -1,14 +1,16 @@
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
 from uuid import UUID, uuid4
 
 # MongoDB / Beanie
-from beanie import Document
-from pydantic import Field
+from beanie import Document, PydanticObjectId
+from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING, IndexModel, TEXT
 
 # Postgres / SQLAlchemy
 from pgvector.sqlalchemy import Vector
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 # --- MongoDB Models ---
@@ -20,7 +22,7 @@ class Paper(Document):
     """
     # Unique identifier: use URL for blogs, arxiv_id for papers (or just URL for everything?)
     # We'll use a calculated 'unique_id' which is arxiv_id OR the url for blogs.
-    unique_id: str = Field(unique=True, index=True) 
+    unique_id: str # unique, see Settings.indexes
     
     arxiv_id: Optional[str] = None # Optional now
     source: str = "arxiv" # arxiv, openai, etc.
@@ -38,26 +40,120 @@ class Paper(Document):
     # Category tags
     categories: List[str] = []
     
+    # Set when an AI step (summary/embedding) failed after retries; picked up by the next ingestion
+    needs_retry: bool = False
+    last_error: Optional[str] = None
+    
     class Settings:
         name = "papers"
+        indexes = [
+            IndexModel([("unique_id", ASCENDING)], name="unique_id", unique=True),
+            # Only papers awaiting a retry are indexed
+            IndexModel([("needs_retry", ASCENDING)], name="needs_retry", partialFilterExpression={"needs_retry": True}),
+            # Full-text index for keyword search (exact model names, acronyms, authors)
+            IndexModel(
+                [("title", TEXT), ("abstract", TEXT), ("authors", TEXT)],
+                name="paper_text",
+                weights={"title": 10, "authors": 5, "abstract": 1},
+                default_language="english"
+            ),
+            # Date windows (feed, digest, archive) newest first; _id keeps keyset pagination stable
+            IndexModel([("published_date", DESCENDING), ("_id", DESCENDING)], name="published_date_id"),
+            IndexModel([("source", ASCENDING), ("published_date", DESCENDING), ("_id", DESCENDING)], name="source_published_date_id"),
+        ]
+
+class PaperIdView(BaseModel):
+    """
+    Projection holding only the unique_id, for cheap existence checks.
+    """
+    unique_id: str
+
+class PaperListView(BaseModel):
+    """
+    Projection with just the fields list views show (no abstract or summaries).
+    """
+    id: PydanticObjectId = Field(alias="_id")
+    unique_id: str
+    source: str = "arxiv"
+    title: str
+    authors: List[str] = []
+    published_date: datetime
+    pdf_url: str
+    categories: List[str] = []
+
+class ArchivePage(BaseModel):
+    """
+    One page of archive results, newest first.
+    Pass next_cursor back to get the following page; None means this was the last one.
+    """
+    papers: List[PaperListView]
+    next_cursor: Optional[str] = None
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class ArchiveFacets(BaseModel):
+    """
+    Counts behind the archive overview, from one aggregation.
+    days holds "YYYY-MM-DD" buckets, newest first; sources ignores the source filter
+    so the filter's options don't disappear once some are selected.
+    """
+    days: List[FacetCount] = []
+    sources: List[FacetCount] = []
+
+    @property
+    def total(self) -> int:
+        return sum(d.count for d in self.days)
+
+class SearchHit(BaseModel):
+    """
+    A search result: display fields straight from Postgres plus how close it was to the query.
+    `paper` is only populated when the search was asked to hydrate from Mongo.
+    """
+    unique_id: str
+    title: Optional[str] = None
+    source: Optional[str] = None
+    published_date: Optional[datetime] = None
+    pdf_url: Optional[str] = None
+    distance: Optional[float] = None # vector distance; None for keyword-only hybrid hits
+    score: float # relevance in [0, 1], higher is better
+    paper: Optional[Paper] = None
+
+class EmbeddingModelInfo(BaseModel):
+    """
+    An embedding model with vectors in the vector store.
+    Searches use the single active model; a new model is backfilled alongside it
+    and activated once backfill_done.
+    """
+    model_id: str # "<provider>:<model>", see src/ai/embedding_models.py
+    dimensions: int
+    active: bool = False
+    backfill_cursor: Optional[str] = None # Paper id the backfill has re-embedded up to
+    backfill_done: bool = False
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    activated_at: Optional[datetime] = None
 
 class DailyDigest(Document):
     """
     Stores generated daily digests/blogs.
     """
-    date: datetime = Field(unique=True) # One digest per day
+    date: datetime # One digest per day (unique index)
     markdown_content: str
     paper_ids: List[str] # List of unique_ids included
     
     class Settings:
         name = "daily_digests"
+        indexes = [
+            IndexModel([("date", DESCENDING)], name="date", unique=True),
+        ]
 
 class UserAnnotation(Document):
     """
     Stores user interactions.
     """
     # Key linked to Paper.unique_id
-    unique_id: str = Field(unique=True, index=True) 
+    unique_id: str # unique, see Settings.indexes
     is_bookmarked: bool = False
     rating: Optional[int] = None
     notes: Optional[str] = None
@@ -65,17 +161,123 @@ class UserAnnotation(Document):
 
     class Settings:
         name = "user_annotations"
+        indexes = [
+            IndexModel([("unique_id", ASCENDING)], name="unique_id", unique=True),
+            # Library: bookmarked papers, most recently changed first
+            IndexModel([("is_bookmarked", ASCENDING), ("updated_at", DESCENDING)], name="is_bookmarked_updated_at"),
+        ]
 
 class RSSFeedConfig(Document):
     """
     Configuration for RSS feeds.
     """
-    name: str = Field(unique=True)
+    name: str # unique, see Settings.indexes
     url: str
     is_active: bool = True
     
+    # HTTP cache validators from the last successful fetch (conditional GET)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    
     class Settings:
         name = "rss_feed_configs"
+        indexes = [
+            IndexModel([("name", ASCENDING)], name="name", unique=True),
+        ]
+
+class Job(Document):
+    """
+    A unit of slow work (LLM calls) run by src/worker.py instead of the UI.
+    `key` identifies the work, e.g. "analyze:<unique_id>" or "digest:2024-05-01";
+    at most one job per key is queued or running at a time (`active`), so repeated
+    clicks join the job already in flight. Finished jobs are kept as history.
+    """
+    key: str
+    kind: str # "analyze", "digest", "ingest" or "seed", see src/services/jobs.py
+    payload: Dict[str, Any] = {}
+    status: str = "queued" # queued, running, done, failed
+    active: bool = True # queued or running
+    attempts: int = 0
+    error: Optional[str] = None
+    worker_id: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None # bumped by the worker while the job runs
+    finished_at: Optional[datetime] = None
+
+    class Settings:
+        name = "jobs"
+        indexes = [
+            # Single flight: one queued/running job per key
+            IndexModel([("key", ASCENDING)], name="key_active", unique=True, partialFilterExpression={"active": True}),
+            # Workers claim the oldest queued job
+            IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"),
+            # Latest job for a key, for status polling
+            IndexModel([("key", ASCENDING), ("created_at", DESCENDING)], name="key_created_at"),
+        ]
+
+class WorkItem(Document):
+    """
+    A fetched item waiting to be summarized, embedded and stored by an ingest
+    worker (src/services/work_items.py). Workers lease items; a lease that
+    expires without being renewed (the worker died) makes the item claimable
+    again. Items are deleted once their paper is stored.
+    """
+    unique_id: str
+    item: Dict[str, Any] # raw metadata from the arXiv/RSS clients
+    status: str = "queued" # queued, leased, failed
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    attempts: int = 0
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    class Settings:
+        name = "work_items"
+        indexes = [
+            # The coordinator never queues the same item twice
+            IndexModel([("unique_id", ASCENDING)], name="unique_id", unique=True),
+            # Workers lease the oldest queued items
+            IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"),
+            # Expired leases are re-claimed, and a worker renews its own leases
+            IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)], name="status_lease_expires_at"),
+        ]
+
+class TaskLock(Document):
+    """
+    Distributed lock held while a scheduled task runs (src/services/scheduler.py).
+    The holder renews expires_at while it works; an expired lock is free to take.
+    """
+    name: str
+    owner: str
+    expires_at: datetime
+
+    class Settings:
+        name = "task_locks"
+        indexes = [
+            IndexModel([("name", ASCENDING)], name="name", unique=True),
+        ]
+
+class TaskRun(Document):
+    """
+    One run of a scheduled task (ingest, backfill, digest, publish, seed), with
+    its stats, duration and the tail of its log.
+    """
+    task: str
+    status: str = "running" # running, ok, failed
+    host: Optional[str] = None
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+    stats: Dict[str, Any] = {}
+    error: Optional[str] = None
+    log: List[str] = []
+
+    class Settings:
+        name = "task_runs"
+        indexes = [
+            IndexModel([("task", ASCENDING), ("started_at", DESCENDING)], name="task_started_at"),
+        ]
 
 # --- Postgres Models ---
 
@@ -84,15 +286,45 @@ class Base(DeclarativeBase):
 
 class PaperEmbedding(Base):
     """
-    Stores vector embeddings.
+    Stores vector embeddings, one per paper per embedding model.
     """
     __tablename__ = "paper_embeddings"
+    __table_args__ = (
+        Index("ix_paper_embeddings_categories", "categories", postgresql_using="gin"),
+        Index("uq_paper_embeddings_unique_id_model_id", "unique_id", "model_id", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     # Linked to Paper.unique_id
-    unique_id: Mapped[str] = mapped_column(String, unique=True, index=True)
+    unique_id: Mapped[str] = mapped_column(String, index=True)
+    # EmbeddingModel.model_id that produced the vector
+    model_id: Mapped[str] = mapped_column(String)
     
-    # Embedding vector
-    embedding = mapped_column(Vector(1536))
+    # Embedding vector. No fixed dimension so models of different sizes can share
+    # the table; ANN indexes are per model (see src/db/vector_index.py).
+    embedding = mapped_column(Vector())
     
+    # Denormalized from Paper so searches can filter and render without a Mongo lookup.
+    # Nullable: rows written before these columns existed are filled by backfill_embedding_metadata().
+    source: Mapped[Optional[str]] = mapped_column(String, index=True, nullable=True)
+    published_date: Mapped[Optional[datetime]] = mapped_column(DateTime, index=True, nullable=True)
+    title: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    pdf_url: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    categories: Mapped[Optional[List[str]]] = mapped_column(ARRAY(String), nullable=True)
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+class EmbeddingModel(Base):
+    """
+    Registry of embedding models stored in paper_embeddings (pgvector backend).
+    Exactly one row is active, so switching models is a single UPDATE.
+    """
+    __tablename__ = "embedding_models"
+
+    model_id: Mapped[str] = mapped_column(String, primary_key=True)
+    dimensions: Mapped[int] = mapped_column(Integer)
+    active: Mapped[bool] = mapped_column(Boolean, default=False)
+    backfill_cursor: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    backfill_done: Mapped[bool] = mapped_column(Boolean, default=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    activated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
@@ -1,12 +1,90 @@
+from datetime import datetime
+from typing import Optional
+
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
 from src.core.config import settings
-from src.db.models import Paper, DailyDigest, UserAnnotation, RSSFeedConfig
+from src.core.runtime import run_once
+from src.db.models import Paper, DailyDigest, UserAnnotation, RSSFeedConfig, Job, WorkItem, TaskLock, TaskRun
+
+DOCUMENT_MODELS = [Paper, DailyDigest, UserAnnotation, RSSFeedConfig, Job, WorkItem, TaskLock, TaskRun]
+
+# One client, and so one connection pool, per event loop (see src/core/runtime.py).
+_client: Optional[AsyncIOMotorClient] = None
+
+def get_mongo_client() -> AsyncIOMotorClient:
+    """The shared client; only valid after init_mongo() on the current loop."""
+    if _client is None:
+        raise RuntimeError("init_mongo() has not been called")
+    return _client
+
+def get_collection(model):
+    """Driver-level collection behind a Beanie model, for atomic find-and-modify operations."""
+    return get_mongo_client().researcher[model.get_settings().name]
+
+# Which duplicate survives when merge_duplicate_keys() folds a group together
+# (sort key, highest wins; ties keep the oldest). Other collections keep the oldest.
+_KEEP = {
+    # The most fully processed paper
+    Paper: lambda doc: (doc.get("summary_pass_2") is not None, doc.get("summary_pass_1") is not None, not doc.get("needs_retry")),
+    # The user's latest edit
+    UserAnnotation: lambda doc: doc.get("updated_at") or datetime.min,
+    # The most recently generated digest
+    DailyDigest: lambda doc: doc["_id"],
+}
+
+async def merge_duplicate_keys(database, models=DOCUMENT_MODELS, log_fn=print) -> int:
+    """
+    Merge documents that share a key declared unique in Settings.indexes, so that
+    init_beanie can build the index on a database written before it existed.
+    The surviving document takes missing fields from the others, which are deleted.
+    Collections whose unique index already exists are skipped. Returns the number deleted.
+    """
+    deleted = 0
+    for model in models:
+        # The declared Settings: get_settings() is only filled in by init_beanie
+        collection = database[model.Settings.name]
+        existing = await collection.index_information()
+        for index in getattr(model.Settings, "indexes", []):
+            spec = index.document
+            # Partial unique indexes (the job queue) allow duplicates outside the filter
+            if not spec.get("unique") or "partialFilterExpression" in spec or spec["name"] in existing:
+                continue
+            fields = list(spec["key"])
+            groups = await collection.aggregate([
+                {"$group": {"_id": {f: f"${f}" for f in fields}, "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+                {"$match": {"count": {"$gt": 1}}},
+            ], allowDiskUse=True).to_list(None)
+            for group in groups:
+                docs = await collection.find({"_id": {"$in": group["ids"]}}).sort("_id", 1).to_list(None)
+                docs.sort(key=_KEEP.get(model, lambda doc: 0), reverse=True)
+                keep, *rest = docs
+                merged = dict(keep)
+                for doc in rest:
+                    for field, value in doc.items():
+                        if merged.get(field) is None and value is not None:
+                            merged[field] = value
+                await collection.replace_one({"_id": keep["_id"]}, merged)
+                await collection.delete_many({"_id": {"$in": [doc["_id"] for doc in rest]}})
+                deleted += len(rest)
+            if groups:
+                log_fn(f"Merged {len(groups)} duplicate {', '.join(fields)} keys in {collection.name} before creating its unique index.")
+    return deleted
+
+async def _connect():
+    global _client
+    if _client is not None:
+        # Left over from a previous event loop; Motor clients can't move between loops
+        _client.close()
+    _client = AsyncIOMotorClient(settings.MONGODB_URL, maxPoolSize=settings.MONGODB_MAX_POOL_SIZE)
+    # Default database name 'researcher' if not specified in URL
+    # Duplicates left by older versions would make the unique indexes fail to build
+    await merge_duplicate_keys(_client.researcher)
+    await init_beanie(database=_client.researcher, document_models=DOCUMENT_MODELS)
 
 async def init_mongo():
     """
     Initialize MongoDB connection and Beanie ODM.
+    Idempotent: only the first call on an event loop does any work.
     """
-    client = AsyncIOMotorClient(settings.MONGODB_URL)
-    # Default database name 'researcher' if not specified in URL
-    await init_beanie(database=client.researcher, document_models=[Paper, DailyDigest, UserAnnotation, RSSFeedConfig])
+    await run_once("mongo", _connect)
@@ -1,10 +1,21 @@
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from sqlalchemy.pool import NullPool
 from src.core.config import settings
+from src.core.runtime import run_once
+from src.ai.embedding_models import configured_model_id
 from src.db.models import Base
+from src.db.vector_index import ensure_vector_index, managed_indexes
 
-# Create async engine with NullPool to allow use across multiple asyncio.run() loops in Streamlit
-engine = create_async_engine(settings.POSTGRES_URL, echo=False, poolclass=NullPool)
+# Pooled async engine. Connections are bound to the event loop that opened them;
+# the UI runs everything on one long-lived loop (src/core/runtime.py), and
+# init_postgres() drops the pool if it is ever called from a new loop.
+engine = create_async_engine(
+    settings.POSTGRES_URL,
+    echo=False,
+    pool_size=settings.POSTGRES_POOL_SIZE,
+    max_overflow=settings.POSTGRES_MAX_OVERFLOW,
+    pool_recycle=settings.POSTGRES_POOL_RECYCLE,
+    pool_pre_ping=True
+)
 
 # Session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -13,15 +24,82 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False
 )
 
-async def init_postgres():
+# Columns added after the first release. create_all() only creates missing
+# tables, so existing deployments pick these up here.
+MIGRATIONS = [
+    "ALTER TABLE paper_embeddings ADD COLUMN IF NOT EXISTS source VARCHAR",
+    "ALTER TABLE paper_embeddings ADD COLUMN IF NOT EXISTS published_date TIMESTAMP WITHOUT TIME ZONE",
+    "ALTER TABLE paper_embeddings ADD COLUMN IF NOT EXISTS title VARCHAR",
+    "ALTER TABLE paper_embeddings ADD COLUMN IF NOT EXISTS pdf_url VARCHAR",
+    "ALTER TABLE paper_embeddings ADD COLUMN IF NOT EXISTS categories VARCHAR[]",
+    "CREATE INDEX IF NOT EXISTS ix_paper_embeddings_source ON paper_embeddings (source)",
+    "CREATE INDEX IF NOT EXISTS ix_paper_embeddings_published_date ON paper_embeddings (published_date)",
+    "CREATE INDEX IF NOT EXISTS ix_paper_embeddings_categories ON paper_embeddings USING gin (categories)",
+    "ALTER TABLE paper_embeddings ADD COLUMN IF NOT EXISTS model_id VARCHAR",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_paper_embeddings_unique_id_model_id ON paper_embeddings (unique_id, model_id)",
+]
+
+async def _migrate_unversioned_embeddings(conn):
     """
-    Initialize Postgres tables.
-    Also ensures pgvector extension is created.
+    Embeddings used to be one vector(1536) per paper with no model recorded.
+    Convert such a table in place: unconstrained vector column, one row per
+    (unique_id, model_id), and existing rows attributed to the configured model,
+    which becomes the active one.
     """
+    column_type = (await conn.execute(text(
+        "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+        "WHERE attrelid = 'paper_embeddings'::regclass AND attname = 'embedding'"
+    ))).scalar_one()
+    if column_type == "vector":
+        return
+    dimensions = int(column_type[len("vector("):-1])
+
+    # Indexes on the fixed-size column would block the type change
+    for name in await managed_indexes(conn):
+        await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    await conn.execute(text("ALTER TABLE paper_embeddings ALTER COLUMN embedding TYPE vector"))
+    await conn.execute(text("DROP INDEX IF EXISTS ix_paper_embeddings_unique_id"))
+    await conn.execute(text("CREATE INDEX ix_paper_embeddings_unique_id ON paper_embeddings (unique_id)"))
+
+    model_id = configured_model_id()
+    result = await conn.execute(
+        text("UPDATE paper_embeddings SET model_id = :model_id WHERE model_id IS NULL"), {"model_id": model_id}
+    )
+    await conn.execute(text("ALTER TABLE paper_embeddings ALTER COLUMN model_id SET NOT NULL"))
+    if result.rowcount:
+        await conn.execute(text(
+            "INSERT INTO embedding_models (model_id, dimensions, active, backfill_done, created_at, activated_at) "
+            "VALUES (:model_id, :dimensions, true, true, now(), now()) ON CONFLICT (model_id) DO NOTHING"
+        ), {"model_id": model_id, "dimensions": dimensions})
+
+_schema_ready = False
+
+async def _setup():
+    global _schema_ready
+    # Connections pooled under a previous event loop can't be used (or closed) from this one
+    await engine.dispose(close=False)
+    if _schema_ready:
+        return
     async with engine.begin() as conn:
         # Create extension if not exists (needs superuser usually, 
         # but docker pgvector image has it enabled or user has rights)
         await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
         await conn.run_sync(Base.metadata.create_all)
+        for statement in MIGRATIONS:
+            await conn.execute(text(statement))
+        await _migrate_unversioned_embeddings(conn)
+        await ensure_vector_index(conn)
+    _schema_ready = True
+
+async def init_postgres():
+    """
+    Initialize Postgres tables.
+    Also ensures pgvector extension is created.
+    Nothing to do when embeddings live in the in-process numpy store.
+    Idempotent: the schema is set up once per process, the pool once per event loop.
+    """
+    if settings.VECTOR_BACKEND != "pgvector":
+        return
+    await run_once("postgres", _setup)
 
 from sqlalchemy import text
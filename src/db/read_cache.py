@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, Union
+
+from src.core.config import settings
+
+# Namespaces: one per kind of data a write can change
+PAPERS = "papers"
+ANNOTATIONS = "annotations"
+DIGESTS = "digests"
+FEEDS = "feeds"
+CHANGELOGS = "changelogs"
+
+class ReadCache:
+    """
+    Small in-process cache for read results shown in the UI.
+
+    Every entry depends on one or more namespaces (e.g. the library depends on
+    "annotations" and "papers"). A write bumps its namespace's generation with
+    invalidate(), which makes every entry depending on it stale at once. Entries
+    also expire after a TTL, which bounds staleness for writes made by other
+    processes. The least recently used entries are evicted beyond max_entries.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, enabled: bool = True):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict() # (namespaces, key) -> (generations, expires, value)
+        self._generations: Dict[str, int] = {}
+
+    def _snapshot(self, namespaces: Tuple[str, ...]) -> Tuple[int, ...]:
+        return tuple(self._generations.get(ns, 0) for ns in namespaces)
+
+    async def get_or_load(
+        self,
+        namespaces: Union[str, Tuple[str, ...]],
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        """
+        Cached value for key, calling loader() on a miss. The value is dropped when
+        any of `namespaces` is invalidated or after ttl seconds (default: self.ttl).
+        """
+        if not self.enabled:
+            return await loader()
+        if isinstance(namespaces, str):
+            namespaces = (namespaces,)
+        entry_key = (namespaces, key)
+        with self._lock:
+            generations = self._snapshot(namespaces)
+            entry = self._entries.get(entry_key)
+            if entry and entry[0] == generations and entry[1] > time.monotonic():
+                self._entries.move_to_end(entry_key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        value = await loader()
+        with self._lock:
+            # Don't store a result that may have been read before a concurrent invalidate()
+            if self._snapshot(namespaces) == generations:
+                expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+                self._entries[entry_key] = (generations, expires, value)
+                self._entries.move_to_end(entry_key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, *namespaces: str):
+        """Make everything depending on these namespaces stale; call after writing to them."""
+        with self._lock:
+            for ns in namespaces:
+                self._generations[ns] = self._generations.get(ns, 0) + 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+read_cache = ReadCache(
+    ttl=settings.READ_CACHE_TTL,
+    max_entries=settings.READ_CACHE_MAX_ENTRIES,
+    enabled=settings.READ_CACHE_ENABLED
+)
@@ -0,0 +1,224 @@
+from typing import Dict, List, Optional, Tuple
+
+from pgvector.sqlalchemy import BIT, HALFVEC, Vector
+from sqlalchemy import cast, func, literal, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from src.ai.embedding_models import model_slug
+from src.core.config import settings
+from src.db.models import EmbeddingModel, PaperEmbedding
+
+# Managed ANN indexes on paper_embeddings.embedding, one per embedding model.
+# The column has no fixed dimension, so each index is a partial expression index:
+#   USING hnsw ((embedding::vector(<dims>)) ...) WHERE model_id = '<model>'
+# and searches cast the column the same way (embedding_expr) so the planner can use it.
+# The index name encodes type, metric and model, so changing VECTOR_INDEX_TYPE or
+# VECTOR_DISTANCE swaps the old indexes for new ones on the next init_postgres().
+#
+# With VECTOR_QUANTIZATION set, the index is built over a compact expression of
+# the column (halfvec or binary_quantize) rather than the column itself. Searches
+# take VECTOR_RERANK_CANDIDATES rows from that index and re-rank them against the
+# full-precision vectors still stored in the table.
+
+TABLE = PaperEmbedding.__tablename__
+INDEX_PREFIX = f"ix_{TABLE}_embedding_"
+
+OPERATOR_CLASSES = {
+    "cosine": "vector_cosine_ops",
+    "l2": "vector_l2_ops",
+    "ip": "vector_ip_ops",
+}
+
+# pgvector has no int8 type; that mode is only available in the numpy backend
+QUANTIZATIONS = ("none", "halfvec", "binary")
+
+def metric() -> str:
+    if settings.VECTOR_DISTANCE not in OPERATOR_CLASSES:
+        raise ValueError(f"Unknown VECTOR_DISTANCE '{settings.VECTOR_DISTANCE}' (expected cosine, l2 or ip)")
+    return settings.VECTOR_DISTANCE
+
+def quantization() -> str:
+    if settings.VECTOR_QUANTIZATION not in QUANTIZATIONS:
+        raise ValueError(
+            f"VECTOR_QUANTIZATION '{settings.VECTOR_QUANTIZATION}' is not supported by pgvector "
+            "(expected none, halfvec or binary)"
+        )
+    return settings.VECTOR_QUANTIZATION
+
+def index_name(model_id: str) -> str:
+    name = f"{INDEX_PREFIX}{settings.VECTOR_INDEX_TYPE}_{metric()}"
+    if quantization() != "none":
+        name = f"{name}_{quantization()}"
+    return f"{name}_{model_slug(model_id)}"
+
+def _index_column(dimensions: int) -> str:
+    """Indexed expression and operator class, matching quantized_distance_expr()."""
+    if quantization() == "halfvec":
+        return f"(embedding::halfvec({dimensions})) {OPERATOR_CLASSES[metric()].replace('vector_', 'halfvec_')}"
+    if quantization() == "binary":
+        # Sign bits compared by Hamming distance, whatever the re-ranking metric
+        return f"(binary_quantize(embedding)::bit({dimensions})) bit_hamming_ops"
+    return f"(embedding::vector({dimensions})) {OPERATOR_CLASSES[metric()]}"
+
+def _model_literal(model_id: str) -> str:
+    return "'" + model_id.replace("'", "''") + "'"
+
+def embedding_expr(dimensions: int):
+    """The embedding column as a fixed-size vector, as written in the per-model indexes."""
+    return cast(PaperEmbedding.embedding, Vector(dimensions))
+
+def distance_expr(column, query_vector):
+    """Distance between column and query_vector using the configured metric (smaller is closer)."""
+    return {
+        "cosine": column.cosine_distance,
+        "l2": column.l2_distance,
+        "ip": column.max_inner_product,
+    }[metric()](query_vector)
+
+def quantized_distance_expr(dimensions: int, query_vector):
+    """
+    Approximate distance on the compact representation, written exactly like the
+    indexed expression so the planner can use the index. Same as distance_expr()
+    on embedding_expr() when quantization is off.
+    """
+    if quantization() == "halfvec":
+        return distance_expr(cast(PaperEmbedding.embedding, HALFVEC(dimensions)), query_vector)
+    if quantization() == "binary":
+        query = literal(query_vector, Vector(dimensions))
+        return cast(func.binary_quantize(PaperEmbedding.embedding), BIT(dimensions)).hamming_distance(
+            cast(func.binary_quantize(query), BIT(dimensions))
+        )
+    return distance_expr(embedding_expr(dimensions), query_vector)
+
+def rerank_candidates(limit: int) -> int:
+    """How many rows to fetch from a quantized index before exact re-ranking."""
+    return max(settings.VECTOR_RERANK_CANDIDATES, limit)
+
+def similarity(distance: float) -> float:
+    """
+    Convert a distance from distance_expr into a [0, 1] similarity.
+    OpenAI and Gemini embeddings are unit length, so all three metrics reduce to cosine.
+    """
+    m = metric()
+    if m == "cosine":
+        sim = 1 - distance
+    elif m == "l2":
+        sim = 1 - (distance ** 2) / 2
+    else:
+        # pgvector's <#> returns the negative inner product
+        sim = -distance
+    return max(0.0, min(1.0, sim))
+
+async def _ivfflat_lists(conn, model_id: str) -> int:
+    if settings.IVFFLAT_LISTS:
+        return settings.IVFFLAT_LISTS
+    # pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) beyond
+    rows = (await conn.execute(
+        text(f"SELECT count(*) FROM {TABLE} WHERE model_id = :model_id"), {"model_id": model_id}
+    )).scalar_one()
+    return max(10, rows // 1000 if rows <= 1_000_000 else int(rows ** 0.5))
+
+async def _index_ddl(conn, model_id: str, dimensions: int, concurrently: bool = False) -> Optional[str]:
+    column = _index_column(dimensions)
+    mode = "CONCURRENTLY " if concurrently else ""
+    where = f"WHERE model_id = {_model_literal(model_id)}"
+    if settings.VECTOR_INDEX_TYPE == "hnsw":
+        params = f"m = {int(settings.HNSW_M)}, ef_construction = {int(settings.HNSW_EF_CONSTRUCTION)}"
+        return f"CREATE INDEX {mode}IF NOT EXISTS {index_name(model_id)} ON {TABLE} USING hnsw ({column}) WITH ({params}) {where}"
+    if settings.VECTOR_INDEX_TYPE == "ivfflat":
+        lists = await _ivfflat_lists(conn, model_id)
+        return f"CREATE INDEX {mode}IF NOT EXISTS {index_name(model_id)} ON {TABLE} USING ivfflat ({column}) WITH (lists = {lists}) {where}"
+    if settings.VECTOR_INDEX_TYPE == "none":
+        return None
+    raise ValueError(f"Unknown VECTOR_INDEX_TYPE '{settings.VECTOR_INDEX_TYPE}' (expected hnsw, ivfflat or none)")
+
+async def managed_indexes(conn) -> list:
+    result = await conn.execute(
+        text("SELECT indexname FROM pg_indexes WHERE tablename = :table AND indexname LIKE :prefix"),
+        {"table": TABLE, "prefix": INDEX_PREFIX + "%"}
+    )
+    return list(result.scalars().all())
+
+async def _registered_models(conn) -> List[Tuple[str, int]]:
+    result = await conn.execute(text(f"SELECT model_id, dimensions FROM {EmbeddingModel.__tablename__}"))
+    return [(row.model_id, row.dimensions) for row in result.all()]
+
+async def ensure_vector_index(conn: AsyncConnection):
+    """
+    Make sure exactly the configured ANN index exists for each registered model.
+    Called from init_postgres inside its transaction; cheap when nothing changed.
+    """
+    wanted: Dict[str, Tuple[str, int]] = {}
+    if settings.VECTOR_INDEX_TYPE != "none":
+        wanted = {index_name(model_id): (model_id, dims) for model_id, dims in await _registered_models(conn)}
+
+    existing = await managed_indexes(conn)
+    for name in existing:
+        if name not in wanted:
+            await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    missing = [spec for name, spec in wanted.items() if name not in existing]
+    if missing:
+        await conn.execute(text(f"SET LOCAL maintenance_work_mem = '{settings.VECTOR_INDEX_BUILD_MEMORY}'"))
+        for model_id, dims in missing:
+            await conn.execute(text(await _index_ddl(conn, model_id, dims)))
+
+async def ensure_model_index(conn: AsyncConnection, model_id: str, dimensions: int):
+    """Create the ANN index for one newly registered model, leaving the others alone."""
+    ddl = await _index_ddl(conn, model_id, dimensions)
+    if ddl:
+        await conn.execute(text(ddl))
+
+async def apply_search_params(
+    session: AsyncSession,
+    limit: int,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    filtered: bool = False
+):
+    """
+    Set query-time recall knobs for the current transaction.
+    ef_search is raised to at least `limit`, otherwise HNSW would return fewer rows than asked for.
+    For filtered queries, iterative index scans (pgvector >= 0.8) keep scanning until
+    enough rows pass the WHERE clause instead of returning a mostly empty page.
+    """
+    iterative = filtered and settings.VECTOR_ITERATIVE_SCAN in ("strict_order", "relaxed_order")
+    if settings.VECTOR_INDEX_TYPE == "hnsw":
+        ef = max(int(ef_search or settings.HNSW_EF_SEARCH), limit)
+        await session.execute(text(f"SET LOCAL hnsw.ef_search = {ef}"))
+        if iterative:
+            await session.execute(text(f"SET LOCAL hnsw.iterative_scan = {settings.VECTOR_ITERATIVE_SCAN}"))
+    elif settings.VECTOR_INDEX_TYPE == "ivfflat":
+        await session.execute(text(f"SET LOCAL ivfflat.probes = {int(probes or settings.IVFFLAT_PROBES)}"))
+        if iterative:
+            # IVFFlat only supports relaxed ordering
+            await session.execute(text("SET LOCAL ivfflat.iterative_scan = relaxed_order"))
+
+async def index_size_bytes(conn, model_id: str) -> Optional[int]:
+    """On-disk size of the managed ANN index for model_id, or None if there is none."""
+    result = await conn.execute(
+        text("SELECT pg_relation_size(to_regclass(:name))"), {"name": index_name(model_id)}
+    )
+    return result.scalar_one_or_none()
+
+async def rebuild_vector_index(engine, log_fn=print):
+    """
+    Rebuild the ANN indexes from scratch without blocking reads/writes
+    (DROP/CREATE INDEX CONCURRENTLY), then refresh planner statistics.
+    Run after bulk loads: IVFFlat centroids are only computed at build time,
+    and a freshly built HNSW graph is tighter than one grown row by row.
+    """
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for name in await managed_indexes(conn):
+            log_fn(f"Dropping {name}...")
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+        await conn.execute(text(f"SET maintenance_work_mem = '{settings.VECTOR_INDEX_BUILD_MEMORY}'"))
+        for model_id, dims in await _registered_models(conn):
+            ddl = await _index_ddl(conn, model_id, dims, concurrently=True)
+            if ddl:
+                log_fn(f"Building {index_name(model_id)} for {model_id}...")
+                await conn.execute(text(ddl))
+
+        log_fn(f"Analyzing {TABLE}...")
+        await conn.execute(text(f"ANALYZE {TABLE}"))
@@ -0,0 +1,763 @@
+import asyncio
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+try:
+    import fcntl
+except ImportError: # Windows: no cross-process lock, so run a single writer there
+    fcntl = None
+
+import numpy as np
+from sqlalchemy import case, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+
+from src.ai.embedding_models import configured_model_id, model_slug
+from src.core.config import settings
+from src.db.bulk import find_embeddings, find_ids_missing_embeddings, insert_embeddings
+from src.db.models import EmbeddingModel, EmbeddingModelInfo, PaperEmbedding, SearchHit
+from src.db.postgres import AsyncSessionLocal, engine
+from src.db.vector_index import (
+    apply_search_params, distance_expr, embedding_expr, ensure_model_index, quantization,
+    quantized_distance_expr, rerank_candidates, similarity
+)
+
+# Pluggable storage for paper embeddings. Rows are dicts built by
+# src.db.bulk.embedding_row(); search returns SearchHit objects without `paper`.
+# Vectors are keyed by (unique_id, model_id). Each store also keeps the registry
+# of embedding models, so the active model always matches the vectors it serves.
+
+class VectorStore:
+    """Interface shared by the vector backends."""
+
+    async def add(self, rows: List[dict]) -> int:
+        """
+        Store rows, ignoring (unique_id, model_id) pairs that already have a vector.
+        Unknown models are registered on first write. Returns rows submitted.
+        """
+        raise NotImplementedError
+
+    async def missing(self, unique_ids: Sequence[str], model_id: str) -> Set[str]:
+        """Return the subset of unique_ids with no stored vector for model_id."""
+        raise NotImplementedError
+
+    async def vectors(self, unique_ids: Sequence[str], model_id: str) -> Dict[str, np.ndarray]:
+        """Stored model_id vectors of the unique_ids that have one."""
+        raise NotImplementedError
+
+    async def search(
+        self,
+        query_vector: List[float],
+        model_id: str,
+        limit: int = 5,
+        offset: int = 0,
+        sources: Optional[List[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        categories: Optional[List[str]] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        candidates: Optional[int] = None
+    ) -> List[SearchHit]:
+        """
+        Nearest model_id rows to query_vector, best first. With VECTOR_QUANTIZATION set,
+        `candidates` overrides how many approximate matches are re-ranked exactly.
+        """
+        raise NotImplementedError
+
+    async def models(self) -> List[EmbeddingModelInfo]:
+        """Every registered embedding model."""
+        raise NotImplementedError
+
+    async def register_model(self, model_id: str, dimensions: int) -> EmbeddingModelInfo:
+        """
+        Register model_id if new. The first model registered becomes active;
+        later ones wait for a backfill and activate_model().
+        """
+        raise NotImplementedError
+
+    async def save_backfill_progress(self, model_id: str, cursor: Optional[str], done: bool = False):
+        raise NotImplementedError
+
+    async def activate_model(self, model_id: str):
+        """Atomically make model_id the one searches use."""
+        raise NotImplementedError
+
+    async def get_model(self, model_id: str) -> Optional[EmbeddingModelInfo]:
+        return next((m for m in await self.models() if m.model_id == model_id), None)
+
+    async def active_model(self) -> Optional[EmbeddingModelInfo]:
+        return next((m for m in await self.models() if m.active), None)
+
+    async def _register_new_models(self, rows: List[dict]):
+        known = {m.model_id for m in await self.models()}
+        for row in rows:
+            if row["model_id"] not in known and row["embedding"] is not None:
+                await self.register_model(row["model_id"], len(row["embedding"]))
+                known.add(row["model_id"])
+
+class PgVectorStore(VectorStore):
+    """paper_embeddings in Postgres, searched through the per-model ANN indexes."""
+
+    def __init__(self):
+        self._dimensions: Dict[str, int] = {}
+
+    async def add(self, rows: List[dict]) -> int:
+        rows = list(rows)
+        if any(row["model_id"] not in self._dimensions for row in rows):
+            await self._register_new_models(rows)
+        return await insert_embeddings(rows)
+
+    async def missing(self, unique_ids: Sequence[str], model_id: str) -> Set[str]:
+        return await find_ids_missing_embeddings(unique_ids, model_id)
+
+    async def vectors(self, unique_ids: Sequence[str], model_id: str) -> Dict[str, np.ndarray]:
+        return await find_embeddings(unique_ids, model_id)
+
+    async def models(self) -> List[EmbeddingModelInfo]:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(select(EmbeddingModel).order_by(EmbeddingModel.created_at))
+            models = [EmbeddingModelInfo.model_validate(m, from_attributes=True) for m in result.scalars().all()]
+        self._dimensions.update({m.model_id: m.dimensions for m in models})
+        return models
+
+    async def register_model(self, model_id: str, dimensions: int) -> EmbeddingModelInfo:
+        async with engine.begin() as conn:
+            # Serialize registrations so two writers can't both register a "first" model as active
+            await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('embedding_models'))"))
+            has_active = (await conn.execute(
+                select(EmbeddingModel.model_id).where(EmbeddingModel.active == True)
+            )).first() is not None
+            now = datetime.utcnow()
+            await conn.execute(insert(EmbeddingModel).values(
+                model_id=model_id,
+                dimensions=dimensions,
+                active=not has_active,
+                backfill_done=not has_active,
+                created_at=now,
+                activated_at=None if has_active else now
+            ).on_conflict_do_nothing(index_elements=[EmbeddingModel.model_id]))
+            await ensure_model_index(conn, model_id, dimensions)
+        self._dimensions[model_id] = dimensions
+        return await self.get_model(model_id)
+
+    async def save_backfill_progress(self, model_id: str, cursor: Optional[str], done: bool = False):
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(EmbeddingModel).where(EmbeddingModel.model_id == model_id)
+                .values(backfill_cursor=cursor, backfill_done=done)
+            )
+            await session.commit()
+
+    async def activate_model(self, model_id: str):
+        async with AsyncSessionLocal() as session:
+            # One statement: readers see either the old or the new active model, never none or both
+            await session.execute(
+                update(EmbeddingModel).values(
+                    active=EmbeddingModel.model_id == model_id,
+                    activated_at=case(
+                        (EmbeddingModel.model_id == model_id, datetime.utcnow()), else_=EmbeddingModel.activated_at
+                    )
+                )
+            )
+            await session.commit()
+
+    async def _model_dimensions(self, model_id: str) -> int:
+        if model_id not in self._dimensions:
+            await self.models()
+        if model_id not in self._dimensions:
+            raise ValueError(f"Embedding model '{model_id}' is not registered")
+        return self._dimensions[model_id]
+
+    async def search(self, query_vector, model_id, limit=5, offset=0, sources=None, start_date=None, end_date=None,
+                     categories=None, ef_search=None, probes=None, candidates=None) -> List[SearchHit]:
+        dimensions = await self._model_dimensions(model_id)
+        filters = []
+        if sources:
+            filters.append(PaperEmbedding.source.in_(sources))
+        if start_date:
+            filters.append(PaperEmbedding.published_date >= start_date)
+        if end_date:
+            filters.append(PaperEmbedding.published_date < end_date)
+        if categories:
+            filters.append(PaperEmbedding.categories.overlap(categories))
+
+        columns = [
+            PaperEmbedding.unique_id,
+            PaperEmbedding.title,
+            PaperEmbedding.source,
+            PaperEmbedding.published_date,
+            PaperEmbedding.pdf_url,
+        ]
+        quantized = quantization() != "none"
+        fetch = (candidates or rerank_candidates(limit + offset)) if quantized else limit + offset
+
+        async with AsyncSessionLocal() as session:
+            await apply_search_params(
+                session, fetch, ef_search=ef_search, probes=probes, filtered=bool(filters)
+            )
+            # Matches the partial index predicate, so only this model's index is used
+            model_filter = PaperEmbedding.model_id == model_id
+            if quantized:
+                # Shortlist on the compact index, then order the shortlist by exact distance
+                shortlist = select(*columns, embedding_expr(dimensions).label("embedding")).where(
+                    model_filter, *filters
+                ).order_by(quantized_distance_expr(dimensions, query_vector)).limit(fetch).subquery()
+                distance = distance_expr(shortlist.c.embedding, query_vector)
+                stmt = select(
+                    *(shortlist.c[c.key] for c in columns), distance.label("distance")
+                ).order_by(distance).limit(limit).offset(offset)
+            else:
+                distance = distance_expr(embedding_expr(dimensions), query_vector)
+                stmt = select(*columns, distance.label("distance")).where(
+                    model_filter, *filters
+                ).order_by(distance).limit(limit).offset(offset)
+
+            result = await session.execute(stmt)
+            return [
+                SearchHit(
+                    unique_id=row.unique_id,
+                    title=row.title,
+                    source=row.source,
+                    published_date=row.published_date,
+                    pdf_url=row.pdf_url,
+                    distance=row.distance,
+                    score=similarity(row.distance)
+                )
+                for row in result.all()
+            ]
+
+class NumpyIndex:
+    """
+    In-process exact k-NN over a memory-mapped matrix, for one embedding model.
+
+    On disk (under `path`):
+      vectors.bin         - row-major, unit-normalized float32/float16 vectors, appended to
+      rows.jsonl          - one line of metadata per vector, in the same order
+      vectors.<mode>.bin  - optional quantized copy (halfvec, int8 or binary), same order
+      vectors.int8.scale  - per-row float32 scales for the int8 copy
+      index.lock          - flock()ed by writers, so processes append one at a time
+    Appends only ever add to the end of these files, so the index grows
+    incrementally and survives restarts. Every call re-stats the files and reads
+    just the rows other processes (ingest workers, the scheduler) appended since.
+    Search is a blocked matrix-vector product followed by argpartition, i.e.
+    cosine similarity over every row.
+    float16 halves memory and disk but is upcast block by block, so it searches slower.
+
+    With a quantization mode, searches scan only the compact copy and re-rank the
+    best `rerank` rows using vectors.bin, which is then read for those rows only.
+    The copy is (re)built from vectors.bin on load if it is missing or behind.
+    """
+
+    BLOCK_ROWS = 8192 # rows multiplied per step; keeps float16 upcasts cache-sized
+    QUANTIZATIONS = ("none", "halfvec", "int8", "binary")
+
+    def __init__(self, path: str, dim: int = 1536, dtype: str = "float32",
+                 quantization: str = "none", rerank: int = 200):
+        if quantization not in self.QUANTIZATIONS:
+            raise ValueError(f"Unknown VECTOR_QUANTIZATION '{quantization}' (expected {', '.join(self.QUANTIZATIONS)})")
+        self.path = path
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.quantization = quantization
+        self.rerank = rerank
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, "vectors.bin")
+
+    @property
+    def _rows_path(self) -> str:
+        return os.path.join(self.path, "rows.jsonl")
+
+    @property
+    def _quantized_path(self) -> str:
+        return os.path.join(self.path, f"vectors.{self.quantization}.bin")
+
+    @property
+    def _scales_path(self) -> str:
+        return os.path.join(self.path, "vectors.int8.scale")
+
+    @property
+    def _lock_path(self) -> str:
+        return os.path.join(self.path, "index.lock")
+
+    @property
+    def _quantized_shape(self):
+        """(dtype, row width) of the compact copy."""
+        return {
+            "halfvec": (np.dtype(np.float16), self.dim),
+            "int8": (np.dtype(np.int8), self.dim),
+            "binary": (np.dtype(np.uint8), (self.dim + 7) // 8),
+        }[self.quantization]
+
+    def bytes_per_vector(self) -> int:
+        """Bytes scanned per row at search time."""
+        if self.quantization == "none":
+            return self.dim * self.dtype.itemsize
+        dtype, width = self._quantized_shape
+        return width * dtype.itemsize + (4 if self.quantization == "int8" else 0)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return self._count
+
+    def vector(self, row: int) -> np.ndarray:
+        """Stored full-precision vector at a row position (0 <= row < len(self))."""
+        return np.asarray(self._matrix[row], dtype=np.float32)
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive across every process that opens this index."""
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._lock_path, "a") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _sizes(self) -> Tuple[int, int]:
+        return tuple(os.path.getsize(p) if os.path.exists(p) else 0 for p in (self._vectors_path, self._rows_path))
+
+    def _load(self):
+        """Catch up with the files: all rows on first use, then only the ones appended since."""
+        if self._loaded and self._sizes() == self._seen:
+            return
+        with self._file_lock():
+            self._sync()
+
+    def _reset(self):
+        self._ids: List[str] = []
+        self._row_of: Dict[str, int] = {}
+        self._sources: List[Optional[str]] = []
+        self._dates: List[int] = []
+        self._categories: List[Set[str]] = []
+        self._meta: List[dict] = []
+        self._count = 0
+        self._rows_end = 0 # byte offset in rows.jsonl just past the last row read
+
+    def _read_rows(self, start: int) -> List[Tuple[dict, int]]:
+        """Complete rows.jsonl lines from byte `start`, each with the offset just past it."""
+        if not os.path.exists(self._rows_path):
+            return []
+        rows = []
+        with open(self._rows_path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                start += len(line)
+                if line.strip():
+                    rows.append((json.loads(line), start))
+        return rows
+
+    def _sync(self):
+        # Caller holds the file lock, so no append is half-written
+        vectors_size, rows_size = self._sizes()
+        row_bytes = self.dim * self.dtype.itemsize
+        if not self._loaded or vectors_size < self._count * row_bytes or rows_size < self._rows_end:
+            # First use, or the files were replaced (reset_db): read everything
+            self._reset()
+        rows = self._read_rows(self._rows_end)
+        # An interrupted append can leave one file longer than the other; trust the shorter one
+        count = min(vectors_size // row_bytes, self._count + len(rows))
+        for row, end in rows[:count - self._count]:
+            self._remember(row)
+            self._rows_end = end
+        self._count = count
+        self._remap()
+        if self.quantization != "none":
+            self._sync_quantized()
+        self._seen = (vectors_size, rows_size)
+        self._loaded = True
+
+    def _remember(self, row: dict):
+        self._row_of[row["unique_id"]] = len(self._ids)
+        self._ids.append(row["unique_id"])
+        self._sources.append(row.get("source"))
+        published = row.get("published_date")
+        self._dates.append(int(datetime.fromisoformat(published).timestamp()) if published else np.iinfo(np.int64).min)
+        self._categories.append(set(row.get("categories") or []))
+        self._meta.append(row)
+
+    def _remap(self):
+        if self._count:
+            self._matrix = np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(self._count, self.dim))
+        else:
+            self._matrix = np.zeros((0, self.dim), dtype=self.dtype)
+        self._date_array = np.asarray(self._dates, dtype=np.int64)
+
+    def _remap_quantized(self):
+        dtype, width = self._quantized_shape
+        if self._count:
+            self._compact = np.memmap(self._quantized_path, dtype=dtype, mode="r", shape=(self._count, width))
+        else:
+            self._compact = np.zeros((0, width), dtype=dtype)
+        if self.quantization == "int8":
+            self._scales = np.fromfile(self._scales_path, dtype=np.float32, count=self._count) if self._count else np.zeros(0, np.float32)
+
+    def _quantize(self, matrix: np.ndarray):
+        """Compact copy of unit-normalized float32 rows, plus int8 per-row scales."""
+        if self.quantization == "halfvec":
+            return matrix.astype(np.float16), None
+        if self.quantization == "int8":
+            peak = np.abs(matrix).max(axis=1)
+            peak[peak == 0] = 1
+            return np.round(matrix / peak[:, None] * 127).astype(np.int8), (peak / 127).astype(np.float32)
+        return np.packbits(matrix > 0, axis=1), None
+
+    def _write_quantized(self, matrix: np.ndarray):
+        compact, scales = self._quantize(matrix)
+        with open(self._quantized_path, "ab") as f:
+            f.write(compact.tobytes())
+        if scales is not None:
+            with open(self._scales_path, "ab") as f:
+                f.write(scales.tobytes())
+
+    def _sync_quantized(self):
+        """Bring the quantized copy in line with vectors.bin (first use of a mode, or after a crash)."""
+        dtype, width = self._quantized_shape
+        have = os.path.getsize(self._quantized_path) // (width * dtype.itemsize) if os.path.exists(self._quantized_path) else 0
+        if self.quantization == "int8":
+            scales = os.path.getsize(self._scales_path) // 4 if os.path.exists(self._scales_path) else 0
+            have = min(have, scales)
+        have = min(have, self._count)
+        # Drop anything past the last complete row, then encode what is missing
+        with open(self._quantized_path, "ab") as f:
+            f.truncate(have * width * dtype.itemsize)
+        if self.quantization == "int8":
+            with open(self._scales_path, "ab") as f:
+                f.truncate(have * 4)
+        for start in range(have, self._count, self.BLOCK_ROWS):
+            self._write_quantized(np.asarray(self._matrix[start:start + self.BLOCK_ROWS], dtype=np.float32))
+        self._remap_quantized()
+
+    @staticmethod
+    def _truncate(sizes: Dict[str, int]):
+        for path, size in sizes.items():
+            with open(path, "ab") as f:
+                f.truncate(size)
+
+    def add(self, rows: List[dict]) -> int:
+        # The file lock covers the size check and the whole append, so concurrent
+        # writers can't interleave vectors and rows
+        with self._lock, self._file_lock():
+            self._sync()
+            fresh, seen = [], set()
+            for row in rows:
+                if row["unique_id"] in self._row_of or row["unique_id"] in seen or row["embedding"] is None:
+                    continue
+                fresh.append(row)
+                seen.add(row["unique_id"])
+            if not fresh:
+                return 0
+
+            matrix = np.asarray([r["embedding"] for r in fresh], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms == 0, 1, norms)
+            metas = []
+            for r in fresh:
+                meta = {k: v for k, v in r.items() if k != "embedding"}
+                if isinstance(meta.get("published_date"), datetime):
+                    meta["published_date"] = meta["published_date"].isoformat()
+                metas.append(meta)
+            lines = [(json.dumps(meta) + "\n").encode("utf-8") for meta in metas]
+
+            # Cut off anything past the last complete row (an interrupted append),
+            # so the new rows line up; a failed write is cut back the same way
+            sizes = {self._vectors_path: self._count * self.dim * self.dtype.itemsize, self._rows_path: self._rows_end}
+            if self.quantization != "none":
+                dtype, width = self._quantized_shape
+                sizes[self._quantized_path] = self._count * width * dtype.itemsize
+                if self.quantization == "int8":
+                    sizes[self._scales_path] = self._count * 4
+            self._truncate(sizes)
+            try:
+                with open(self._vectors_path, "ab") as f:
+                    f.write(matrix.astype(self.dtype).tobytes())
+                with open(self._rows_path, "ab") as f:
+                    f.write(b"".join(lines))
+                if self.quantization != "none":
+                    self._write_quantized(matrix)
+            except BaseException:
+                self._truncate(sizes)
+                raise
+
+            # Rows only become visible once every file is written
+            for meta, line in zip(metas, lines):
+                self._remember(meta)
+                self._rows_end += len(line)
+            self._count += len(fresh)
+            self._remap()
+            if self.quantization != "none":
+                self._remap_quantized()
+            self._seen = self._sizes()
+            return len(fresh)
+
+    def missing(self, unique_ids: Sequence[str]) -> Set[str]:
+        with self._lock:
+            self._load()
+            return {uid for uid in unique_ids if uid not in self._row_of}
+
+    def vectors(self, unique_ids: Sequence[str]) -> Dict[str, np.ndarray]:
+        with self._lock:
+            self._load()
+            return {uid: self.vector(self._row_of[uid]) for uid in unique_ids if uid in self._row_of}
+
+    def _mask(self, sources, start_date, end_date, categories) -> Optional[np.ndarray]:
+        if not (sources or start_date or end_date or categories):
+            return None
+        mask = np.ones(self._count, dtype=bool)
+        if sources:
+            wanted = set(sources)
+            mask &= np.fromiter((s in wanted for s in self._sources), dtype=bool, count=self._count)
+        if start_date:
+            mask &= self._date_array >= int(start_date.timestamp())
+        if end_date:
+            mask &= self._date_array < int(end_date.timestamp())
+        if categories:
+            wanted = set(categories)
+            mask &= np.fromiter((bool(c & wanted) for c in self._categories), dtype=bool, count=self._count)
+        return mask
+
+    def _scan(self, q: np.ndarray) -> np.ndarray:
+        """Score every row against q (higher is closer), on the compact copy when quantized."""
+        scores = np.empty(self._count, dtype=np.float32)
+        if self.quantization == "binary":
+            packed = np.packbits(q > 0)
+            for start in range(0, self._count, self.BLOCK_ROWS):
+                block = self._compact[start:start + self.BLOCK_ROWS]
+                scores[start:start + len(block)] = -np.bitwise_count(block ^ packed).sum(axis=1, dtype=np.int32)
+            return scores
+
+        matrix = self._matrix if self.quantization == "none" else self._compact
+        for start in range(0, self._count, self.BLOCK_ROWS):
+            block = matrix[start:start + self.BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32, copy=False) @ q
+        if self.quantization == "int8":
+            scores *= self._scales
+        return scores
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k highest finite scores, best first."""
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return top[np.isfinite(scores[top])]
+
+    def search(self, query_vector, limit, offset, sources, start_date, end_date, categories,
+                candidates=None) -> List[SearchHit]:
+        with self._lock:
+            self._load()
+            if not self._count:
+                return []
+            q = np.asarray(query_vector, dtype=np.float32)
+            q /= (np.linalg.norm(q) or 1.0)
+
+            scores = self._scan(q)
+            mask = self._mask(sources, start_date, end_date, categories)
+            if mask is not None:
+                scores[~mask] = -np.inf
+
+            if self.quantization == "none":
+                top = self._top(scores, limit + offset)
+                sims = scores[top]
+            else:
+                shortlist = self._top(scores, max(candidates or self.rerank, limit + offset))
+                # Exact cosine on the shortlist; sorted row order keeps memmap reads sequential
+                rows = np.sort(shortlist)
+                exact = np.asarray(self._matrix[rows], dtype=np.float32) @ q
+                order = np.argsort(-exact, kind="stable")[:limit + offset]
+                top, sims = rows[order], exact[order]
+
+            hits = []
+            for i, sim in zip(top[offset:], sims[offset:]):
+                meta = self._meta[i]
+                sim = float(sim)
+                published = meta.get("published_date")
+                hits.append(SearchHit(
+                    unique_id=meta["unique_id"],
+                    title=meta.get("title"),
+                    source=meta.get("source"),
+                    published_date=datetime.fromisoformat(published) if published else None,
+                    pdf_url=meta.get("pdf_url"),
+                    distance=1 - sim,
+                    score=max(0.0, min(1.0, sim))
+                ))
+            return hits
+
+class NumpyVectorStore(VectorStore):
+    """
+    In-process vector store; no Postgres required.
+    One NumpyIndex per embedding model under `path`/<model slug>/, plus a
+    models.json registry that is replaced atomically (os.replace) on every change.
+    """
+
+    def __init__(self, path: str, dtype: str = "float32", quantization: str = "none", rerank: int = 200):
+        self.path = path
+        self.dtype = dtype
+        self.quantization = quantization
+        self.rerank = rerank
+        self._indexes: Dict[str, NumpyIndex] = {}
+        self._registry_lock = threading.Lock()
+
+    @property
+    def _registry_path(self) -> str:
+        return os.path.join(self.path, "models.json")
+
+    def _read_registry(self) -> List[EmbeddingModelInfo]:
+        if not os.path.exists(self._registry_path):
+            self._adopt_unversioned_index()
+        if not os.path.exists(self._registry_path):
+            return []
+        with open(self._registry_path) as f:
+            return [EmbeddingModelInfo.model_validate(m) for m in json.load(f)]
+
+    def _write_registry(self, models: List[EmbeddingModelInfo]):
+        os.makedirs(self.path, exist_ok=True)
+        tmp = self._registry_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump([m.model_dump(mode="json") for m in models], f, indent=2)
+        os.replace(tmp, self._registry_path)
+
+    def _adopt_unversioned_index(self):
+        """Indexes written before models were tracked live directly in `path`; file them under the configured model."""
+        legacy = os.path.join(self.path, "rows.jsonl")
+        if not os.path.exists(legacy):
+            return
+        model_id = configured_model_id()
+        target = os.path.join(self.path, model_slug(model_id))
+        os.makedirs(target, exist_ok=True)
+        for name in os.listdir(self.path):
+            if name.startswith("vectors.") or name == "rows.jsonl":
+                shutil.move(os.path.join(self.path, name), os.path.join(target, name))
+        # The legacy index has no stored dimension; derive it from the vectors file
+        with open(os.path.join(target, "rows.jsonl")) as f:
+            rows = sum(1 for line in f if line.strip())
+        vectors = os.path.join(target, "vectors.bin")
+        size = os.path.getsize(vectors) if os.path.exists(vectors) else 0
+        # (an empty legacy index can only have come from the old 1536-d default)
+        dimensions = size // (rows * np.dtype(self.dtype).itemsize) if rows and size else 1536
+        now = datetime.now(timezone.utc)
+        self._write_registry([EmbeddingModelInfo(
+            model_id=model_id, dimensions=dimensions, active=True, backfill_done=True, created_at=now, activated_at=now
+        )])
+
+    def _update_registry(self, model_id: str, **changes):
+        with self._registry_lock:
+            models = self._read_registry()
+            for m in models:
+                if m.model_id == model_id:
+                    for key, value in changes.items():
+                        setattr(m, key, value)
+            self._write_registry(models)
+
+    def _index(self, model: EmbeddingModelInfo) -> NumpyIndex:
+        if model.model_id not in self._indexes:
+            self._indexes[model.model_id] = NumpyIndex(
+                os.path.join(self.path, model_slug(model.model_id)),
+                dim=model.dimensions,
+                dtype=self.dtype,
+                quantization=self.quantization,
+                rerank=self.rerank
+            )
+        return self._indexes[model.model_id]
+
+    async def models(self) -> List[EmbeddingModelInfo]:
+        with self._registry_lock:
+            return self._read_registry()
+
+    async def register_model(self, model_id: str, dimensions: int) -> EmbeddingModelInfo:
+        with self._registry_lock:
+            models = self._read_registry()
+            if not any(m.model_id == model_id for m in models):
+                first = not any(m.active for m in models)
+                now = datetime.now(timezone.utc)
+                models.append(EmbeddingModelInfo(
+                    model_id=model_id,
+                    dimensions=dimensions,
+                    active=first,
+                    backfill_done=first,
+                    created_at=now,
+                    activated_at=now if first else None
+                ))
+                self._write_registry(models)
+            return next(m for m in models if m.model_id == model_id)
+
+    async def save_backfill_progress(self, model_id: str, cursor: Optional[str], done: bool = False):
+        self._update_registry(model_id, backfill_cursor=cursor, backfill_done=done)
+
+    async def activate_model(self, model_id: str):
+        with self._registry_lock:
+            models = self._read_registry()
+            for m in models:
+                if m.model_id == model_id and not m.active:
+                    m.activated_at = datetime.now(timezone.utc)
+                m.active = m.model_id == model_id
+            self._write_registry(models)
+
+    async def add(self, rows: List[dict]) -> int:
+        rows = list(rows)
+        await self._register_new_models(rows)
+        models = {m.model_id: m for m in await self.models()}
+        added = 0
+        for model_id in {row["model_id"] for row in rows}:
+            if model_id in models:
+                index = self._index(models[model_id])
+                added += await asyncio.to_thread(index.add, [r for r in rows if r["model_id"] == model_id])
+        return added
+
+    async def missing(self, unique_ids: Sequence[str], model_id: str) -> Set[str]:
+        model = await self.get_model(model_id)
+        if model is None:
+            return set(unique_ids)
+        return await asyncio.to_thread(self._index(model).missing, unique_ids)
+
+    async def vectors(self, unique_ids: Sequence[str], model_id: str) -> Dict[str, np.ndarray]:
+        model = await self.get_model(model_id)
+        if model is None:
+            return {}
+        return await asyncio.to_thread(self._index(model).vectors, unique_ids)
+
+    async def search(self, query_vector, model_id, limit=5, offset=0, sources=None, start_date=None, end_date=None,
+                     categories=None, ef_search=None, probes=None, candidates=None) -> List[SearchHit]:
+        model = await self.get_model(model_id)
+        if model is None:
+            return []
+        # Exact scan (or exact re-rank): ef_search/probes have no meaning here.
+        # The scan and file reads block, so they run off the event loop.
+        return await asyncio.to_thread(
+            self._index(model).search, query_vector, limit, offset, sources, start_date, end_date, categories, candidates
+        )
+
+_store: Optional[VectorStore] = None
+
+def get_vector_store() -> VectorStore:
+    """The configured backend (VECTOR_BACKEND), created once per process."""
+    global _store
+    if _store is None:
+        if settings.VECTOR_BACKEND == "numpy":
+            _store = NumpyVectorStore(
+                settings.NUMPY_INDEX_PATH,
+                dtype=settings.NUMPY_INDEX_DTYPE,
+                quantization=settings.VECTOR_QUANTIZATION,
+                rerank=settings.VECTOR_RERANK_CANDIDATES
+            )
+        elif settings.VECTOR_BACKEND == "pgvector":
+            _store = PgVectorStore()
+        else:
+            raise ValueError(f"Unknown VECTOR_BACKEND '{settings.VECTOR_BACKEND}' (expected pgvector or numpy)")
+    return _store
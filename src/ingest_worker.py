@@ -0,0 +1,30 @@
+import argparse
+import asyncio
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.db.mongo import init_mongo
+from src.db.postgres import init_postgres
+from src.services.work_items import run_ingest_worker
+
+async def ingest_worker(concurrency: int, batch_size: int):
+    print("Initializing databases...")
+    await init_mongo()
+    await init_postgres()
+    await run_ingest_worker(concurrency=concurrency, batch_size=batch_size)
+
+if __name__ == "__main__":
+    # Summarizes, embeds and stores the items queued by the ingest task (INGEST_MODE=distributed).
+    # Start as many as you like, on any host that can reach the databases.
+    parser = argparse.ArgumentParser(description="Process queued ingestion work items.")
+    parser.add_argument("--concurrency", type=int, default=None, help="batches processed at once (default: INGEST_WORKER_CONCURRENCY)")
+    parser.add_argument("--batch-size", type=int, default=None, help="items leased per batch (default: INGEST_WORKER_BATCH_SIZE)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(ingest_worker(args.concurrency, args.batch_size))
+    except KeyboardInterrupt:
+        # Items leased here are picked up by other workers once WORK_LEASE_SECONDS has passed
+        print("Ingest worker stopped.")
@@ -1,10 +1,55 @@
+import asyncio
 import feedparser
+import httpx
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 import time
-from typing import List, Generator
+from typing import List, Generator, AsyncGenerator, Optional, Tuple
 
+from src.core.config import settings
 from src.db.models import RSSFeedConfig
 
+# (ETag, Last-Modified) response headers, sent back on the next conditional fetch
+Validators = Tuple[Optional[str], Optional[str]]
+
+# feedparser is synchronous and CPU bound, so parsing is pushed to a small
+# thread pool to keep the event loop free while other feeds are downloading.
+_parse_pool = ThreadPoolExecutor(max_workers=settings.RSS_PARSE_WORKERS, thread_name_prefix="rss-parse")
+
+def parse_feed_entries(source: str, content, cutoff_date: float) -> List[dict]:
+    """
+    Parse a feed (URL, bytes or str) and return the entries newer than cutoff_date
+    as Paper-shaped dicts.
+    """
+    feed = feedparser.parse(content)
+    items = []
+
+    for entry in feed.entries:
+        # Parse published date
+        published_ts = 0
+        if hasattr(entry, 'published_parsed') and entry.published_parsed:
+                published_ts = time.mktime(entry.published_parsed)
+        elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
+                published_ts = time.mktime(entry.updated_parsed)
+
+        if published_ts >= cutoff_date:
+            # Convert abstract/summary
+            summary = getattr(entry, 'summary', '') or getattr(entry, 'description', '')
+
+            items.append({
+                "unique_id": entry.link,
+                "arxiv_id": None,
+                "source": source,
+                "title": entry.title,
+                "authors": [getattr(entry, 'author', source)],
+                "abstract": summary,
+                "published_date": datetime.fromtimestamp(published_ts, timezone.utc),
+                "updated_date": datetime.now(timezone.utc),
+                "pdf_url": entry.link,
+                "categories": ["blog", "industry"]
+            })
+    return items
+
 class RSSClient:
     def __init__(self):
         # Default feeds to seed if DB is empty
@@ -14,6 +59,9 @@ class RSSClient:
             "anthropic": "https://www.anthropic.com/rss",
             "huggingface": "https://huggingface.co/blog/feed.xml",
         }
+        self.headers = {
+            "User-Agent": "Mozilla/5.0 (compatible; AIDailyResearcher/0.1; +https://github.com/steve-dickinson/ai-daily-researcher)"
+        }
 
     async def get_active_feeds(self) -> List[RSSFeedConfig]:
         """Fetch active feeds from DB, seeding defaults if empty."""
@@ -23,50 +71,101 @@ class RSSClient:
             print("Seeding default RSS feeds...")
             for name, url in self.default_feeds.items():
                 await RSSFeedConfig(name=name, url=url).insert()
-        
+
         return await RSSFeedConfig.find(RSSFeedConfig.is_active == True).to_list()
 
-    async def fetch_recent_posts(self, days_back: int = 1) -> Generator[dict, None, None]:
+    async def fetch_recent_posts(self, days_back: int = 1, conditional: bool = False) -> AsyncGenerator[dict, None]:
         """
         Fetch posts from all configured RSS feeds from the last N days.
+        Feeds are downloaded concurrently; posts are yielded as each feed completes.
         """
         cutoff_date = time.time() - (days_back * 24 * 60 * 60)
-        
+
         feeds = await self.get_active_feeds()
-        
-        for feed in feeds:
-            # Yield from sub-generator
-            for item in self.fetch_single_feed(feed.name, feed.url, cutoff_date):
+
+        async for feed, posts, _, error in self.stream_feeds(feeds, cutoff_date, conditional=conditional):
+            if error:
+                print(f"Error fetching {feed.name}: {error}")
+                continue
+            for item in posts:
                 yield item
 
+    async def stream_feeds(
+        self,
+        feeds: List[RSSFeedConfig],
+        cutoff_date: float,
+        conditional: bool = True
+    ) -> AsyncGenerator[Tuple[RSSFeedConfig, List[dict], Optional[Validators], Optional[Exception]], None]:
+        """
+        Fetch all feeds over one shared HTTP client, at most RSS_MAX_CONCURRENCY at a time.
+        Yields (feed, posts, validators, error) in completion order, so total time is
+        bounded by the slowest feed rather than the sum of all of them.
+        With conditional=True, stored ETag/Last-Modified validators are sent and a 304
+        yields no posts without parsing anything. New validators are not stored here:
+        call save_validators() once the posts have been stored.
+        """
+        semaphore = asyncio.Semaphore(settings.RSS_MAX_CONCURRENCY)
+        limits = httpx.Limits(max_connections=settings.RSS_MAX_CONCURRENCY)
+
+        async with httpx.AsyncClient(follow_redirects=True, headers=self.headers, limits=limits) as client:
+            async def run(feed: RSSFeedConfig):
+                try:
+                    async with semaphore:
+                        posts, validators = await self.fetch_feed(client, feed, cutoff_date, conditional)
+                    return feed, posts, validators, None
+                except Exception as e:
+                    return feed, [], None, e
+
+            tasks = [asyncio.create_task(run(feed)) for feed in feeds]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    yield await next_done
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+    async def fetch_feed(
+        self,
+        client: httpx.AsyncClient,
+        feed: RSSFeedConfig,
+        cutoff_date: float,
+        conditional: bool = True
+    ) -> Tuple[List[dict], Optional[Validators]]:
+        """
+        Download and parse a single feed, honouring RSS_FETCH_TIMEOUT for the whole request.
+        Returns the posts and the response's (ETag, Last-Modified), or None on a 304.
+        """
+        headers = {}
+        if conditional:
+            if feed.etag:
+                headers["If-None-Match"] = feed.etag
+            if feed.last_modified:
+                headers["If-Modified-Since"] = feed.last_modified
+
+        async with asyncio.timeout(settings.RSS_FETCH_TIMEOUT):
+            resp = await client.get(feed.url, headers=headers, timeout=settings.RSS_FETCH_TIMEOUT)
+
+        if resp.status_code == 304:
+            return [], None
+        resp.raise_for_status()
+
+        loop = asyncio.get_running_loop()
+        posts = await loop.run_in_executor(_parse_pool, parse_feed_entries, feed.name, resp.content, cutoff_date)
+        return posts, (resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+
+    async def save_validators(self, feed: RSSFeedConfig, validators: Optional[Validators]):
+        """
+        Remember a fetch's validators, so the next conditional fetch can get a 304.
+        Only call once that fetch's posts are stored: after a 304 they are never seen again.
+        """
+        if validators is None or validators == (feed.etag, feed.last_modified):
+            return
+        feed.etag, feed.last_modified = validators
+        await feed.save()
+
     def fetch_single_feed(self, source: str, url: str, cutoff_date: float) -> Generator[dict, None, None]:
+        """Synchronous, unconditional fetch of one feed. Prefer stream_feeds in async code."""
         try:
-            feed = feedparser.parse(url)
-            # print(f"Fetching RSS: {source} ({len(feed.entries)} entries)")
-            
-            for entry in feed.entries:
-                # Parse published date
-                published_ts = 0
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                        published_ts = time.mktime(entry.published_parsed)
-                elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
-                        published_ts = time.mktime(entry.updated_parsed)
-                
-                if published_ts >= cutoff_date:
-                    # Convert abstract/summary
-                    summary = getattr(entry, 'summary', '') or getattr(entry, 'description', '')
-                    
-                    yield {
-                        "unique_id": entry.link, 
-                        "arxiv_id": None,
-                        "source": source,
-                        "title": entry.title,
-                        "authors": [getattr(entry, 'author', source)],
-                        "abstract": summary,
-                        "published_date": datetime.fromtimestamp(published_ts, timezone.utc),
-                        "updated_date": datetime.now(timezone.utc),
-                        "pdf_url": entry.link,
-                        "categories": ["blog", "industry"]
-                    }
+            yield from parse_feed_entries(source, url, cutoff_date)
         except Exception as e:
             print(f"Error fetching {source}: {e}")
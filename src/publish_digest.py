@@ -12,19 +12,19 @@ from src.db.models import DailyDigest
 DOCS_DIR = os.path.join(os.path.dirname(__file__), "..", "docs")
 BLOG_DIR = os.path.join(DOCS_DIR, "blog")
 
-async def publish_digests():
-    print("Initializing Database...")
+async def publish_digests(log_fn=print) -> int:
+    log_fn("Initializing Database...")
     await init_mongo()
     
     # Ensure blog directory exists
     os.makedirs(BLOG_DIR, exist_ok=True)
     
-    print("Fetching digests...")
+    log_fn("Fetching digests...")
     digests = await DailyDigest.find_all().sort("-date").to_list()
     
     if not digests:
-        print("No digests found.")
-        return
+        log_fn("No digests found.")
+        return 0
 
     index_content = "# Daily Research Blog\n\n"
     
@@ -40,7 +40,7 @@ async def publish_digests():
         with open(filepath, "w") as f:
             f.write(digest.markdown_content)
             
-        print(f"Exported: {filename}")
+        log_fn(f"Exported: {filename}")
         
         # Add to index
         # Assuming the first line of content is a header, we can use it, or just use date.
@@ -51,7 +51,8 @@ async def publish_digests():
     with open(os.path.join(BLOG_DIR, "index.md"), "w") as f:
         f.write(index_content)
         
-    print("Blog index generated.")
+    log_fn("Blog index generated.")
+    return len(digests)
 
 if __name__ == "__main__":
     asyncio.run(publish_digests())
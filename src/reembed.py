@@ -0,0 +1,34 @@
+import asyncio
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.ai.processor import ai_processor
+from src.db.mongo import init_mongo
+from src.db.postgres import init_postgres
+from src.db.vector_store import get_vector_store
+from src.services.embedding_models import backfill_model
+
+async def reembed():
+    print("Initializing databases...")
+    await init_mongo()
+    await init_postgres()
+
+    store = get_vector_store()
+    for model in await store.models():
+        state = "active" if model.active else ("complete" if model.backfill_done else f"backfilling (at {model.backfill_cursor})")
+        print(f"  {model.model_id} [{model.dimensions}d]: {state}")
+
+    model_id = ai_processor.embedding_model_id
+    print(f"Re-embedding corpus with {model_id}...")
+    if await backfill_model(model_id):
+        print("Re-embed complete!")
+    else:
+        print("Stopped before the end; run again to resume.")
+
+if __name__ == "__main__":
+    # Run after changing AI_PROVIDER or the embedding model. Searches keep using the
+    # previous model until this finishes; safe to interrupt and re-run.
+    asyncio.run(reembed())
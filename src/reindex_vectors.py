@@ -0,0 +1,23 @@
+import asyncio
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.config import settings
+from src.db.postgres import engine, init_postgres
+from src.db.vector_index import rebuild_vector_index
+
+async def reindex_vectors():
+    print("Initializing Postgres...")
+    await init_postgres()
+
+    print(f"Rebuilding vector index ({settings.VECTOR_INDEX_TYPE}, {settings.VECTOR_DISTANCE})...")
+    await rebuild_vector_index(engine)
+
+    print("Reindex complete!")
+
+if __name__ == "__main__":
+    # Run after bulk loads (e.g. a reseed) to rebuild the ANN index with fresh statistics
+    asyncio.run(reindex_vectors())
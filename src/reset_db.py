@@ -1,13 +1,15 @@
 import asyncio
+import shutil
 import sys
 import os
 
 # Add project root to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from src.core.config import settings
 from src.db.mongo import init_mongo
 from src.db.postgres import init_postgres, AsyncSessionLocal
-from src.db.models import Paper, DailyDigest, PaperEmbedding, UserAnnotation
+from src.db.models import Paper, DailyDigest, PaperEmbedding, UserAnnotation, WorkItem
 from sqlalchemy import delete, text
 
 async def reset_databases():
@@ -22,13 +24,20 @@ async def reset_databases():
     print("  - Daily Digests cleared.")
     await UserAnnotation.delete_all()
     print("  - User Annotations cleared.")
+    await WorkItem.delete_all()
+    print("  - Ingestion work items cleared.")
     
-    print("Clearing Postgres tables...")
-    async with AsyncSessionLocal() as session:
-        # Drop the table so it gets recreated with new schema
-        await session.execute(text("DROP TABLE IF EXISTS paper_embeddings CASCADE"))
-        await session.commit()
-    print("  - Paper Embeddings table dropped.")
+    if settings.VECTOR_BACKEND == "numpy":
+        shutil.rmtree(settings.NUMPY_INDEX_PATH, ignore_errors=True)
+        print("  - Local vector index removed.")
+    else:
+        print("Clearing Postgres tables...")
+        async with AsyncSessionLocal() as session:
+            # Drop the tables so they get recreated with new schema
+            await session.execute(text("DROP TABLE IF EXISTS paper_embeddings CASCADE"))
+            await session.execute(text("DROP TABLE IF EXISTS embedding_models CASCADE"))
+            await session.commit()
+        print("  - Paper Embeddings and Embedding Models tables dropped.")
     
     print("Reset complete! You can now ingest fresh data.")
 
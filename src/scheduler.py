@@ -0,0 +1,37 @@
+import argparse
+import asyncio
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.db.mongo import init_mongo
+from src.db.postgres import init_postgres
+from src.services.scheduler import TASKS, TaskBusy, run_scheduler, run_task
+
+async def scheduler(task: str = None):
+    print("Initializing databases...")
+    await init_mongo()
+    await init_postgres()
+    if not task:
+        await run_scheduler()
+        return
+    try:
+        run = await run_task(task)
+        print(f"{task}: {run.status} in {run.duration_seconds:.1f}s: {run.stats}")
+    except TaskBusy as e:
+        print(f"{task}: not run, {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    # Runs ingestion, embedding backfill, digests and publishing on the SCHEDULE_* intervals.
+    # Safe to run more than one: every task takes a lock in Mongo first.
+    parser = argparse.ArgumentParser(description="Run scheduled maintenance tasks.")
+    parser.add_argument("--once", choices=sorted(TASKS), help="run a single task now and exit")
+    args = parser.parse_args()
+    try:
+        asyncio.run(scheduler(args.once))
+    except KeyboardInterrupt:
+        # A lock left by an interrupted run frees itself after TASK_LOCK_TTL
+        print("Scheduler stopped.")
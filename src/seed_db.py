@@ -1,40 +1,58 @@
 import asyncio
 import sys
 import os
-from sqlalchemy import select
 
 # Add the project root to the python path to ensure imports work correctly
 sys.path.append(os.getcwd())
 
 from src.db.mongo import init_mongo
-from src.db.postgres import init_postgres, AsyncSessionLocal
-from src.db.models import Paper, PaperEmbedding
+from src.db.postgres import init_postgres
+from src.db.models import Paper
+from src.db.bulk import backfill_embedding_metadata, find_existing_ids, flag_for_retry, insert_papers
+from src.services.embedding_models import ensure_embeddings as store_missing_embeddings
 from src.ingestion.arxiv_client import ArxivClient
 from src.ingestion.rss_client import RSSClient
 from src.core.config import settings
 from src.ai.processor import ai_processor
 
-async def ensure_embedding(paper):
-    """Generates and saves embedding if it doesn't exist."""
-    try:
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(
-                select(PaperEmbedding).where(PaperEmbedding.unique_id == paper.unique_id)
-            )
-            if result.scalar_one_or_none():
-                return False # Already exists
+SEED_BATCH_SIZE = settings.INGEST_BATCH_SIZE
 
-            # Generate
-            text = f"{paper.title} {paper.abstract}"
-            vector = await ai_processor.get_embedding(text)
-            
-            # Insert
-            session.add(PaperEmbedding(unique_id=paper.unique_id, embedding=vector))
-            await session.commit()
-            return True
+async def ensure_embeddings(items, log_fn=print):
+    """
+    Generates and saves embeddings for the items that don't have one yet. Returns count created.
+    On failure the batch is flagged for the retry pass instead of being left unsearchable.
+    """
+    try:
+        # Batched into as few provider requests as possible, for every model being written
+        return await store_missing_embeddings(items)
     except Exception as e:
-        print(f"Embedding error for {paper.unique_id}: {e}")
-        return False
+        log_fn(f"Embedding error for batch of {len(items)}: {e}")
+        await flag_for_retry([item["unique_id"] for item in items], f"embedding: {e}")
+        return 0
+
+async def seed_batch(items, stats, prefix, log_fn):
+    """
+    Dedup, insert and embed one batch of Paper-shaped dicts.
+    Costs one Mongo lookup, one bulk insert and one embedding lookup per batch.
+    """
+    existing = await find_existing_ids([item["unique_id"] for item in items])
+    new_papers = [Paper(**item) for item in items if item["unique_id"] not in existing]
+
+    inserted = await insert_papers(new_papers)
+    for paper in inserted:
+        log_fn(f"Inserted: {paper.title[:50]}...")
+
+    stats[f"{prefix}_new"] += len(inserted)
+    stats[f"{prefix}_skipped"] += len(items) - len(inserted)
+    # Check embeddings even for papers that already exist
+    stats["embeddings_created"] += await ensure_embeddings(items, log_fn)
+
+def _dedupe(items):
+    """Drop repeated unique_ids within a batch, keeping the first occurrence."""
+    seen = {}
+    for item in items:
+        seen.setdefault(item["unique_id"], item)
+    return list(seen.values())
 
 async def seed_data(days_back=30, log_fn=print):
     log_fn(f"Initializing MongoDB...")
@@ -55,6 +73,7 @@ async def seed_data(days_back=30, log_fn=print):
         # returns generator of arxiv.Result
         results = arxiv_client.fetch_recent_papers(days_back=days_back, max_results=max_results)
         
+        batch = []
         for result in results:
             meta = arxiv_client.get_paper_metadata(result)
             
@@ -62,21 +81,13 @@ async def seed_data(days_back=30, log_fn=print):
             paper_data = meta.copy()
             paper_data["source"] = "arxiv"
             paper_data["unique_id"] = meta["arxiv_id"] # Use arxiv_id as unique_id for papers
-            
-            # Check existence
-            existing = await Paper.find_one(Paper.unique_id == paper_data["unique_id"])
-            if existing:
-                stats["arxiv_skipped"] += 1
-                # Check embedding even if paper exists
-                if await ensure_embedding(existing):
-                     stats["embeddings_created"] += 1
-            else:
-                new_paper = Paper(**paper_data)
-                await new_paper.insert()
-                stats["arxiv_new"] += 1
-                log_fn(f"Inserted: {paper_data['title'][:50]}...")
-                if await ensure_embedding(new_paper):
-                     stats["embeddings_created"] += 1
+            batch.append(paper_data)
+
+            if len(batch) >= SEED_BATCH_SIZE:
+                await seed_batch(_dedupe(batch), stats, "arxiv", log_fn)
+                batch = []
+        if batch:
+            await seed_batch(_dedupe(batch), stats, "arxiv", log_fn)
                 
     except Exception as e:
         log_fn(f"\nError fetching ArXiv: {e}")
@@ -89,26 +100,24 @@ async def seed_data(days_back=30, log_fn=print):
     
     try:
         # returns async generator
+        batch = []
         async for post in rss_client.fetch_recent_posts(days_back=days_back):
-            # Check existence
-            existing = await Paper.find_one(Paper.unique_id == post["unique_id"])
-            if existing:
-                stats["rss_skipped"] += 1
-                if await ensure_embedding(existing):
-                     stats["embeddings_created"] += 1
-            else:
-                new_paper = Paper(**post)
-                await new_paper.insert()
-                stats["rss_new"] += 1
-                log_fn(f"Inserted: {post['title'][:50]}...")
-                if await ensure_embedding(new_paper):
-                     stats["embeddings_created"] += 1
+            batch.append(post)
+            if len(batch) >= SEED_BATCH_SIZE:
+                await seed_batch(_dedupe(batch), stats, "rss", log_fn)
+                batch = []
+        if batch:
+            await seed_batch(_dedupe(batch), stats, "rss", log_fn)
 
     except Exception as e:
         log_fn(f"\nError fetching RSS: {e}")
 
     log_fn(f"RSS Summary: {stats['rss_new']} new, {stats['rss_skipped']} skipped.")
     log_fn(f"\nTotal Embeddings Created: {stats['embeddings_created']}")
+    if settings.VECTOR_BACKEND == "pgvector":
+        await backfill_embedding_metadata(log_fn=log_fn)
+    cache = ai_processor.cache.stats()
+    log_fn(f"LLM cache: {cache['hits']} hits, {cache['misses']} misses.")
     log_fn("\n--- Seeding Complete ---")
     return stats
 
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Union
+
+from beanie import PydanticObjectId
+
+from src.ai.embedding_models import can_embed
+from src.ai.processor import ai_processor
+from src.core.config import settings
+from src.db.bulk import embedding_row
+from src.db.models import Paper
+from src.db.vector_store import get_vector_store
+
+# Embedding model lifecycle.
+#
+# New vectors are written with the configured model (AI_PROVIDER + its embedding
+# model). Searches use the store's active model. When the two differ, e.g. right
+# after switching provider, writes go to both so the active model stays complete
+# while backfill_model() re-embeds the existing corpus with the new one. Once
+# the backfill reaches the end, the new model is activated in a single update.
+
+ACTIVE_MODEL_TTL = 5.0 # seconds a process trusts its cached view of the active model
+
+_active_cache = {"model_id": None, "expires": 0.0}
+
+async def active_model_id() -> Optional[str]:
+    """The model searches use, or None before anything has been embedded."""
+    if time.monotonic() >= _active_cache["expires"]:
+        model = await get_vector_store().active_model()
+        _active_cache["model_id"] = model.model_id if model else None
+        _active_cache["expires"] = time.monotonic() + ACTIVE_MODEL_TTL
+    return _active_cache["model_id"]
+
+def _forget_active_model():
+    _active_cache["expires"] = 0.0
+
+async def write_model_ids() -> List[str]:
+    """Models new papers must be embedded with: the configured one, plus the active one while it differs."""
+    configured = ai_processor.embedding_model_id
+    active = await active_model_id()
+    if active and active != configured and can_embed(active):
+        return [configured, active]
+    return [configured]
+
+def _item_field(item: Union[Paper, dict], name: str):
+    return getattr(item, name) if isinstance(item, Paper) else item.get(name)
+
+def embedding_text(item: Union[Paper, dict]) -> str:
+    return f"{_item_field(item, 'title')} {_item_field(item, 'abstract')}"
+
+async def embed_for_storage(items: List[Union[Paper, dict]]) -> Dict[str, List[List[float]]]:
+    """
+    Embed items with every model in write_model_ids(), keyed by model id.
+    Raises LLMCallFailed if any of them fails.
+    """
+    texts = [embedding_text(item) for item in items]
+    model_ids = await write_model_ids()
+    vectors = await asyncio.gather(*(ai_processor.get_embeddings(texts, model_id=m) for m in model_ids))
+    return dict(zip(model_ids, vectors))
+
+async def ensure_embeddings(items: List[Union[Paper, dict]], model_ids: Optional[List[str]] = None) -> int:
+    """
+    Embed and store the items that have no vector yet for each model
+    (default: write_model_ids()). Returns the number of vectors written.
+    Raises LLMCallFailed; vectors for models that succeeded are kept.
+    """
+    store = get_vector_store()
+    written = 0
+    for model_id in model_ids or await write_model_ids():
+        missing = await store.missing([_item_field(item, "unique_id") for item in items], model_id)
+        todo = [item for item in items if _item_field(item, "unique_id") in missing]
+        if not todo:
+            continue
+        vectors = await ai_processor.get_embeddings([embedding_text(item) for item in todo], model_id=model_id)
+        written += await store.add([embedding_row(item, vector, model_id) for item, vector in zip(todo, vectors)])
+    return written
+
+async def activate_model(model_id: str):
+    await get_vector_store().activate_model(model_id)
+    _forget_active_model()
+
+async def backfill_model(
+    model_id: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    pause: Optional[float] = None,
+    max_batches: Optional[int] = None,
+    activate: bool = True,
+    log_fn=print
+) -> bool:
+    """
+    Re-embed the whole corpus with model_id (default: the configured model), oldest
+    paper first, in throttled batches. Progress is saved after every batch, so an
+    interrupted run resumes where it stopped. On reaching the end the model is
+    marked complete and, with activate=True, atomically becomes the active model.
+    Returns True once the model is complete. Raises LLMCallFailed (progress kept).
+    """
+    store = get_vector_store()
+    model_id = model_id or ai_processor.embedding_model_id
+    batch_size = batch_size or settings.EMBEDDING_BACKFILL_BATCH_SIZE
+    pause = settings.EMBEDDING_BACKFILL_PAUSE if pause is None else pause
+
+    model = await store.get_model(model_id)
+    if model and model.backfill_done:
+        log_fn(f"{model_id} is already fully embedded.")
+    else:
+        cursor = model.backfill_cursor if model else None
+        batches = 0
+        finished = False
+        while max_batches is None or batches < max_batches:
+            query = Paper.find(Paper.id > PydanticObjectId(cursor)) if cursor else Paper.find_all()
+            papers = await query.sort(+Paper.id).limit(batch_size).to_list()
+            if not papers:
+                finished = True
+                break
+            written = await ensure_embeddings(papers, [model_id])
+            cursor = str(papers[-1].id)
+            if await store.get_model(model_id) is not None:
+                await store.save_backfill_progress(model_id, cursor)
+            batches += 1
+            log_fn(f"Backfill {model_id}: {written} embedded in this batch, up to paper {cursor}.")
+            await asyncio.sleep(pause)
+        if not finished:
+            return False
+
+        if await store.get_model(model_id) is None:
+            log_fn("Nothing to backfill yet (no papers).")
+            return False
+        await store.save_backfill_progress(model_id, cursor, done=True)
+        log_fn(f"Backfill of {model_id} complete.")
+
+    active = await store.active_model()
+    if activate and (active is None or active.model_id != model_id):
+        await activate_model(model_id)
+        log_fn(f"Searches now use {model_id}" + (f" (was {active.model_id})." if active else "."))
+    return True
@@ -0,0 +1,311 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+
+from src.ai.processor import ai_processor
+from src.ai.rate_limit import LLMCallFailed
+from src.core.config import settings
+from src.db.bulk import embedding_row, find_existing_ids, flag_for_retry, insert_papers
+from src.db.models import Paper
+from src.db.vector_store import get_vector_store
+from src.services.embedding_models import embed_for_storage
+from src.ingestion.arxiv_client import ArxivClient
+from src.ingestion.rss_client import RSSClient
+
+# Sentinel telling a stage worker that its input is exhausted
+_DONE = object()
+
+class StageStats:
+    """Counters for a single pipeline stage."""
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.started_at = time.perf_counter()
+
+    @property
+    def throughput(self) -> float:
+        elapsed = time.perf_counter() - self.started_at
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def describe(self) -> str:
+        text = f"{self.name}: {self.processed} ({self.throughput:.1f}/s)"
+        if self.dropped:
+            text += f", {self.dropped} skipped"
+        if self.failed:
+            text += f", {self.failed} failed"
+        return text
+
+class IngestionPipeline:
+    """
+    Streams items through fetch -> dedup -> summarize -> embed -> persist.
+
+    Each stage runs its own pool of workers and hands items to the next stage
+    through a bounded asyncio.Queue. When a downstream stage falls behind, the
+    queue fills and upstream workers block on put(), so memory stays bounded
+    and the slowest stage sets the pace instead of the sum of all of them.
+    """
+
+    def __init__(
+        self,
+        arxiv_client: ArxivClient,
+        rss_client: RSSClient,
+        on_progress: Optional[Callable[[str], None]] = None
+    ):
+        self.arxiv_client = arxiv_client
+        self.rss_client = rss_client
+        self.on_progress = on_progress
+        # (name, fn, workers, batch_size). Batched stages receive a list of
+        # whatever is already waiting in their queue, up to batch_size items.
+        self.stages = [
+            ("dedup", self._dedup, settings.INGEST_DEDUP_WORKERS, settings.INGEST_BATCH_SIZE),
+            ("summarize", self._summarize, settings.INGEST_SUMMARY_WORKERS, 1),
+            ("embed", self._embed, settings.INGEST_EMBED_WORKERS, settings.EMBEDDING_BATCH_SIZE),
+            ("persist", self._persist, settings.INGEST_PERSIST_WORKERS, settings.INGEST_BATCH_SIZE),
+        ]
+        self.stage_stats: Dict[str, StageStats] = {}
+        self.source_stats: Dict[str, int] = {}
+        self._seen_ids = set()
+        # feed name -> (feed, validators, unique_ids fetched); validators are saved once those are stored
+        self._fetched_feeds: Dict[str, tuple] = {}
+        self._failed_ids = set()
+
+    def log(self, msg: str):
+        print(msg)
+        if self.on_progress:
+            self.on_progress(msg)
+
+    async def run(self, max_papers: int = 5, days_back: int = 2) -> dict:
+        """
+        Runs the pipeline to completion.
+        Returns the number of fetched items per source (same shape as before).
+        """
+        self._seen_ids = set()
+        self._failed_ids = set()
+        self.stage_stats = {name: StageStats(name, workers) for name, _, workers, _ in self.stages}
+
+        queues = [asyncio.Queue(maxsize=settings.INGEST_QUEUE_SIZE) for _ in self.stages]
+        stage_tasks: List[List[asyncio.Task]] = []
+        for i, (name, fn, workers, batch_size) in enumerate(self.stages):
+            out_q = queues[i + 1] if i + 1 < len(queues) else None
+            stage_tasks.append([
+                asyncio.create_task(self._worker(self.stage_stats[name], fn, queues[i], out_q, batch_size))
+                for _ in range(workers)
+            ])
+        reporter = asyncio.create_task(self._report_progress())
+
+        try:
+            # Fetch stage: both producers stream straight into the dedup queue
+            await self.fetch(queues[0], max_papers, days_back)
+
+            # Drain stage by stage: once every worker of stage i has exited,
+            # everything it produced is already queued for stage i + 1.
+            for i, tasks in enumerate(stage_tasks):
+                for _ in tasks:
+                    await queues[i].put(_DONE)
+                await asyncio.gather(*tasks)
+        finally:
+            reporter.cancel()
+            for tasks in stage_tasks:
+                for task in tasks:
+                    task.cancel()
+
+        self.log("Stage throughput: " + " | ".join(s.describe() for s in self.stage_stats.values()))
+        await self.save_feed_validators()
+        return self.source_stats
+
+    # --- Fetch ---
+
+    async def fetch(self, out_q: asyncio.Queue, max_papers: int = 5, days_back: int = 2):
+        """Stream raw items from arXiv and the active RSS feeds into out_q; fills source_stats."""
+        self.source_stats = {"arxiv": 0}
+        self._fetched_feeds = {}
+        await asyncio.gather(
+            self._produce_arxiv(out_q, max_papers, days_back),
+            self._produce_rss(out_q, days_back),
+        )
+
+    async def _produce_arxiv(self, out_q: asyncio.Queue, max_papers: int, days_back: int):
+        self.log("Fetching papers from ArXiv...")
+        # The arxiv client is a blocking generator (network + polite delays),
+        # so each page is pulled on a worker thread.
+        results = self.arxiv_client.fetch_recent_papers(days_back=days_back)
+        try:
+            while self.source_stats["arxiv"] < max_papers:
+                res = await asyncio.to_thread(next, results, _DONE)
+                if res is _DONE:
+                    break
+                meta = self.arxiv_client.get_paper_metadata(res)
+                meta['unique_id'] = meta['arxiv_id']
+                meta['source'] = 'arxiv'
+                self.source_stats["arxiv"] += 1
+                await out_q.put(meta)
+        except Exception as e:
+            self.log(f"Error fetching ArXiv: {e}")
+        self.log(f"Fetched {self.source_stats['arxiv']} ArXiv papers.")
+
+    async def _produce_rss(self, out_q: asyncio.Queue, days_back: int):
+        cutoff_date = time.time() - (days_back * 24 * 60 * 60)
+        feeds = await self.rss_client.get_active_feeds()
+        self.log(f"Fetching {len(feeds)} RSS feeds...")
+        async for feed, posts, validators, error in self.rss_client.stream_feeds(feeds, cutoff_date):
+            self.source_stats[feed.name] = len(posts)
+            if error:
+                self.log(f"Error fetching {feed.name}: {error}")
+                continue
+            self.log(f"Fetched RSS feed: {feed.name} ({len(posts)} posts)")
+            self._fetched_feeds[feed.name] = (feed, validators, {post["unique_id"] for post in posts})
+            for post in posts:
+                await out_q.put(post)
+
+    async def save_feed_validators(self):
+        """
+        Save each fetched feed's ETag/Last-Modified, unless one of its items failed
+        to be stored: then the next run fetches the feed in full again.
+        Call only once every fetched item has been stored (or queued as a work item).
+        """
+        for feed, validators, unique_ids in self._fetched_feeds.values():
+            if unique_ids & self._failed_ids:
+                self.log(f"Not saving validators for {feed.name}: some of its items failed.")
+                continue
+            try:
+                await self.rss_client.save_validators(feed, validators)
+            except Exception as e:
+                self.log(f"Error saving validators for {feed.name}: {e}")
+
+    # --- Stages ---
+
+    async def _worker(self, stats: StageStats, fn, in_q: asyncio.Queue, out_q: Optional[asyncio.Queue], batch_size: int = 1):
+        while True:
+            item = await in_q.get()
+            if item is _DONE:
+                return
+
+            if batch_size == 1:
+                batch, finished = [item], False
+            else:
+                batch, finished = self._drain(in_q, item, batch_size)
+
+            try:
+                results = [await fn(item)] if batch_size == 1 else await fn(batch)
+            except Exception as e:
+                stats.failed += len(batch)
+                self._failed_ids.update(_describe(i) for i in batch)
+                self.log(f"[{stats.name}] failed for {', '.join(_describe(i) for i in batch[:3])}: {e}")
+                if finished:
+                    return
+                continue
+
+            results = [r for r in results if r is not None]
+            stats.processed += len(results)
+            stats.dropped += len(batch) - len(results)
+            if out_q is not None:
+                for result in results:
+                    await out_q.put(result)
+            if finished:
+                return
+
+    @staticmethod
+    def _drain(in_q: asyncio.Queue, first, batch_size: int) -> tuple:
+        """
+        Collect `first` plus whatever is already queued, without waiting, up to batch_size.
+        Returns (batch, finished); finished is True if this worker consumed its _DONE.
+        """
+        batch = [first]
+        while len(batch) < batch_size:
+            try:
+                item = in_q.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if item is _DONE:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _dedup(self, items: List[dict]) -> List[Paper]:
+        fresh = []
+        for item in items:
+            # The same post can show up twice in one run (e.g. cross-posted feeds)
+            if item["unique_id"] in self._seen_ids:
+                continue
+            self._seen_ids.add(item["unique_id"])
+            fresh.append(item)
+
+        existing = await find_existing_ids([item["unique_id"] for item in fresh])
+        return [Paper(**item) for item in fresh if item["unique_id"] not in existing]
+
+    async def _summarize(self, paper: Paper) -> Paper:
+        return await summarize_paper(paper)
+
+    async def _embed(self, papers: List[Paper]) -> List[tuple]:
+        return await embed_papers(papers)
+
+    async def _persist(self, items: List[tuple]) -> List[Paper]:
+        return await persist_papers(items, log_fn=self.log)
+
+    async def _report_progress(self):
+        while True:
+            await asyncio.sleep(settings.INGEST_PROGRESS_INTERVAL)
+            self.log("Progress: " + " | ".join(s.describe() for s in self.stage_stats.values()))
+
+def _describe(item) -> str:
+    if isinstance(item, tuple):
+        item = item[0]
+    if isinstance(item, Paper):
+        return item.unique_id
+    if isinstance(item, dict):
+        return item.get("unique_id", "?")
+    return repr(item)
+
+# Stage bodies, shared with the distributed ingest workers (src/services/work_items.py)
+
+async def summarize_paper(paper: Paper) -> Paper:
+    # Pass 1 Summary
+    if len(paper.abstract) > 50:
+        try:
+            paper.summary_pass_1 = await ai_processor.generate_summary(paper.abstract, pass_level=1)
+        except LLMCallFailed as e:
+            # Keep the paper, but leave the summary empty and flag it for the retry pass
+            paper.needs_retry = True
+            paper.last_error = f"summary: {e}"
+    else:
+        paper.summary_pass_1 = paper.abstract
+    return paper
+
+async def embed_papers(papers: List[Paper]) -> List[tuple]:
+    """Returns (paper, {model_id: vector}) pairs; papers that couldn't be embedded get no vectors."""
+    try:
+        by_model = await embed_for_storage(papers)
+    except LLMCallFailed as e:
+        # Never store placeholder vectors; persist without one and retry later
+        for paper in papers:
+            paper.needs_retry = True
+            paper.last_error = f"embedding: {e}"
+        by_model = {}
+    return [
+        (paper, {model_id: vectors[i] for model_id, vectors in by_model.items()})
+        for i, paper in enumerate(papers)
+    ]
+
+async def persist_papers(items: List[tuple], log_fn=print) -> List[Paper]:
+    """Write papers from embed_papers() and their vectors; returns the papers actually inserted."""
+    vectors = {paper.unique_id: by_model for paper, by_model in items}
+    inserted = await insert_papers([paper for paper, _ in items])
+    try:
+        await get_vector_store().add([
+            embedding_row(paper, vector, model_id)
+            for paper in inserted for model_id, vector in vectors[paper.unique_id].items()
+        ])
+    except Exception as e:
+        # The papers are stored but unsearchable; the retry pass re-embeds them
+        log_fn(f"Storing vectors failed for {len(inserted)} papers: {e}")
+        for paper in inserted:
+            paper.needs_retry = True
+            paper.last_error = f"vector store: {e}"
+        await flag_for_retry([paper.unique_id for paper in inserted], f"vector store: {e}")
+
+    for paper in inserted:
+        log_fn(f"Saved: {paper.title[:30]}...")
+    return inserted
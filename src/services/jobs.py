@@ -0,0 +1,168 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from beanie.odm.operators.find.comparison import In
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from src.core.config import settings
+from src.db.models import Job
+from src.db.mongo import get_collection
+from src.services.locks import holder_name
+from src.services.research_service import ResearchService
+
+# Mongo-backed job queue for slow LLM work triggered from the UI.
+#
+# The UI enqueues a job and returns; src/worker.py claims queued jobs with an
+# atomic find-and-modify and runs them. A job's key names the work it does, and
+# a partial unique index allows only one queued/running job per key, so a second
+# click (or a second browser tab) gets the job already in flight instead of
+# paying for the same LLM call twice.
+
+def analyze_key(unique_id: str) -> str:
+    return f"analyze:{unique_id}"
+
+def digest_key(date: datetime) -> str:
+    return f"digest:{date.strftime('%Y-%m-%d')}"
+
+async def enqueue_job(kind: str, key: str, payload: dict) -> Job:
+    """Queue a job, or return the queued/running job that already has this key."""
+    while True:
+        job = Job(key=key, kind=kind, payload=payload)
+        try:
+            await job.insert()
+            return job
+        except DuplicateKeyError:
+            existing = await Job.find_one(Job.key == key, Job.active == True)
+            if existing:
+                return existing
+            # It finished between our insert and lookup; queue a fresh one
+
+async def enqueue_analysis(unique_id: str) -> Job:
+    return await enqueue_job("analyze", analyze_key(unique_id), {"unique_id": unique_id})
+
+def task_key(name: str) -> str:
+    return f"task:{name}"
+
+async def enqueue_task(name: str) -> Job:
+    """Ask a worker to run a scheduler task (ingest, seed) now."""
+    return await enqueue_job(name, task_key(name), {})
+
+async def enqueue_digest(date: datetime, regenerate: bool = False) -> Job:
+    """Queue the digest for a day; regenerate=True writes a fresh post instead of reusing the cached one."""
+    day = datetime(date.year, date.month, date.day)
+    return await enqueue_job("digest", digest_key(day), {"date": day.isoformat(), "regenerate": regenerate})
+
+async def get_job(key: str) -> Optional[Job]:
+    """The most recent job for key, whatever its status."""
+    return await Job.find(Job.key == key).sort("-created_at").first_or_none()
+
+async def get_active_jobs(keys: List[str]) -> Dict[str, Job]:
+    """Queued or running jobs among keys, in one query."""
+    if not keys:
+        return {}
+    jobs = await Job.find(In(Job.key, keys), Job.active == True).to_list()
+    return {job.key: job for job in jobs}
+
+# --- Worker side ---
+
+async def claim_job(worker_id: str) -> Optional[Job]:
+    """
+    Atomically take the oldest queued job, or one whose worker has not sent a
+    heartbeat for JOB_STALE_AFTER (crashed mid-job). Returns None when there is nothing to do.
+    """
+    now = datetime.now(timezone.utc)
+    doc = await get_collection(Job).find_one_and_update(
+        {"$or": [
+            {"status": "queued"},
+            {"status": "running", "heartbeat_at": {"$lt": now - timedelta(seconds=settings.JOB_STALE_AFTER)}},
+            # Claimed before heartbeats existed
+            {"status": "running", "heartbeat_at": None, "started_at": {"$lt": now - timedelta(seconds=settings.JOB_STALE_AFTER)}},
+        ]},
+        {"$set": {"status": "running", "worker_id": worker_id, "started_at": now, "heartbeat_at": now}, "$inc": {"attempts": 1}},
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+    return Job.model_validate(doc) if doc else None
+
+async def _finish(job: Job, worker_id: str, status: str, error: Optional[str] = None):
+    # Only the current owner may finish a job; a stale one may have been re-claimed
+    await get_collection(Job).update_one(
+        {"_id": job.id, "worker_id": worker_id, "status": "running"},
+        {"$set": {"status": status, "active": False, "error": error, "finished_at": datetime.now(timezone.utc)}}
+    )
+
+async def _heartbeat(job: Job, worker_id: str, log_fn=print):
+    # Keeps a long job (e.g. an hour of ingestion) from being presumed abandoned
+    while True:
+        await asyncio.sleep(settings.JOB_STALE_AFTER / 3)
+        try:
+            await get_collection(Job).update_one(
+                {"_id": job.id, "worker_id": worker_id, "status": "running"},
+                {"$set": {"heartbeat_at": datetime.now(timezone.utc)}}
+            )
+        except Exception as e:
+            log_fn(f"[{worker_id}] {job.key}: heartbeat failed: {e}")
+
+async def _run(service, job: Job):
+    if job.kind == "analyze":
+        paper = await service.analyze_paper(job.payload["unique_id"])
+        if paper is None:
+            raise ValueError(f"Paper {job.payload['unique_id']} not found")
+    elif job.kind == "digest":
+        digest = await service.generate_daily_digest(
+            datetime.fromisoformat(job.payload["date"]), use_cache=not job.payload.get("regenerate", False)
+        )
+        if digest is None:
+            raise ValueError("No papers found for this date")
+    elif job.kind in ("ingest", "seed"):
+        # Same code, lock and run record as the scheduled task (raises TaskBusy if one is running)
+        from src.services.scheduler import run_task
+        await run_task(job.kind)
+    else:
+        raise ValueError(f"Unknown job kind '{job.kind}'")
+
+async def run_job(service, job: Job, worker_id: str, log_fn=print):
+    if job.attempts > settings.JOB_MAX_ATTEMPTS:
+        await _finish(job, worker_id, "failed", job.error or f"Gave up after {settings.JOB_MAX_ATTEMPTS} attempts")
+        return
+    log_fn(f"[{worker_id}] {job.key}: started (attempt {job.attempts})")
+    heartbeat = asyncio.create_task(_heartbeat(job, worker_id, log_fn))
+    try:
+        await _run(service, job)
+    except Exception as e:
+        log_fn(f"[{worker_id}] {job.key}: failed: {e}")
+        await _finish(job, worker_id, "failed", str(e))
+    else:
+        log_fn(f"[{worker_id}] {job.key}: done")
+        await _finish(job, worker_id, "done")
+    finally:
+        heartbeat.cancel()
+
+async def run_worker(
+    concurrency: Optional[int] = None,
+    poll_interval: Optional[float] = None,
+    log_fn=print
+):
+    """Claim and run jobs forever, `concurrency` at a time."""
+    service = ResearchService()
+    worker_id = holder_name()
+    concurrency = concurrency or settings.JOB_WORKER_CONCURRENCY
+    poll_interval = settings.JOB_POLL_INTERVAL if poll_interval is None else poll_interval
+
+    async def slot():
+        while True:
+            try:
+                job = await claim_job(worker_id)
+                if job is None:
+                    await asyncio.sleep(poll_interval)
+                    continue
+                await run_job(service, job, worker_id, log_fn=log_fn)
+            except Exception as e:
+                # e.g. Mongo unreachable; an unfinished job is re-claimed once its heartbeat is stale
+                log_fn(f"[{worker_id}] worker slot error: {e}")
+                await asyncio.sleep(max(poll_interval, 1.0) * 5)
+
+    log_fn(f"Worker {worker_id} running {concurrency} job slots.")
+    await asyncio.gather(*(slot() for _ in range(concurrency)))
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import socket
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from src.core.config import settings
+from src.db.models import TaskLock
+from src.db.mongo import get_collection
+
+# Mongo-backed mutual exclusion across processes and hosts. A lock is a document
+# keyed by name (unique index); taking it is a single upsert that only matches
+# when the lock is free (expired) or already ours, so two contenders can't both
+# win. Holders renew the expiry while they work, and a crashed holder's lock
+# frees itself after TASK_LOCK_TTL.
+
+def holder_name() -> str:
+    """Identifies this process as a lock holder or job worker."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class LockLost(Exception):
+    """The lock expired or was taken over while its holder was still working."""
+
+async def acquire_lock(name: str, owner: str, ttl: Optional[float] = None) -> bool:
+    now = datetime.utcnow()
+    ttl = ttl or settings.TASK_LOCK_TTL
+    try:
+        await get_collection(TaskLock).find_one_and_update(
+            {"name": name, "$or": [{"expires_at": {"$lt": now}}, {"owner": owner}]},
+            {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=ttl)}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        # Held by someone else: the filter missed and the upsert hit the unique name
+        return False
+
+async def release_lock(name: str, owner: str):
+    await get_collection(TaskLock).delete_one({"name": name, "owner": owner})
+
+class HeldLock:
+    """What held_lock() yields: whether the lock was taken, and whether it was lost mid-block."""
+    def __init__(self, name: str, acquired: bool):
+        self.name = name
+        self.acquired = acquired
+        self.lost = False
+
+@asynccontextmanager
+async def held_lock(name: str, owner: str, ttl: Optional[float] = None, log_fn=print):
+    """
+    Hold the lock for the duration of the block, renewing it in the background.
+    Yields a HeldLock; if someone else holds the lock, `acquired` is False and the
+    block runs without it. If the lock is lost while the block runs (taken over,
+    or renewals keep failing until it would expire), the block is cancelled and
+    `lost` is set.
+    """
+    ttl = ttl or settings.TASK_LOCK_TTL
+    lock = HeldLock(name, await acquire_lock(name, owner, ttl))
+    if not lock.acquired:
+        yield lock
+        return
+
+    holder = asyncio.current_task()
+
+    async def renew():
+        renewed = time.monotonic()
+        while True:
+            await asyncio.sleep(ttl / 3)
+            try:
+                if await acquire_lock(name, owner, ttl):
+                    renewed = time.monotonic()
+                    continue
+                log_fn(f"Lock '{name}' was taken over by another holder.")
+            except Exception as e:
+                log_fn(f"Renewing lock '{name}' failed: {e}")
+                # Still ours if the next attempt comes before it expires
+                if time.monotonic() - renewed + ttl / 3 < ttl:
+                    continue
+                log_fn(f"Lock '{name}' is about to expire; stopping.")
+            lock.lost = True
+            holder.cancel()
+            return
+
+    renewer = asyncio.create_task(renew())
+    try:
+        yield lock
+    except asyncio.CancelledError:
+        if not lock.lost:
+            raise
+        # Our own cancellation: surface it as a failure, not a shutdown
+        holder.uncancel()
+        raise LockLost(f"Lost lock '{name}' while running") from None
+    finally:
+        renewer.cancel()
+        try:
+            await release_lock(name, owner)
+        except Exception as e:
+            # It expires after ttl anyway
+            log_fn(f"Releasing lock '{name}' failed: {e}")
@@ -1,16 +1,87 @@
 
 import asyncio
-import time
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict
+
+import numpy as np
+from beanie import PydanticObjectId
 from beanie.odm.operators.find.comparison import In
 from src.ingestion.arxiv_client import ArxivClient
-from src.ai.processor import ai_processor
-from src.db.models import Paper, PaperEmbedding, DailyDigest, UserAnnotation, RSSFeedConfig
-from src.db.postgres import AsyncSessionLocal
-from sqlalchemy import select
+from src.ai.processor import ai_processor, pack_by_tokens
+from src.db.models import (
+    Paper, DailyDigest, UserAnnotation, RSSFeedConfig, SearchHit, ArchivePage, PaperListView, ArchiveFacets
+)
+from src.db.read_cache import ANNOTATIONS, CHANGELOGS, DIGESTS, FEEDS, PAPERS, read_cache
+from src.db.vector_store import get_vector_store
 
 from src.ingestion.rss_client import RSSClient
+from src.services.ingestion_pipeline import IngestionPipeline
+from src.services.topic_clusters import TopicCluster, cluster_papers
+from src.services.work_items import queue_fetched_items
+from src.ai.rate_limit import LLMCallFailed
+from src.core.config import settings
+from src.services.embedding_models import active_model_id, ensure_embeddings
+
+ARCHIVE_PAGE_SIZE = 50
+
+def _paper_filter(
+    text: Optional[str] = None,
+    sources: Optional[List[str]] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    categories: Optional[List[str]] = None
+) -> dict:
+    """Mongo filter for papers; end_date is exclusive and text uses the paper_text index."""
+    match = {}
+    if text:
+        match["$text"] = {"$search": text}
+    if sources:
+        match["source"] = {"$in": sources}
+    if start_date or end_date:
+        match["published_date"] = {}
+        if start_date:
+            match["published_date"]["$gte"] = start_date
+        if end_date:
+            match["published_date"]["$lt"] = end_date
+    if categories:
+        match["categories"] = {"$in": categories}
+    return match
+
+def _encode_cursor(paper: PaperListView) -> str:
+    return f"{paper.published_date.isoformat()}|{paper.id}"
+
+def _decode_cursor(cursor: str) -> dict:
+    """Filter for the papers after `cursor` in (published_date, _id) descending order."""
+    published, _, oid = cursor.partition("|")
+    published = datetime.fromisoformat(published)
+    oid = PydanticObjectId(oid)
+    return {"$or": [
+        {"published_date": {"$lt": published}},
+        {"published_date": published, "_id": {"$lt": oid}},
+    ]}
+
+def _digest_item(paper: Paper, max_chars: Optional[int] = None) -> str:
+    """One paper or post as digest prompt input."""
+    # RSS items often have shorter content but are high signal
+    content = paper.summary_pass_1 or paper.abstract or ""
+    max_chars = max_chars or settings.DIGEST_ITEM_MAX_CHARS
+    # Truncate slightly to be safe
+    if len(content) > max_chars:
+        content = content[:max_chars] + "..."
+    return f"Title: {paper.title}\nSource: {paper.source}\nURL: {paper.pdf_url}\nContent: {content}"
+
+async def _hydrate_hits(hits: List[SearchHit]):
+    """Attach each hit's Paper (one Mongo $in query) and fill display fields it lacks."""
+    if not hits:
+        return
+    papers = {p.unique_id: p for p in await Paper.find(In(Paper.unique_id, [h.unique_id for h in hits])).to_list()}
+    for hit in hits:
+        if paper := papers.get(hit.unique_id):
+            hit.paper = paper
+            hit.title = hit.title or paper.title
+            hit.source = hit.source or paper.source
+            hit.published_date = hit.published_date or paper.published_date
+            hit.pdf_url = hit.pdf_url or paper.pdf_url
 
 class ResearchService:
     def __init__(self):
@@ -20,110 +91,92 @@ class ResearchService:
     async def run_daily_ingestion(self, max_papers: int = 5, on_progress=None) -> dict:
         """
         Orchestrates the daily ingestion workflow.
+        Items are streamed through the staged IngestionPipeline; per-stage
+        throughput is reported through on_progress. With INGEST_MODE=distributed
+        new items are only queued for the ingest workers (src/services/work_items.py).
         Returns a dictionary of ingestion statistics.
         """
-        def log(msg):
-            print(msg)
-            if on_progress:
-                on_progress(msg)
+        pipeline = IngestionPipeline(self.arxiv_client, self.rss_client, on_progress=on_progress)
+        pipeline.log("Starting daily ingestion...")
+        if settings.INGEST_MODE == "distributed":
+            # Fetch only; ingest workers (src/ingest_worker.py) do the rest
+            queued = await queue_fetched_items(pipeline, max_papers=max_papers, days_back=2)
+            stats = {**pipeline.source_stats, "queued": queued}
+        else:
+            stats = await pipeline.run(max_papers=max_papers, days_back=2)
 
-        log("Starting daily ingestion...")
-        stats = {"arxiv": 0}
-        
-        # Fetch from ArXiv
-        log("Fetching papers from ArXiv...")
-        arxiv_results = list(self.arxiv_client.fetch_recent_papers(days_back=2))
-        stats["arxiv"] = len(arxiv_results)
-        log(f"Fetched {len(arxiv_results)} ArXiv papers.")
-        
-        # Fetch from RSS
-        rss_results = []
-        cutoff_date = time.time() - (2 * 24 * 60 * 60)
-        
-        feeds = await self.rss_client.get_active_feeds()
-        for feed in feeds:
-            stats[feed.name] = 0
-            log(f"Fetching RSS feed: {feed.name}...")
+        retried = await self.retry_failed_items(log_fn=pipeline.log)
+        if retried:
+            pipeline.log(f"Recovered {retried} previously failed items.")
+
+        if settings.INGEST_MODE != "distributed":
+            added = pipeline.stage_stats["persist"].processed
+            pipeline.log(f"Ingestion complete. Added {added} new items.")
+        cache = ai_processor.cache.stats()
+        pipeline.log(f"LLM cache: {cache['hits']} hits, {cache['misses']} misses.")
+        return stats
+
+    async def retry_failed_items(self, log_fn=print, limit: int = 200) -> int:
+        """
+        Re-run the AI steps for papers flagged with needs_retry (missing summary or embedding).
+        Returns the number of papers fully recovered.
+        """
+        papers = await Paper.find(Paper.needs_retry == True).limit(limit).to_list()
+        if not papers:
+            return 0
+        log_fn(f"Retrying {len(papers)} items flagged by earlier runs...")
+
+        async def retry_summary(paper: Paper) -> bool:
+            if paper.summary_pass_1:
+                return True
             try:
-                # fetch_single_feed is synchronous generator
-                feed_posts = list(self.rss_client.fetch_single_feed(feed.name, feed.url, cutoff_date))
-                stats[feed.name] = len(feed_posts)
-                rss_results.extend(feed_posts)
-            except Exception as e:
-                log(f"Error fetching {feed.name}: {e}")
+                paper.summary_pass_1 = await ai_processor.generate_summary(paper.abstract, pass_level=1)
+                return True
+            except LLMCallFailed as e:
+                paper.last_error = str(e)
+                return False
+
+        summarized = await asyncio.gather(*(retry_summary(p) for p in papers))
+        try:
+            await ensure_embeddings(papers)
+            embedding_error = None
+        except LLMCallFailed as e:
+            embedding_error = f"embedding: {e}"
+
+        async def record(paper: Paper, ok: bool) -> bool:
+            if ok and embedding_error is None:
+                paper.needs_retry = False
+                paper.last_error = None
+            elif embedding_error is not None:
+                paper.last_error = embedding_error
+            await paper.save()
+            return not paper.needs_retry
+
+        results = await asyncio.gather(*(record(p, ok) for p, ok in zip(papers, summarized)))
+        read_cache.invalidate(PAPERS)
+        return sum(results)
 
-    # --- RSS Feed Management ---
     # --- RSS Feed Management ---
     async def get_all_feeds(self) -> List[RSSFeedConfig]:
-        return await RSSFeedConfig.find_all().to_list()
+        return await read_cache.get_or_load(FEEDS, "all_feeds", lambda: RSSFeedConfig.find_all().to_list())
 
     async def add_rss_feed(self, name: str, url: str):
         if await RSSFeedConfig.find_one(RSSFeedConfig.name == name):
             raise ValueError(f"Feed '{name}' already exists.")
         await RSSFeedConfig(name=name, url=url).insert()
+        read_cache.invalidate(FEEDS)
 
     async def delete_rss_feed(self, name: str):
         feed = await RSSFeedConfig.find_one(RSSFeedConfig.name == name)
         if feed:
             await feed.delete()
+            read_cache.invalidate(FEEDS)
 
-        # Standardize and Combine
-        all_items = []
-        for res in arxiv_results[:max_papers]:
-            meta = self.arxiv_client.get_paper_metadata(res)
-            meta['unique_id'] = meta['arxiv_id']
-            meta['source'] = 'arxiv'
-            all_items.append(meta)
-            
-        all_items.extend(rss_results)
-        
-        processed_count = 0
-        log(f"Processing {len(all_items)} unique items...")
-        
-        for item in all_items:
-            if await self._process_item(item, log):
-                processed_count += 1
-            
-        log(f"Ingestion complete. Added {processed_count} new items.")
-        return stats
-
-    async def _process_item(self, item: dict, log_fn) -> bool:
+    async def generate_daily_digest(self, date: datetime = None, use_cache: bool = True) -> DailyDigest:
         """
-        Handles deduplication, summarization, storage, and embedding for a single item.
-        Returns True if item was new and added, False otherwise.
+        Create a blog post from recent papers. If date provided, specific to that day.
+        use_cache=False asks the LLM again even if it already wrote a post for the same papers.
         """
-        unique_id = item["unique_id"]
-        
-        if await Paper.find_one(Paper.unique_id == unique_id):
-            return False
-        
-        paper = Paper(**item)
-        
-        # Pass 1 Summary
-        if len(paper.abstract) > 50:
-             paper.summary_pass_1 = await ai_processor.generate_summary(paper.abstract, pass_level=1)
-        else:
-             paper.summary_pass_1 = paper.abstract
-        
-        await paper.insert()
-        log_fn(f"Saved: {paper.title[:30]}...")
-        
-        # Embeddings
-        embedding_text = f"{paper.title} {paper.abstract}"
-        embedding_vector = await ai_processor.get_embedding(embedding_text)
-        
-        async with AsyncSessionLocal() as session:
-            existing_embedding = await session.execute(
-                select(PaperEmbedding).where(PaperEmbedding.unique_id == unique_id)
-            )
-            if not existing_embedding.scalar_one_or_none():
-                session.add(PaperEmbedding(unique_id=unique_id, embedding=embedding_vector))
-                await session.commit()
-                
-        return True
-
-    async def generate_daily_digest(self, date: datetime = None) -> DailyDigest:
-        """Create a blog post from recent papers. If date provided, specific to that day."""
         if date:
             # Range: [date, date + 1 day)
             target_date = datetime(date.year, date.month, date.day)
@@ -133,10 +186,8 @@ class ResearchService:
             # Find papers published on this specific day
             papers = await Paper.find(Paper.published_date >= cutoff, Paper.published_date < end_date).to_list()
             
-            # Check for existing digest and delete if exists (regeneration)
-            existing = await self.get_digest_by_date(target_date)
-            if existing:
-                await existing.delete()
+            # Existing digest is replaced (regeneration), but only once the new one is written
+            existing = await self._find_digest(target_date)
                 
             digest_date = target_date
             
@@ -145,6 +196,7 @@ class ResearchService:
             cutoff = datetime.now() - timedelta(days=1)
             papers = await Paper.find(Paper.published_date >= cutoff).to_list()
             digest_date = datetime.now()
+            existing = None
 
         if not papers:
             # Fallback for demo ONLY if no date specified (legacy behavior)
@@ -156,61 +208,214 @@ class ResearchService:
         if not papers:
             return None
 
-        if not papers:
-            return None
+        # 1. Separate Content Types to ensure News isn't drowned out
+        # (no cap on the number of papers: big days are map-reduced, see generate_structured_digest)
+        news_items = [_digest_item(p) for p in papers if p.source != "arxiv"]
+        # Research arrives grouped by topic, so the LLM doesn't have to do the grouping
+        research_papers = await self._research_sections([p for p in papers if p.source == "arxiv"])
 
-        # Limit papers to avoid token overflow, though GPT-4o-mini has a large context window.
-        if len(papers) > 300:
-             papers = papers[:300]
+        # 2. Pass structured data to the processor (raises LLMCallFailed, leaving any old digest intact)
+        blog_content = await ai_processor.generate_structured_digest(news_items, research_papers, use_cache=use_cache)
 
-        # 1. Separate Content Types to ensure News isn't drowned out
-        news_items = []
-        research_papers = []
+        # The LLM may still skip items; list whatever the post doesn't link so every paper is covered
+        missing = [p for p in papers if p.pdf_url and p.pdf_url not in blog_content]
+        if missing:
+            blog_content += "\n\n## 📚 Also Today\n" + "\n".join(f"- [{p.title}]({p.pdf_url})" for p in missing)
         
-        for p in papers:
-            # RSS items often have shorter content but are high signal
-            content = p.summary_pass_1 or p.abstract or ""
-            
-            # Truncate slightly to be safe
-            if len(content) > 4000:
-                content = content[:4000] + "..."
-            
-            item_data = f"Title: {p.title}\nSource: {p.source}\nURL: {p.pdf_url}\nContent: {content}"
-            
-            if p.source == "arxiv":
-                research_papers.append(item_data)
-            else:
-                news_items.append(item_data)
+        try:
+            if existing:
+                await existing.delete()
 
-        # 2. Pass structured data to the processor
-        blog_content = await ai_processor.generate_structured_digest(news_items, research_papers)
-        
-        digest = DailyDigest(
-            date=digest_date,
-            markdown_content=blog_content,
-            paper_ids=[p.unique_id for p in papers]
-        )
-        await digest.insert()
+            digest = DailyDigest(
+                date=digest_date,
+                markdown_content=blog_content,
+                paper_ids=[p.unique_id for p in papers]
+            )
+            await digest.insert()
+        finally:
+            read_cache.invalidate(DIGESTS)
         return digest
 
-    async def search_papers(self, query: str, limit: int = 5) -> List[Paper]:
-        """Semantic search using Postgres pgvector."""
-        query_embedding = await ai_processor.get_embedding(query)
-        
-        async with AsyncSessionLocal() as session:
-            stmt = select(PaperEmbedding.unique_id).order_by(
-                PaperEmbedding.embedding.l2_distance(query_embedding)
-            ).limit(limit)
-            
-            result = await session.execute(stmt)
-            ids = result.scalars().all()
-            
-        papers = []
-        for uid in ids:
-            if p := await Paper.find_one(Paper.unique_id == uid):
-                papers.append(p)
-                
-        return papers
+    async def _research_sections(self, papers: List[Paper]) -> List[str]:
+        """
+        Research papers as topic sections for the digest prompt: clustered by their
+        stored embeddings (src/services/topic_clusters.py), each topic led by its
+        representative paper, near-duplicates folded into one entry. Falls back to
+        one item per paper when there are too few papers with vectors to cluster.
+        """
+        model_id = await active_model_id()
+        vectors = {}
+        if model_id and len(papers) >= settings.DIGEST_CLUSTER_MIN_PAPERS:
+            vectors = await get_vector_store().vectors([p.unique_id for p in papers], model_id)
+        embedded = [p for p in papers if p.unique_id in vectors]
+        if len(embedded) < settings.DIGEST_CLUSTER_MIN_PAPERS:
+            return [_digest_item(p) for p in papers]
+
+        clusters = await asyncio.to_thread(
+            cluster_papers,
+            embedded,
+            np.stack([vectors[p.unique_id] for p in embedded]),
+            max_topics=settings.DIGEST_MAX_TOPICS,
+            duplicate_similarity=settings.DIGEST_DUPLICATE_SIMILARITY
+        )
+        unembedded = [p for p in papers if p.unique_id not in vectors]
+        if unembedded:
+            clusters.append(TopicCluster("Other", unembedded, {}))
+
+        sections = []
+        for cluster in clusters:
+            items = []
+            for i, p in enumerate(cluster.papers):
+                # Only the representative keeps its full summary; the topic needs no more
+                item = _digest_item(p, settings.DIGEST_ITEM_MAX_CHARS if i == 0 else settings.DIGEST_MEMBER_MAX_CHARS)
+                if dups := cluster.duplicates.get(p.unique_id):
+                    item += "\nNear-duplicates: " + ", ".join(f"[{d.title}]({d.pdf_url})" for d in dups)
+                items.append(item)
+            # A topic too big for one digest chunk is split, keeping its header on every part
+            parts = pack_by_tokens(items, settings.DIGEST_CHUNK_TOKENS)
+            for n, part in enumerate(parts):
+                header = f"Topic: {cluster.label}" + (" (continued)" if n else f" ({len(cluster.papers)} papers, representative first)")
+                sections.append(header + "\n---\n" + "\n---\n".join(part))
+        return sections
+
+    async def search_papers(
+        self,
+        query: str,
+        limit: int = 5,
+        offset: int = 0,
+        sources: Optional[List[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        categories: Optional[List[str]] = None,
+        hydrate: bool = False,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None
+    ) -> List[SearchHit]:
+        """
+        Semantic search over the configured vector store (pgvector ANN index by default,
+        or the in-process numpy store, see src/db/vector_store.py), using the active
+        embedding model's vectors (see src/services/embedding_models.py).
+        Source/date/category filters are applied inside the same query as the ranking,
+        and hits carry their display fields, so a search is one Postgres round trip.
+        Pass hydrate=True to also attach the full Paper (one Mongo $in query).
+        Returns hits in ranking order; use limit/offset to page through results.
+        ef_search (HNSW) / probes (IVFFlat) trade latency for recall on this query only.
+        """
+        # Embed the query with the model that produced the stored vectors
+        model_id = await active_model_id()
+        if model_id is None:
+            return []
+        query_embedding = await ai_processor.get_query_embedding(query, model_id=model_id)
+
+        # Hits whose paper is gone from Mongo are dropped, so the page is cut from the
+        # filtered ranking (searching deeper if needed) rather than from the raw one
+        wanted = offset + limit
+        depth = wanted
+        while True:
+            hits = await get_vector_store().search(
+                query_embedding,
+                model_id,
+                limit=depth,
+                offset=0,
+                sources=sources,
+                start_date=start_date,
+                end_date=end_date,
+                categories=categories,
+                ef_search=ef_search,
+                probes=probes
+            )
+            # Rows embedded before the display columns existed still need Mongo
+            await _hydrate_hits([h for h in hits if h.title is None])
+            shown = [h for h in hits if h.title is not None]
+            if len(shown) >= wanted or len(hits) < depth:
+                break
+            depth *= 2
+
+        page = shown[offset:wanted]
+        if hydrate:
+            await _hydrate_hits([h for h in page if h.paper is None])
+        return page
+
+    async def keyword_search(
+        self,
+        query: str,
+        limit: int = 50,
+        sources: Optional[List[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        categories: Optional[List[str]] = None
+    ) -> List[dict]:
+        """
+        Full-text search over title/abstract/authors using the Mongo text index.
+        Returns light dicts (unique_id, title, source, published_date, pdf_url, score) best first.
+        """
+        match = _paper_filter(query, sources, start_date, end_date, categories)
+
+        pipeline = [
+            {"$match": match},
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+            {"$sort": {"score": -1}},
+            {"$limit": limit},
+            {"$project": {"_id": 0, "unique_id": 1, "title": 1, "source": 1, "published_date": 1, "pdf_url": 1, "score": 1}},
+        ]
+        return await Paper.aggregate(pipeline).to_list()
+
+    async def hybrid_search(
+        self,
+        query: str,
+        limit: int = 5,
+        offset: int = 0,
+        sources: Optional[List[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        categories: Optional[List[str]] = None,
+        hydrate: bool = False
+    ) -> List[SearchHit]:
+        """
+        Keyword + semantic search merged with reciprocal rank fusion.
+        Both searches run concurrently, so latency is that of the slower one
+        rather than the sum. Hit scores are the fused score scaled to [0, 1].
+        """
+        filters = {"sources": sources, "start_date": start_date, "end_date": end_date, "categories": categories}
+        depth = max(settings.HYBRID_CANDIDATES, limit + offset)
+        vector_hits, keyword_hits = await asyncio.gather(
+            self.search_papers(query, limit=depth, **filters),
+            self.keyword_search(query, limit=depth, **filters)
+        )
+
+        k = settings.HYBRID_RRF_K
+        fused: Dict[str, float] = {}
+        hits: Dict[str, SearchHit] = {}
+        for rank, hit in enumerate(vector_hits, start=1):
+            fused[hit.unique_id] = fused.get(hit.unique_id, 0.0) + 1 / (k + rank)
+            hits[hit.unique_id] = hit
+        for rank, doc in enumerate(keyword_hits, start=1):
+            fused[doc["unique_id"]] = fused.get(doc["unique_id"], 0.0) + 1 / (k + rank)
+            if doc["unique_id"] not in hits:
+                hits[doc["unique_id"]] = SearchHit(
+                    unique_id=doc["unique_id"],
+                    title=doc.get("title"),
+                    source=doc.get("source"),
+                    published_date=doc.get("published_date"),
+                    pdf_url=doc.get("pdf_url"),
+                    score=0.0
+                )
+
+        # Best possible fused score: ranked first by both searches
+        best = 2 / (k + 1)
+        ranked = sorted(fused, key=fused.get, reverse=True)[offset:offset + limit]
+        page = []
+        for uid in ranked:
+            hit = hits[uid]
+            hit.score = fused[uid] / best
+            page.append(hit)
+
+        if hydrate:
+            missing = [h.unique_id for h in page if h.paper is None]
+            papers = {p.unique_id: p for p in await Paper.find(In(Paper.unique_id, missing)).to_list()} if missing else {}
+            for hit in page:
+                hit.paper = hit.paper or papers.get(hit.unique_id)
+        return page
 
     async def analyze_paper(self, unique_id: str) -> Paper:
         """Perform Pass 2 analysis on a specific paper."""
@@ -220,6 +425,7 @@ class ResearchService:
             
         paper.summary_pass_2 = await ai_processor.generate_summary(paper.abstract, pass_level=2)
         await paper.save()
+        read_cache.invalidate(PAPERS)
         
         return paper
 
@@ -230,25 +436,43 @@ class ResearchService:
         if not annotation:
             annotation = UserAnnotation(unique_id=unique_id, is_bookmarked=True)
             await annotation.insert()
-            return True
         else:
             annotation.is_bookmarked = not annotation.is_bookmarked
             annotation.updated_at = datetime.utcnow()
             await annotation.save()
-            return annotation.is_bookmarked
+        read_cache.invalidate(ANNOTATIONS)
+        return annotation.is_bookmarked
 
     async def get_user_library(self) -> List[Paper]:
         """Fetch all bookmarked papers."""
-        annotations = await UserAnnotation.find(UserAnnotation.is_bookmarked == True).sort("-updated_at").to_list()
-        uids = [a.unique_id for a in annotations]
-        
-        # Papers logic: fetch all matching IDs using In operator
-        papers = await Paper.find(In(Paper.unique_id, uids)).to_list()
-        return papers
+        async def load() -> List[Paper]:
+            annotations = await UserAnnotation.find(UserAnnotation.is_bookmarked == True).sort("-updated_at").to_list()
+            uids = [a.unique_id for a in annotations]
+            
+            # Papers logic: fetch all matching IDs using In operator
+            papers = await Paper.find(In(Paper.unique_id, uids)).to_list()
+            return papers
+
+        return await read_cache.get_or_load((ANNOTATIONS, PAPERS), "library", load)
 
     async def get_bookmark_status(self, unique_id: str) -> bool:
         annotation = await UserAnnotation.find_one(UserAnnotation.unique_id == unique_id)
         return annotation.is_bookmarked if annotation else False
+
+    async def get_bookmark_statuses(self, unique_ids: List[str]) -> Dict[str, bool]:
+        """Bookmark status for many papers in one query. Ids without an annotation map to False."""
+        async def load() -> Dict[str, bool]:
+            statuses = {uid: False for uid in unique_ids}
+            if statuses:
+                annotations = await UserAnnotation.find(
+                    In(UserAnnotation.unique_id, list(statuses)), UserAnnotation.is_bookmarked == True
+                ).to_list()
+                for annotation in annotations:
+                    statuses[annotation.unique_id] = True
+            return statuses
+
+        statuses = await read_cache.get_or_load(ANNOTATIONS, ("bookmark_statuses", tuple(unique_ids)), load)
+        return dict(statuses)
     
     # ... (rest unchanged)
 
@@ -258,23 +482,89 @@ class ResearchService:
         start = datetime(date.year, date.month, date.day)
         end = start + timedelta(days=1)
         # Assuming published_date is a datetime object in Mongo
-        return await Paper.find(Paper.published_date >= start, Paper.published_date < end).sort("-published_date").to_list()
+        return await read_cache.get_or_load(
+            PAPERS, ("papers_by_date", start),
+            lambda: Paper.find(Paper.published_date >= start, Paper.published_date < end).sort("-published_date").to_list()
+        )
+
+    async def get_archive_page(
+        self,
+        text: Optional[str] = None,
+        sources: Optional[List[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = ARCHIVE_PAGE_SIZE
+    ) -> ArchivePage:
+        """
+        A page of the archive, newest first, with filters evaluated by Mongo and only
+        list-view fields loaded. Paginated by keyset on (published_date, _id): pass the
+        previous page's next_cursor to continue, so every page costs the same however deep.
+        """
+        match = _paper_filter(text, sources, start_date, end_date)
+        if cursor:
+            match = {"$and": [match, _decode_cursor(cursor)]} if match else _decode_cursor(cursor)
+        papers = await Paper.find(match).sort("-published_date", "-_id").limit(limit + 1).project(PaperListView).to_list()
+        next_cursor = _encode_cursor(papers[limit - 1]) if len(papers) > limit else None
+        return ArchivePage(papers=papers[:limit], next_cursor=next_cursor)
+
+    async def get_archive_facets(
+        self,
+        text: Optional[str] = None,
+        sources: Optional[List[str]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> ArchiveFacets:
+        """
+        Per-day and per-source paper counts for the archive overview, computed by a
+        single $facet aggregation and cached until papers are next inserted.
+        """
+        key = ("archive_facets", text, tuple(sources or ()), start_date, end_date)
 
-    async def get_all_papers_sorted(self) -> List[Paper]:
-        """Fetch all papers sorted by published_date descending."""
-        # For a large production app, we would paginate this.
-        # But for this personal researcher tool, fetching a few thousand headers is fine.
-        return await Paper.find_all().sort("-published_date").to_list()
+        async def load() -> ArchiveFacets:
+            days_pipeline = [
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$published_date"}},
+                    "count": {"$sum": 1}
+                }},
+                {"$sort": {"_id": -1}},
+                {"$project": {"_id": 0, "value": "$_id", "count": 1}},
+            ]
+            if sources:
+                days_pipeline.insert(0, {"$match": {"source": {"$in": sources}}})
+            pipeline = [
+                {"$match": _paper_filter(text, None, start_date, end_date)},
+                {"$facet": {
+                    "days": days_pipeline,
+                    "sources": [
+                        {"$group": {"_id": "$source", "count": {"$sum": 1}}},
+                        {"$sort": {"_id": 1}},
+                        {"$project": {"_id": 0, "value": "$_id", "count": 1}},
+                    ],
+                }},
+            ]
+            result = await Paper.aggregate(pipeline).to_list()
+            return ArchiveFacets(**result[0]) if result else ArchiveFacets()
 
-    async def get_digest_by_date(self, date: datetime) -> DailyDigest:
-        """Fetch digest for a specific date."""
+        return await read_cache.get_or_load(PAPERS, key, load)
+
+    async def _find_digest(self, date: datetime) -> Optional[DailyDigest]:
         # Because DailyDigest.date might not be exactly midnight, use range
         start = datetime(date.year, date.month, date.day)
         end = start + timedelta(days=1)
         return await DailyDigest.find_one(DailyDigest.date >= start, DailyDigest.date < end)
 
+    async def get_digest_by_date(self, date: datetime) -> DailyDigest:
+        """Fetch digest for a specific date."""
+        day = datetime(date.year, date.month, date.day)
+        return await read_cache.get_or_load(DIGESTS, ("digest_by_date", day), lambda: self._find_digest(day))
+
     async def get_latest_changelogs(self) -> Dict[str, List[Dict]]:
-        """Fetcher for the Changelog Tab."""
+        """Fetcher for the Changelog Tab. Scraped from external sites, so kept for CHANGELOG_CACHE_TTL."""
         from src.ingestion.changelog_client import ChangelogClient
-        client = ChangelogClient()
-        return await client.fetch_all()
+
+        async def load() -> Dict[str, List[Dict]]:
+            client = ChangelogClient()
+            return await client.fetch_all()
+
+        return await read_cache.get_or_load(CHANGELOGS, "latest", load, ttl=settings.CHANGELOG_CACHE_TTL)
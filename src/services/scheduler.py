@@ -0,0 +1,143 @@
+import asyncio
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from src.core.config import settings
+from src.db.models import DailyDigest, TaskRun
+from src.publish_digest import publish_digests
+from src.seed_db import seed_data
+from src.services.embedding_models import backfill_model
+from src.services.locks import held_lock, holder_name
+from src.services.research_service import ResearchService
+
+# Periodic maintenance run by src/scheduler.py instead of from the UI.
+#
+# Every run takes a Mongo lock named after what it writes (ingest and seed share
+# one), so overlapping runs are impossible even with several schedulers or a
+# manual run from the UI's job queue. Each run is recorded in task_runs with its
+# stats, duration and log tail; the UI reads those records, and a scheduler
+# decides what is due from them, so restarts don't re-run everything.
+
+LOG_TAIL = 200 # log lines kept on each TaskRun
+
+class Task(NamedTuple):
+    lock: str
+    run: Callable[..., Awaitable[dict]]
+    interval_minutes: Callable[[], int] # 0 = not scheduled (manual runs only)
+
+service = ResearchService()
+
+async def _ingest(log_fn) -> dict:
+    return await service.run_daily_ingestion(max_papers=settings.SCHEDULE_INGEST_MAX_PAPERS, on_progress=log_fn)
+
+async def _seed(log_fn) -> dict:
+    return await seed_data(days_back=settings.SEED_DAYS_BACK, log_fn=log_fn)
+
+async def _backfill(log_fn) -> dict:
+    complete = await backfill_model(max_batches=settings.SCHEDULE_BACKFILL_MAX_BATCHES, log_fn=log_fn)
+    return {"complete": complete}
+
+async def _digest(log_fn) -> dict:
+    """Yesterday's digest (UTC), once the day is over; skipped if it already exists."""
+    day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    if await DailyDigest.find_one(DailyDigest.date >= day, DailyDigest.date < day + timedelta(days=1)):
+        log_fn(f"Digest for {day:%Y-%m-%d} already exists.")
+        return {"date": f"{day:%Y-%m-%d}", "generated": False}
+    digest = await service.generate_daily_digest(day)
+    log_fn(f"Digest for {day:%Y-%m-%d}: " + (f"{len(digest.paper_ids)} papers." if digest else "no papers."))
+    return {"date": f"{day:%Y-%m-%d}", "generated": digest is not None, "papers": len(digest.paper_ids) if digest else 0}
+
+async def _publish(log_fn) -> dict:
+    return {"published": await publish_digests(log_fn=log_fn)}
+
+TASKS: Dict[str, Task] = {
+    "ingest": Task("ingestion", _ingest, lambda: settings.SCHEDULE_INGEST_MINUTES),
+    "seed": Task("ingestion", _seed, lambda: 0),
+    "backfill": Task("backfill", _backfill, lambda: settings.SCHEDULE_BACKFILL_MINUTES),
+    "digest": Task("digest", _digest, lambda: settings.SCHEDULE_DIGEST_MINUTES),
+    "publish": Task("publish", _publish, lambda: settings.SCHEDULE_PUBLISH_MINUTES),
+}
+
+class TaskBusy(Exception):
+    """Another process holds the task's lock."""
+
+async def run_task(name: str, log_fn=print) -> TaskRun:
+    """
+    Run one task under its lock and record it in task_runs.
+    Raises TaskBusy if the lock is held elsewhere; exceptions from the task
+    are recorded on the run and re-raised.
+    """
+    task = TASKS[name]
+    owner = holder_name()
+    async with held_lock(task.lock, owner, log_fn=log_fn) as lock:
+        if not lock.acquired:
+            raise TaskBusy(f"'{task.lock}' is locked by another run")
+
+        run = TaskRun(task=name, host=owner)
+        await run.insert()
+        tail = deque(maxlen=LOG_TAIL)
+
+        def log(msg):
+            tail.append(str(msg))
+            log_fn(f"[{name}] {msg}")
+
+        started = time.monotonic()
+        try:
+            run.stats = await task.run(log) or {}
+            run.status = "ok"
+        except BaseException as e:
+            run.status = "failed"
+            run.error = f"Lost the '{task.lock}' lock mid-run" if lock.lost else f"{type(e).__name__}: {e}"
+            tail.append(traceback.format_exc())
+            raise
+        finally:
+            run.finished_at = datetime.utcnow()
+            run.duration_seconds = round(time.monotonic() - started, 3)
+            run.log = list(tail)
+            await run.save()
+    return run
+
+async def latest_runs(tasks: Optional[List[str]] = None) -> Dict[str, TaskRun]:
+    """Most recent run of each task (one indexed lookup per task)."""
+    names = tasks or list(TASKS)
+    runs = await asyncio.gather(*(
+        TaskRun.find(TaskRun.task == name).sort("-started_at").first_or_none() for name in names
+    ))
+    return {name: run for name, run in zip(names, runs) if run}
+
+def _due(name: str, last: Optional[TaskRun]) -> bool:
+    interval = TASKS[name].interval_minutes()
+    if interval <= 0:
+        return False
+    return last is None or last.started_at <= datetime.utcnow() - timedelta(minutes=interval)
+
+async def run_scheduler(log_fn=print):
+    """Start every scheduled task whenever it is due, forever. A task never overlaps itself."""
+    running: Dict[str, asyncio.Task] = {}
+    scheduled = [name for name in TASKS if TASKS[name].interval_minutes() > 0]
+    log_fn("Scheduler started: " + ", ".join(f"{n} every {TASKS[n].interval_minutes()} min" for n in scheduled))
+
+    async def guarded(name: str):
+        try:
+            run = await run_task(name, log_fn=log_fn)
+            log_fn(f"[{name}] {run.status} in {run.duration_seconds:.1f}s: {run.stats}")
+        except TaskBusy as e:
+            log_fn(f"[{name}] skipped: {e}")
+        except Exception as e:
+            log_fn(f"[{name}] failed: {e}")
+
+    while True:
+        try:
+            last = await latest_runs(scheduled) if scheduled else {}
+            for name in scheduled:
+                if name in running and not running[name].done():
+                    continue
+                if _due(name, last.get(name)):
+                    running[name] = asyncio.create_task(guarded(name))
+        except Exception as e:
+            # e.g. Mongo unreachable; try again next tick
+            log_fn(f"Scheduler tick failed: {e}")
+        await asyncio.sleep(settings.SCHEDULER_TICK_SECONDS)
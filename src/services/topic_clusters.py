@@ -0,0 +1,161 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+# Topic clustering of a day's papers from their stored embeddings, so the
+# digest prompt gets research already grouped (and near-duplicates folded)
+# instead of asking the LLM to do it. Spherical k-means (cosine) with k-means++
+# seeding; k is chosen by the best silhouette score. Seeds are fixed, so the
+# same papers always give the same clusters (and the same digest cache key).
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9\-]{2,}")
+_STOPWORDS = {
+    "and", "are", "for", "from", "into", "its", "not", "of", "on", "the", "their", "this", "through",
+    "towards", "toward", "under", "using", "via", "when", "where", "which", "with", "without", "what",
+    "how", "why", "can", "does", "more", "than", "all", "any", "our", "new", "large", "models", "model",
+    "learning", "approach", "based", "study", "analysis", "method", "methods", "data", "paper", "beyond",
+}
+
+class TopicCluster(NamedTuple):
+    label: str
+    papers: List[object] # representative first, then by closeness to the topic
+    duplicates: Dict[str, List[object]] # unique_id of a kept paper -> near-duplicates folded into it
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def kmeans(X: np.ndarray, k: int, iterations: int = 50, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Spherical k-means over unit rows of X. Returns (labels, unit centroids).
+    Every step is a matrix product over all rows at once.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(X)
+    centroids = np.empty((k, X.shape[1]), dtype=X.dtype)
+    centroids[0] = X[rng.integers(n)]
+    # k-means++: later seeds are drawn in proportion to their distance from the chosen ones
+    distance = np.clip(1 - X @ centroids[0], 0, None)
+    for i in range(1, k):
+        total = distance.sum()
+        centroids[i] = X[rng.choice(n, p=distance / total) if total > 0 else rng.integers(n)]
+        distance = np.minimum(distance, np.clip(1 - X @ centroids[i], 0, None))
+
+    labels = None
+    for _ in range(iterations):
+        assigned = np.argmax(X @ centroids.T, axis=1)
+        if labels is not None and np.array_equal(assigned, labels):
+            break
+        labels = assigned
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, X)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        # An emptied cluster keeps its previous centroid
+        centroids = np.where(norms > 0, sums / np.where(norms == 0, 1, norms), centroids)
+    return labels, centroids
+
+def silhouette(distances: np.ndarray, labels: np.ndarray, k: int) -> float:
+    """Mean silhouette score for a precomputed distance matrix, vectorized over clusters."""
+    n = len(labels)
+    members = np.eye(k, dtype=distances.dtype)[labels]
+    counts = members.sum(axis=0)
+    totals = distances @ members # n x k: summed distance from each point to each cluster
+    rows = np.arange(n)
+    own = counts[labels]
+    a = totals[rows, labels] / np.maximum(own - 1, 1)
+    others = np.where(counts > 0, totals / np.maximum(counts, 1), np.inf)
+    others[rows, labels] = np.inf
+    b = others.min(axis=1)
+    # Identical points (a == b == 0) and points with no other cluster to
+    # compare against score 0 rather than nan
+    scale = np.maximum(a, b)
+    valid = (own > 1) & (scale > 0) & np.isfinite(b)
+    scores = np.divide(b - a, scale, out=np.zeros_like(scale), where=valid)
+    return float(scores.mean())
+
+def choose_clusters(X: np.ndarray, max_k: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    k-means for every k in 2..max_k, keeping the result with the best silhouette.
+    k never exceeds the number of distinct vectors; with fewer than two of
+    those everything is one cluster.
+    """
+    distinct = len(np.unique(X.round(6), axis=0))
+    top = min(max_k, len(X) - 1, distinct)
+    if top < 2:
+        return np.zeros(len(X), dtype=np.int64), _normalize(X.sum(axis=0, keepdims=True))
+    distances = np.clip(1 - X @ X.T, 0, None)
+    best = None
+    for k in range(2, top + 1):
+        labels, centroids = kmeans(X, k, seed=seed)
+        score = silhouette(distances, labels, k)
+        if best is None or score > best[0]:
+            best = (score, labels, centroids)
+    return best[1], best[2]
+
+def label_topics(titles: Sequence[str], labels: np.ndarray, k: int, words: int = 3) -> List[str]:
+    """
+    Name each cluster after the title words most specific to it: frequent in
+    the cluster, rare in the rest of the day (document frequency x IDF).
+    """
+    docs = [{w.lower() for w in _WORD.findall(t)} - _STOPWORDS for t in titles]
+    vocab = sorted(set().union(*docs))
+    if not vocab:
+        return [f"Topic {i + 1}" for i in range(k)]
+    column = {w: j for j, w in enumerate(vocab)}
+    presence = np.zeros((len(docs), len(vocab)), dtype=np.float32)
+    for i, doc in enumerate(docs):
+        presence[i, [column[w] for w in doc]] = 1
+
+    idf = np.log(len(docs) / (1 + presence.sum(axis=0))) + 1
+    members = np.eye(k, dtype=np.float32)[labels]
+    sizes = np.maximum(members.sum(axis=0), 1)[:, None]
+    scores = (members.T @ presence) / sizes * idf # k x vocab
+    # Show each word as it is most often written in the titles (keeps "LLM", "RL", ...)
+    spelling = Counter(w for t in titles for w in _WORD.findall(t))
+    shown = {}
+    for w, _ in spelling.most_common():
+        shown.setdefault(w.lower(), w)
+
+    names = []
+    for row in scores:
+        top = [vocab[j] for j in np.argsort(-row, kind="stable")[:words] if row[j] > 0]
+        names.append(" / ".join(shown[w][0].upper() + shown[w][1:] for w in top) or "Other")
+    return names
+
+def cluster_papers(
+    papers: Sequence[object],
+    vectors: np.ndarray,
+    max_topics: int = 12,
+    duplicate_similarity: float = 0.95,
+    seed: int = 0
+) -> List[TopicCluster]:
+    """
+    Group papers (anything with unique_id and title) by the rows of `vectors`.
+    Clusters come largest first; within one, the paper closest to the centroid
+    represents it, and papers at least `duplicate_similarity` (cosine) to a kept
+    one are folded into it as duplicates.
+    """
+    X = _normalize(np.asarray(vectors, dtype=np.float32))
+    labels, centroids = choose_clusters(X, max_k=max(2, min(max_topics, math.isqrt(len(papers)) + 1)), seed=seed)
+    names = label_topics([p.title for p in papers], labels, len(centroids))
+
+    clusters = []
+    for c in np.argsort(-np.bincount(labels, minlength=len(centroids)), kind="stable"):
+        members = np.flatnonzero(labels == c)
+        if not len(members):
+            continue
+        members = members[np.argsort(-(X[members] @ centroids[c]), kind="stable")]
+        kept, duplicates = [], {}
+        for i in members:
+            if kept:
+                similarity = X[kept] @ X[i]
+                j = int(np.argmax(similarity))
+                if similarity[j] >= duplicate_similarity:
+                    duplicates.setdefault(papers[kept[j]].unique_id, []).append(papers[i])
+                    continue
+            kept.append(i)
+        clusters.append(TopicCluster(names[c], [papers[i] for i in kept], duplicates))
+    return clusters
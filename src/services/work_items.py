@@ -0,0 +1,215 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from src.core.config import settings
+from src.db.bulk import find_existing_ids, insert_papers
+from src.db.models import Paper, WorkItem
+from src.db.mongo import get_collection
+from src.services.ingestion_pipeline import IngestionPipeline, embed_papers, persist_papers, summarize_paper
+from src.services.locks import holder_name
+
+# Distributed ingestion (INGEST_MODE=distributed).
+#
+# The coordinator is the ingest task: it fetches arXiv and RSS as usual, but
+# only queues the new items in work_items. Any number of src/ingest_worker.py
+# processes, on any host, lease batches of items with atomic find-and-modify,
+# run summarize -> embed -> persist on them and delete them once stored.
+# Workers keep no state: a worker that dies stops renewing its leases, and its
+# items are claimed by another worker once they expire. Persisting skips papers
+# that are already stored, so an item processed twice is stored once. An item
+# that keeps failing is stored as it is, flagged for retry_failed_items.
+
+_DONE = object()
+
+async def queue_items(items: List[dict]) -> int:
+    """
+    Queue the items that are neither stored nor already queued, and put failed
+    items that were fetched again back in the queue with fresh attempts.
+    Returns how many were queued.
+    """
+    existing = await find_existing_ids([item["unique_id"] for item in items])
+    fresh = {}
+    for item in items:
+        if item["unique_id"] not in existing:
+            fresh.setdefault(item["unique_id"], item)
+    if not fresh:
+        return 0
+    revived = await get_collection(WorkItem).update_many(
+        {"unique_id": {"$in": list(fresh)}, "status": "failed"},
+        {"$set": {"status": "queued", "attempts": 0, "error": None, "created_at": datetime.now(timezone.utc)}}
+    )
+    docs = [WorkItem(unique_id=uid, item=item) for uid, item in fresh.items()]
+    try:
+        await WorkItem.insert_many(docs, ordered=False)
+        return len(docs)
+    except BulkWriteError as e:
+        # Already queued (by an earlier run, or a concurrent coordinator), or just revived
+        errors = e.details.get("writeErrors", [])
+        if any(err.get("code") != 11000 for err in errors):
+            raise
+        return len(docs) - len(errors) + revived.modified_count
+
+async def queue_fetched_items(pipeline: IngestionPipeline, max_papers: int = 5, days_back: int = 2) -> int:
+    """Coordinator: fetch through the pipeline's producers and queue new items in batches."""
+    queue = asyncio.Queue(maxsize=settings.INGEST_QUEUE_SIZE)
+    queued = 0
+
+    async def consume():
+        nonlocal queued
+        finished = False
+        while not finished:
+            batch = [await queue.get()]
+            # Take whatever else is already waiting, up to one batch
+            while len(batch) < settings.INGEST_BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+            if _DONE in batch:
+                batch.remove(_DONE)
+                finished = True
+            if batch:
+                queued += await queue_items(batch)
+
+    consumer = asyncio.create_task(consume())
+    try:
+        await pipeline.fetch(queue, max_papers, days_back)
+        await queue.put(_DONE)
+        await consumer
+    finally:
+        consumer.cancel()
+    # Everything fetched is now stored or durably queued
+    await pipeline.save_feed_validators()
+
+    counts = await work_item_counts()
+    pipeline.log(f"Queued {queued} new items for ingest workers. Backlog: {counts.get('queued', 0)} queued, {counts.get('leased', 0)} leased.")
+    return queued
+
+async def work_item_counts() -> Dict[str, int]:
+    """Number of work items per status."""
+    rows = await WorkItem.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]).to_list()
+    return {row["_id"]: row["count"] for row in rows}
+
+# --- Worker side ---
+
+async def claim_items(owner: str, limit: int) -> List[WorkItem]:
+    """
+    Lease up to `limit` items, oldest first, that are queued or whose lease has
+    expired. Each claim is a single find-and-modify, so two workers can never
+    hold the same item.
+    """
+    now = datetime.now(timezone.utc)
+    claimed = []
+    for _ in range(limit):
+        doc = await get_collection(WorkItem).find_one_and_update(
+            {"$or": [
+                {"status": "queued"},
+                {"status": "leased", "lease_expires_at": {"$lt": now}},
+            ]},
+            {
+                "$set": {"status": "leased", "lease_owner": owner, "lease_expires_at": now + timedelta(seconds=settings.WORK_LEASE_SECONDS)},
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            break
+        claimed.append(WorkItem.model_validate(doc))
+    return claimed
+
+def _leased(owner: str, items: List[WorkItem]) -> dict:
+    # Only items still leased to us; an expired lease may have been re-claimed
+    return {"_id": {"$in": [item.id for item in items]}, "status": "leased", "lease_owner": owner}
+
+async def _renew(owner: str, items: List[WorkItem], log_fn=print):
+    while True:
+        await asyncio.sleep(settings.WORK_LEASE_SECONDS / 3)
+        try:
+            await get_collection(WorkItem).update_many(
+                _leased(owner, items),
+                {"$set": {"lease_expires_at": datetime.now(timezone.utc) + timedelta(seconds=settings.WORK_LEASE_SECONDS)}}
+            )
+        except Exception as e:
+            log_fn(f"[{owner}] renewing leases failed: {e}")
+
+async def _release(owner: str, items: List[WorkItem], error: str, log_fn=print):
+    """
+    Put failed items back in the queue. After WORK_MAX_ATTEMPTS an item's paper
+    is stored as it is with needs_retry, so retry_failed_items finishes it, and
+    the item is deleted; only an item that can't be stored at all is kept, as failed.
+    """
+    collection = get_collection(WorkItem)
+    unset = {"lease_owner": None, "lease_expires_at": None}
+    spent = [item for item in items if item.attempts >= settings.WORK_MAX_ATTEMPTS]
+    retry = [item for item in items if item.attempts < settings.WORK_MAX_ATTEMPTS]
+    if retry:
+        await collection.update_many(_leased(owner, retry), {"$set": {"status": "queued", "error": error, **unset}})
+    for item in spent:
+        try:
+            await insert_papers([Paper(**{**item.item, "needs_retry": True, "last_error": error})])
+        except Exception as e:
+            log_fn(f"[{owner}] {item.unique_id}: giving up, could not store it for retry: {e}")
+            await collection.update_many(_leased(owner, [item]), {"$set": {"status": "failed", "error": error, **unset}})
+        else:
+            await collection.delete_many(_leased(owner, [item]))
+
+async def process_items(items: List[WorkItem], log_fn=print) -> int:
+    """Summarize, embed and store the items' papers; returns how many were stored."""
+    stored = await find_existing_ids([item.unique_id for item in items])
+    papers = [Paper(**item.item) for item in items if item.unique_id not in stored]
+    papers = await asyncio.gather(*(summarize_paper(p) for p in papers))
+    inserted = await persist_papers(await embed_papers(list(papers)), log_fn=log_fn)
+    return len(inserted)
+
+async def _process(owner: str, items: List[WorkItem], log_fn) -> int:
+    try:
+        stored = await process_items(items, log_fn=log_fn)
+    except Exception as e:
+        if len(items) == 1:
+            log_fn(f"[{owner}] {items[0].unique_id}: failed (attempt {items[0].attempts}): {e}")
+            await _release(owner, items, str(e), log_fn)
+            return 0
+        # Find the bad item(s) instead of failing the whole batch
+        log_fn(f"[{owner}] batch of {len(items)} failed, retrying items one by one: {e}")
+        results = [await _process(owner, [item], log_fn) for item in items]
+        return sum(results)
+    await get_collection(WorkItem).delete_many(_leased(owner, items))
+    return stored
+
+async def run_ingest_worker(
+    concurrency: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    poll_interval: Optional[float] = None,
+    log_fn=print
+):
+    """Lease and process work items forever, `concurrency` batches at a time."""
+    owner = holder_name()
+    concurrency = concurrency or settings.INGEST_WORKER_CONCURRENCY
+    batch_size = batch_size or settings.INGEST_WORKER_BATCH_SIZE
+    poll_interval = settings.INGEST_WORKER_POLL_INTERVAL if poll_interval is None else poll_interval
+
+    async def slot():
+        while True:
+            try:
+                items = await claim_items(owner, batch_size)
+                if not items:
+                    await asyncio.sleep(poll_interval)
+                    continue
+                started = time.monotonic()
+                renewer = asyncio.create_task(_renew(owner, items, log_fn))
+                try:
+                    stored = await _process(owner, items, log_fn)
+                finally:
+                    renewer.cancel()
+                elapsed = time.monotonic() - started
+                log_fn(f"[{owner}] {len(items)} items, {stored} stored in {elapsed:.1f}s ({len(items) / elapsed:.1f}/s)")
+            except Exception as e:
+                # e.g. Mongo unreachable; unfinished items are re-claimed once their leases expire
+                log_fn(f"[{owner}] ingest slot error: {e}")
+                await asyncio.sleep(max(poll_interval, 1.0) * 5)
+
+    log_fn(f"Ingest worker {owner}: {concurrency} slots of {batch_size} items.")
+    await asyncio.gather(*(slot() for _ in range(concurrency)))
@@ -1,16 +1,20 @@
 import streamlit as st
 import datetime
+from src.core.config import settings
+from src.services.jobs import analyze_key
+
+CATEGORY_LABELS = {
+    "cs.AI": "Artificial Intelligence",
+    "cs.LG": "Machine Learning",
+    "cs.CL": "Computation & Language (NLP)",
+    "cs.CV": "Computer Vision",
+    "cs.RO": "Robotics",
+    "blog": "Industry & Blogs",
+    "industry": "Industry & Blogs"
+}
 
 def group_papers_by_category(papers):
-    category_map = {
-        "cs.AI": "Artificial Intelligence",
-        "cs.LG": "Machine Learning",
-        "cs.CL": "Computation & Language (NLP)",
-        "cs.CV": "Computer Vision",
-        "cs.RO": "Robotics",
-        "blog": "Industry & Blogs",
-        "industry": "Industry & Blogs"
-    }
+    category_map = CATEGORY_LABELS
     grouped = {}
     for p in papers:
         primary_cat = "Other"
@@ -25,9 +29,42 @@ def group_papers_by_category(papers):
         grouped[primary_cat].append(p)
     return grouped
 
-def render_paper_card(p, run_async_fn, bookmark_wrapper, toggle_bm_wrapper, analyze_wrapper):
+@st.fragment(run_every=settings.JOB_STATUS_POLL_SECONDS)
+def render_job_status(job_key, label, run_async_fn, get_job_wrapper):
+    """
+    Poll a queued/running background job. Once it finishes, rerun the app so the
+    caller renders the result; a failure is kept in session state for the caller to show.
+    """
+    job = run_async_fn(get_job_wrapper(job_key))
+    if job is None or not job.active:
+        if job is not None and job.status == "failed":
+            st.session_state.setdefault("job_errors", {})[job_key] = job.error
+        st.rerun()
+    st.caption(f"⏳ {label} {job.status}...")
+
+def pop_job_error(job_key):
+    return st.session_state.get("job_errors", {}).pop(job_key, None)
+
+def render_task_run(run, label):
+    """Summary line and log of a scheduler task run (src/services/scheduler.py)."""
+    when = run.started_at.strftime('%Y-%m-%d %H:%M')
+    if run.status == "running":
+        st.caption(f"{label}: running since {when} UTC")
+    else:
+        st.caption(f"{label}: {run.status} at {when} UTC ({run.duration_seconds:.0f}s)")
+    if run.error:
+        st.error(run.error)
+    if run.log:
+        with st.expander("Run log"):
+            st.code("\n".join(run.log), language=None)
+
+def render_paper_card(p, is_bookmarked, analysis_job, run_async_fn, toggle_bm_wrapper, enqueue_analysis_wrapper, get_job_wrapper):
     """
     Renders a single paper card.
+    is_bookmarked and analysis_job (queued/running Deep Analyze job, or None) are looked up
+    by the caller for the whole page (one query each, not one per card).
+    Must be called inside an st.fragment: actions rerun only that fragment.
+    The abstract and analysis are only built once the card's details are opened.
     Requires async wrappers to be passed in since Streamlit doesn't support async naturally in widgets.
     """
     with st.container(border=True):
@@ -43,27 +80,35 @@ def render_paper_card(p, run_async_fn, bookmark_wrapper, toggle_bm_wrapper, anal
         
         with c2:
             # Bookmark Toggle
-            is_bookmarked = run_async_fn(bookmark_wrapper(p.unique_id))
             icon = "❤️" if is_bookmarked else "🤍"
             if st.button(icon, key=f"bk_{p.unique_id}", help="Toggle Bookmark"):
                 run_async_fn(toggle_bm_wrapper(p.unique_id))
-                st.rerun()
+                st.rerun(scope="fragment")
 
         st.caption(f"**Authors:** {', '.join(p.authors)} | **Published:** {p.published_date.strftime('%Y-%m-%d')}")
         if p.categories:
             st.caption(f"*Tags: {', '.join(p.categories)}*")
         
-        with st.expander("Abstract & Analysis", expanded=False):
+        if st.toggle("Abstract & Analysis", key=f"details_{p.unique_id}"):
             st.markdown(f"**Abstract:** {p.abstract}", unsafe_allow_html=True)
             if p.summary_pass_1:
                 st.info(f"**AI Summary (Pass 1):**\n{p.summary_pass_1}")
             
             if p.summary_pass_2:
                 st.success(f"**Deep Analysis (Pass 2):**\n{p.summary_pass_2}")
+            elif analysis_job:
+                render_job_status(analysis_job.key, "Deep analysis", run_async_fn, get_job_wrapper)
             else:
+                error = pop_job_error(analyze_key(p.unique_id))
+                if error:
+                    st.error(f"Analysis failed, please try again later: {error}")
                 if st.button(f"Deep Analyze", key=f"analyze_{p.unique_id}"):
-                    with st.spinner("Analyzing..."):
-                        run_async_fn(analyze_wrapper(p.unique_id))
-                        st.rerun()
+                    # Queued for the worker; clicking again joins the same job
+                    try:
+                        run_async_fn(enqueue_analysis_wrapper(p.unique_id))
+                    except Exception as e:
+                        st.error(f"Could not queue analysis: {e}")
+                    else:
+                        st.rerun(scope="fragment")
 
         st.markdown(f"[Read Full Article]({p.pdf_url})")
@@ -1,37 +1,50 @@
 import streamlit as st
 import datetime
+from src.core.runtime import run_async
+from src.services.jobs import analyze_key, digest_key, task_key
 from src.ui.wrappers import (
-    run_async, main_ingestion_wrapper, get_feeds_wrapper, delete_feed_wrapper, add_feed_wrapper, 
-    seed_data_wrapper, get_papers_by_date_wrapper, get_library_wrapper, toggle_bookmark_wrapper,
-    search_wrapper, get_digest_by_date_wrapper, digest_wrapper, get_all_papers_wrapper, get_changelogs_wrapper,
-    get_bookmark_status_wrapper, analyze_wrapper
+    get_feeds_wrapper, delete_feed_wrapper, add_feed_wrapper,
+    get_papers_by_date_wrapper, get_library_wrapper, toggle_bookmark_wrapper,
+    search_wrapper, hybrid_search_wrapper, get_digest_by_date_wrapper, get_changelogs_wrapper,
+    get_archive_page_wrapper, get_archive_facets_wrapper, clear_read_cache,
+    get_bookmark_statuses_wrapper, get_latest_runs_wrapper, enqueue_task_wrapper,
+    enqueue_analysis_wrapper, enqueue_digest_wrapper, get_active_jobs_wrapper, get_job_wrapper
+)
+from src.ui.components import (
+    CATEGORY_LABELS, group_papers_by_category, render_paper_card, render_job_status, pop_job_error, render_task_run
 )
-from src.ui.components import group_papers_by_category, render_paper_card
 
 def render_sidebar():
     with st.sidebar:
         st.header("Controls")
-        if st.button("Fetch Latest Papers"):
-            status_container = st.status("Ingesting data...", expanded=True)
-            
-            def update_status(msg):
-                status_container.write(msg)
-                
-            try:
-                stats = run_async(main_ingestion_wrapper(max_papers=5, on_progress=update_status))
-                status_container.update(label="Ingestion Complete!", state="complete", expanded=False)
-                
+        # Ingestion runs in the scheduler/worker processes; the sidebar only reads their run records
+        try:
+            runs = run_async(get_latest_runs_wrapper(["ingest", "seed"]))
+            pending = run_async(get_active_jobs_wrapper([task_key("ingest"), task_key("seed")]))
+        except Exception as e:
+            st.error(f"Error loading ingestion status: {e}")
+            runs, pending = {}, {}
+
+        error = pop_job_error(task_key("ingest"))
+        if error:
+            st.error(f"Ingestion failed: {error}")
+        if task_key("ingest") in pending:
+            render_job_status(task_key("ingest"), "Ingestion", run_async, get_job_wrapper)
+        elif st.button("Fetch Latest Papers"):
+            run_async(enqueue_task_wrapper("ingest"))
+            st.rerun()
+
+        last = runs.get("ingest")
+        if last:
+            render_task_run(last, "Last ingestion")
+            if last.status == "ok":
                 # Show Source Report
                 st.subheader("Daily Source Report")
-                for source, count in stats.items():
+                for source, count in last.stats.items():
                     if count > 0:
                         st.success(f"**{source.upper()}**: {count} new items")
                     else:
                         st.caption(f"{source}: 0 items")
-                        
-            except Exception as e:
-                status_container.update(label="Ingestion Failed", state="error")
-                st.error(f"Error: {e}")
 
         st.divider()
         
@@ -72,24 +85,23 @@ def render_sidebar():
         
         with st.expander("Admin & Settings"):
             st.markdown("**Database Management**")
-            if st.button("Reseed Database (Past 30 Days)", help="Fetches historical data from Arxiv and all Configured RSS Feeds"):
-                status_box = st.status("Reseeding database... this may take a minute.", expanded=True)
-                
-                def log_to_ui(msg):
-                    status_box.write(msg)
-                    
-                try:
-                    stats = run_async(seed_data_wrapper(log_to_ui))
-                    status_box.update(label="Reseeding Complete!", state="complete", expanded=False)
-                    
-                    st.success(f"Reseed Finished!\n\n"
-                               f"**ArXiv**: {stats['arxiv_new']} new ({stats['arxiv_skipped']} skipped)\n\n"
+            error = pop_job_error(task_key("seed"))
+            if error:
+                st.error(f"Reseeding failed: {error}")
+            if task_key("seed") in pending:
+                render_job_status(task_key("seed"), "Reseeding", run_async, get_job_wrapper)
+            elif st.button("Reseed Database (Past 30 Days)", help="Fetches historical data from Arxiv and all Configured RSS Feeds"):
+                run_async(enqueue_task_wrapper("seed"))
+                st.rerun()
+
+            last_seed = runs.get("seed")
+            if last_seed:
+                render_task_run(last_seed, "Last reseed")
+                if last_seed.status == "ok":
+                    stats = last_seed.stats
+                    st.success(f"**ArXiv**: {stats['arxiv_new']} new ({stats['arxiv_skipped']} skipped)\n\n"
                                f"**RSS**: {stats['rss_new']} new ({stats['rss_skipped']} skipped)\n\n"
                                f"**Embeddings Created**: {stats['embeddings_created']}")
-                               
-                except Exception as e:
-                    status_box.update(label="Reseeding Failed", state="error")
-                    st.error(f"Error: {e}")
 
 def render_feed_tab():
     col1, col2 = st.columns([3, 1])
@@ -99,10 +111,12 @@ def render_feed_tab():
         selected_date = st.date_input("Filter by Date", datetime.date.today())
         
     if st.button("Refresh Feed", key="refresh_feed"):
+        clear_read_cache()
         st.rerun()
 
+    day = datetime.datetime.combine(selected_date, datetime.time.min)
     try:
-        papers = run_async(get_papers_by_date_wrapper(datetime.datetime.combine(selected_date, datetime.time.min)))
+        papers = run_async(get_papers_by_date_wrapper(day))
     except Exception as e:
         st.error(f"Error loading papers: {e}")
         papers = []
@@ -113,15 +127,59 @@ def render_feed_tab():
     if not papers:
         st.info("No papers found for this date.")
 
-    for cat in sorted_cats:
-        st.markdown(f"### 📂 {cat}")
-        for p in grouped_papers[cat]:
-            render_paper_card(p, run_async, get_bookmark_status_wrapper, toggle_bookmark_wrapper, analyze_wrapper)
+    # Only opened categories build their cards, a page at a time
+    for i, cat in enumerate(sorted_cats):
+        if st.toggle(f"📂 **{cat}** ({len(grouped_papers[cat])})", value=i == 0, key=f"feed_open_{cat}"):
+            render_feed_category(day, cat)
         st.divider()
 
+FEED_PAGE_SIZE = 10
+
+@st.fragment
+def render_feed_category(day, category):
+    """
+    One page of a feed category. Paging, bookmarking and analysis only rerun this
+    fragment; papers and bookmark statuses come from the read cache, which those
+    actions invalidate, so the fragment sees their effect without a full rerun.
+    """
+    try:
+        papers = group_papers_by_category(run_async(get_papers_by_date_wrapper(day))).get(category, [])
+    except Exception as e:
+        st.error(f"Error loading papers: {e}")
+        return
+
+    page_key = f"feed_page_{day.date()}_{category}"
+    pages = max(1, -(-len(papers) // FEED_PAGE_SIZE))
+    page = min(st.session_state.get(page_key, 0), pages - 1)
+    page_papers = papers[page * FEED_PAGE_SIZE:(page + 1) * FEED_PAGE_SIZE]
+
+    try:
+        bookmarks = run_async(get_bookmark_statuses_wrapper([p.unique_id for p in page_papers]))
+        jobs = run_async(get_active_jobs_wrapper([analyze_key(p.unique_id) for p in page_papers]))
+    except Exception as e:
+        st.error(f"Error loading bookmarks: {e}")
+        bookmarks, jobs = {}, {}
+
+    for p in page_papers:
+        render_paper_card(
+            p, bookmarks.get(p.unique_id, False), jobs.get(analyze_key(p.unique_id)),
+            run_async, toggle_bookmark_wrapper, enqueue_analysis_wrapper, get_job_wrapper
+        )
+
+    if pages > 1:
+        c_prev, c_page, c_next = st.columns([1, 2, 1])
+        if c_prev.button("← Previous", disabled=page == 0, key=f"{page_key}_prev"):
+            st.session_state[page_key] = page - 1
+            st.rerun(scope="fragment")
+        c_page.caption(f"Page {page + 1} of {pages}")
+        if c_next.button("Next →", disabled=page == pages - 1, key=f"{page_key}_next"):
+            st.session_state[page_key] = page + 1
+            st.rerun(scope="fragment")
+
 def render_library_tab():
     st.subheader("My Library (Bookmarked Papers)")
     if st.button("Refresh Library"):
+        clear_read_cache()
         st.rerun()
         
     try:
@@ -139,22 +197,68 @@ def render_library_tab():
     except Exception as e:
         st.error(f"Error loading library: {e}")
 
+SEARCH_PAGE_SIZE = 5
+
 def render_search_tab():
     st.subheader("Semantic Search")
     query = st.text_input("Enter your research question:")
+
+    with st.expander("Filters"):
+        f1, f2, f3 = st.columns(3)
+        with f1:
+            try:
+                source_options = ["arxiv"] + [f.name for f in run_async(get_feeds_wrapper())]
+            except Exception:
+                source_options = ["arxiv"]
+            sources = st.multiselect("Source", options=source_options, placeholder="All Sources")
+        with f2:
+            categories = st.multiselect("Category", options=list(CATEGORY_LABELS.keys()),
+                                        format_func=lambda c: f"{c} ({CATEGORY_LABELS[c]})", placeholder="All Categories")
+        with f3:
+            date_range = st.date_input("Published between", value=(), key="search_dates")
+        show_summaries = st.checkbox("Show summaries", value=False, help="Loads full papers from MongoDB")
+        hybrid = st.checkbox("Match keywords too", value=True,
+                             help="Combine semantic search with exact keyword matches (model names, acronyms, authors)")
+
+    filters = {"sources": sources or None, "categories": categories or None, "hydrate": show_summaries}
+    if len(date_range) == 2:
+        filters["start_date"] = datetime.datetime.combine(date_range[0], datetime.time.min)
+        filters["end_date"] = datetime.datetime.combine(date_range[1], datetime.time.min) + datetime.timedelta(days=1)
+
+    # Reset to the first page whenever the query or filters change
+    search_key = (query, tuple(sources), tuple(categories), tuple(date_range), hybrid)
+    if st.session_state.get("search_key") != search_key:
+        st.session_state["search_key"] = search_key
+        st.session_state["search_page"] = 0
+    page = st.session_state.get("search_page", 0)
+
     if query:
         with st.spinner("Searching vector database..."):
             try:
-                results = run_async(search_wrapper(query))
+                search_fn = hybrid_search_wrapper if hybrid else search_wrapper
+                results = run_async(search_fn(query, limit=SEARCH_PAGE_SIZE, offset=page * SEARCH_PAGE_SIZE, **filters))
                 if not results:
                     st.warning("No relevant papers found.")
                 else:
-                    for p in results:
-                        with st.expander(f"{p.title} (Score: High)"):
-                            st.markdown(p.summary_pass_1 or p.abstract, unsafe_allow_html=True)
-                            st.markdown(f"[PDF]({p.pdf_url})")
+                    for hit in results:
+                        published = hit.published_date.strftime('%Y-%m-%d') if hit.published_date else "n/a"
+                        with st.container(border=True):
+                            st.markdown(f"**[{(hit.source or '').upper()}]** [{hit.title}]({hit.pdf_url})")
+                            st.caption(f"Published: {published} | Score: {hit.score:.2f}")
+                            if hit.paper:
+                                st.markdown(hit.paper.summary_pass_1 or hit.paper.abstract, unsafe_allow_html=True)
             except Exception as e:
                 st.error(f"Search failed: {e}")
+                results = []
+
+        c_prev, c_page, c_next = st.columns([1, 2, 1])
+        if c_prev.button("← Previous", disabled=page == 0, key="search_prev"):
+            st.session_state["search_page"] = page - 1
+            st.rerun()
+        c_page.caption(f"Page {page + 1}")
+        if c_next.button("Next →", disabled=len(results) < SEARCH_PAGE_SIZE, key="search_next"):
+            st.session_state["search_page"] = page + 1
+            st.rerun()
 
 def render_digest_tab():
     c1, c2 = st.columns([3, 1])
@@ -166,6 +270,11 @@ def render_digest_tab():
     try:
         digest_dt = datetime.datetime.combine(digest_date, datetime.time.min)
         existing_digest = run_async(get_digest_by_date_wrapper(digest_dt))
+        job_key = digest_key(digest_dt)
+        pending_job = run_async(get_active_jobs_wrapper([job_key])).get(job_key)
+        error = pop_job_error(job_key)
+        if error:
+            st.warning(f"Could not generate digest: {error}")
         
         if existing_digest:
             st.markdown(existing_digest.markdown_content)
@@ -179,20 +288,21 @@ def render_digest_tab():
                     mime="text/markdown"
                 )
             with col_regen:
-                if st.button("🔄 Regenerate Digest", help="Re-create digest for this date"):
-                    with st.spinner("Regenerating digest..."):
-                        new_digest = run_async(digest_wrapper(digest_dt))
-                        st.rerun()
+                if pending_job:
+                    render_job_status(job_key, "Regenerating digest:", run_async, get_job_wrapper)
+                elif st.button("🔄 Regenerate Digest", help="Re-create digest for this date"):
+                    # Bypass the LLM cache, which would return the same post for the same papers
+                    run_async(enqueue_digest_wrapper(digest_dt, regenerate=True))
+                    st.rerun()
 
         else:
             st.info(f"No digest found for {digest_date}.")
-            if st.button(f"Generate Digest for {digest_date}"):
-                with st.spinner("Writing blog post..."):
-                    new_digest = run_async(digest_wrapper(digest_dt))
-                    if new_digest:
-                        st.rerun()
-                    else:
-                        st.warning("Could not generate digest (no papers found for this date?)")
+            if pending_job:
+                render_job_status(job_key, "Writing blog post:", run_async, get_job_wrapper)
+            elif st.button(f"Generate Digest for {digest_date}"):
+                # Queued for the worker; the page returns at once and clicking again joins the same job
+                run_async(enqueue_digest_wrapper(digest_dt))
+                st.rerun()
 
     except Exception as e:
         st.error(f"Digest error: {e}")
@@ -203,88 +313,96 @@ def render_archive_tab():
         st.subheader("Research Archive")
     with c2:
         if st.button("Refresh Archive"):
+            clear_read_cache()
             st.rerun()
 
     # --- Filters ---
     with st.expander("Search & Filter", expanded=True):
-        col_search, col_filter = st.columns([2, 1])
+        col_search, col_filter, col_dates = st.columns([2, 1, 1])
         with col_search:
-            search_query = st.text_input("Search by title or author", placeholder="Type to search...")
-        with col_filter:
-            pass # placeholder
-            
-    with st.spinner("Loading archive..."):
-        try:
-            all_papers = run_async(get_all_papers_wrapper())
-            
-            if not all_papers:
-                st.info("No papers found in the archive.")
-            else:
-                unique_sources = sorted(list(set(p.source for p in all_papers)))
-                with col_filter:
-                    selected_sources = st.multiselect("Filter by Source", options=unique_sources, default=None, placeholder="All Sources")
-                
-                filtered_papers = []
-                for p in all_papers:
-                    if selected_sources and p.source not in selected_sources:
-                        continue
-                    if search_query:
-                        query = search_query.lower()
-                        in_title = query in p.title.lower()
-                        in_authors = any(query in a.lower() for a in p.authors)
-                        in_abstract = query in p.abstract.lower()
-                        if not (in_title or in_authors or in_abstract):
-                            continue
-                    filtered_papers.append(p)
-                
-                if not filtered_papers:
-                    st.info("No papers match your filters.")
-                else:
-                    st.caption(f"Showing {len(filtered_papers)} papers")
-                    
-                    archive_tree = {}
-                    for p in filtered_papers:
-                        d = p.published_date
-                        year = d.year
-                        month_name = d.strftime("%B")
-                        month_num = d.month
-                        day = d.day
-                        if year not in archive_tree: archive_tree[year] = {}
-                        if month_num not in archive_tree[year]: archive_tree[year][month_num] = {"name": month_name, "days": {}}
-                        if day not in archive_tree[year][month_num]["days"]: archive_tree[year][month_num]["days"][day] = []
-                        archive_tree[year][month_num]["days"][day].append(p)
-                    
-                    for year in sorted(archive_tree.keys(), reverse=True):
-                        default_expanded = (year == datetime.date.today().year) or (search_query != "")
-                        with st.expander(f"📅 **{year}** ({sum(len(d['days'][day]) for m in archive_tree[year] for d in [archive_tree[year][m]] for day in d['days'])})", expanded=default_expanded):
-                            months_data = archive_tree[year]
-                            for month_num in sorted(months_data.keys(), reverse=True):
-                                month_name = months_data[month_num]["name"]
-                                st.markdown(f"#### {month_name}")
-                                days_data = months_data[month_num]["days"]
-                                for day in sorted(days_data.keys(), reverse=True):
-                                    st.markdown(f"**{month_name} {day}**")
-                                    for p in days_data[day]:
-                                        with st.container(border=True):
-                                            c1, c2 = st.columns([5,1])
-                                            c1.markdown(f"**[{p.source.upper()}]** {p.title}")
-                                            meta_text = f"**{', '.join(p.authors)}**"
-                                            if p.categories:
-                                                meta_text += f" | *{', '.join(p.categories)}*"
-                                            c1.caption(meta_text)
-                                            if search_query:
-                                                 c1.markdown(f"_{p.abstract[:200]}..._")
-                                            c2.markdown(f"[Link]({p.pdf_url})")
-                                    st.divider()
+            search_query = st.text_input("Search by title, author or abstract", placeholder="Type to search...")
+        with col_dates:
+            date_range = st.date_input("Published between", value=(), key="archive_dates")
 
-        except Exception as e:
-            st.error(f"Error loading archive: {e}")
+    filters = {"text": search_query or None, "sources": st.session_state.get("archive_sources") or None}
+    if len(date_range) == 2:
+        filters["start_date"] = datetime.datetime.combine(date_range[0], datetime.time.min)
+        filters["end_date"] = datetime.datetime.combine(date_range[1], datetime.time.min) + datetime.timedelta(days=1)
+
+    # Overview counts only; a day's papers are loaded when it is opened
+    try:
+        facets = run_async(get_archive_facets_wrapper(**filters))
+    except Exception as e:
+        st.error(f"Error loading archive: {e}")
+        return
+
+    with col_filter:
+        source_options = sorted({f.value for f in facets.sources} | set(filters["sources"] or []))
+        st.multiselect("Filter by Source", options=source_options, placeholder="All Sources", key="archive_sources",
+                       format_func=lambda s: f"{s} ({next((f.count for f in facets.sources if f.value == s), 0)})")
+
+    if not facets.days:
+        st.info("No papers match your filters." if any(filters.values()) else "No papers found in the archive.")
+        return
+    st.caption(f"{facets.total} papers")
+
+    archive_tree = {}
+    for bucket in facets.days:
+        day = datetime.date.fromisoformat(bucket.value)
+        archive_tree.setdefault(day.year, {}).setdefault(day.month, []).append((day, bucket.count))
+
+    for year in sorted(archive_tree.keys(), reverse=True):
+        months = archive_tree[year]
+        year_count = sum(count for days in months.values() for _, count in days)
+        default_expanded = (year == datetime.date.today().year) or bool(search_query)
+        with st.expander(f"📅 **{year}** ({year_count})", expanded=default_expanded):
+            for month in sorted(months.keys(), reverse=True):
+                days = months[month]
+                month_name = days[0][0].strftime("%B")
+                if not st.toggle(f"**{month_name}** ({sum(count for _, count in days)})", key=f"archive_month_{year}_{month}"):
+                    continue
+                for day, count in days:
+                    if st.toggle(f"{month_name} {day.day} ({count})", key=f"archive_day_{day.isoformat()}"):
+                        _render_archive_day(day, filters)
+                st.divider()
+
+def _render_archive_day(day, filters):
+    """One day's papers, a page at a time (keyset cursors kept in session state)."""
+    cursors_key = f"archive_cursors_{day.isoformat()}_{filters['text']}_{filters['sources']}"
+    cursors = st.session_state.setdefault(cursors_key, [None])
+    start = datetime.datetime.combine(day, datetime.time.min)
+    day_filters = {**filters, "start_date": start, "end_date": start + datetime.timedelta(days=1)}
+    try:
+        page = run_async(get_archive_page_wrapper(cursor=cursors[-1], **day_filters))
+    except Exception as e:
+        st.error(f"Error loading papers: {e}")
+        return
+
+    for p in page.papers:
+        with st.container(border=True):
+            c1, c2 = st.columns([5,1])
+            c1.markdown(f"**[{p.source.upper()}]** {p.title}")
+            meta_text = f"**{', '.join(p.authors)}**"
+            if p.categories:
+                meta_text += f" | *{', '.join(p.categories)}*"
+            c1.caption(meta_text)
+            c2.markdown(f"[Link]({p.pdf_url})")
+
+    if len(cursors) > 1 or page.next_cursor:
+        c_prev, _, c_next = st.columns([1, 2, 1])
+        if c_prev.button("← Newer", disabled=len(cursors) == 1, key=f"archive_prev_{day.isoformat()}"):
+            cursors.pop()
+            st.rerun()
+        if c_next.button("Older →", disabled=page.next_cursor is None, key=f"archive_next_{day.isoformat()}"):
+            cursors.append(page.next_cursor)
+            st.rerun()
 
 def render_changelogs_tab():
     st.header("Software Update Tracker")
     st.info("Tracking updates from OpenAI, ChatGPT, and GitHub Copilot.")
     
     if st.button("Refresh Updates"):
+        clear_read_cache()
         st.rerun()
         
     try:
@@ -1,76 +1,100 @@
-import asyncio
-import datetime
 from src.db.mongo import init_mongo
 from src.db.postgres import init_postgres
 from src.db.models import Paper
+from src.db.read_cache import DIGESTS, PAPERS, read_cache
+from src.services.jobs import enqueue_analysis, enqueue_digest, enqueue_task, get_active_jobs, get_job
+from src.services.scheduler import latest_runs
 from src.services.research_service import ResearchService
 
 # Initialize Service
 service = ResearchService()
 
-# --- Async Helper ---
-def run_async(coro):
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    return loop.run_until_complete(coro)
+# --- Async Helpers ---
+# run_async (src/core/runtime.py) executes the wrappers on a shared background loop,
+# so connections and clients persist between reruns and widgets.
 
-# --- Core Wrappers ---
-async def main_ingestion_wrapper(max_papers=5, on_progress=None):
+async def init_databases():
+    # Both are no-ops after the first call
     await init_mongo()
     await init_postgres()
-    return await service.run_daily_ingestion(max_papers=max_papers, on_progress=on_progress)
 
+# --- Core Wrappers ---
 async def get_recent_papers_wrapper():
-    await init_mongo()
-    await init_postgres()
+    await init_databases()
     return await Paper.find_all().sort("-published_date").limit(20).to_list()
 
-async def search_wrapper(query: str):
+async def search_wrapper(query: str, limit: int = 5, offset: int = 0, **filters):
+    await init_databases()
+    return await service.search_papers(query, limit=limit, offset=offset, **filters)
+
+async def hybrid_search_wrapper(query: str, limit: int = 5, offset: int = 0, **filters):
+    await init_databases()
+    return await service.hybrid_search(query, limit=limit, offset=offset, **filters)
+
+# --- Background Jobs (run by src/worker.py) ---
+async def enqueue_digest_wrapper(date, regenerate: bool = False):
     await init_mongo()
-    await init_postgres()
-    return await service.search_papers(query, limit=5)
+    return await enqueue_digest(date, regenerate=regenerate)
 
-async def digest_wrapper(date=None):
+async def enqueue_analysis_wrapper(arxiv_id: str):
     await init_mongo()
-    await init_postgres()
-    return await service.generate_daily_digest(date)
+    return await enqueue_analysis(arxiv_id)
 
-async def analyze_wrapper(arxiv_id: str):
+async def get_active_jobs_wrapper(keys):
     await init_mongo()
-    await init_postgres()
-    return await service.analyze_paper(arxiv_id)
+    return await get_active_jobs(keys)
 
-async def toggle_bookmark_wrapper(arxiv_id: str):
+async def get_job_wrapper(key: str):
     await init_mongo()
-    await init_postgres()
+    job = await get_job(key)
+    if job and not job.active:
+        # The worker wrote the result from another process; don't serve the cached copy
+        read_cache.invalidate(DIGESTS if job.kind == "digest" else PAPERS)
+    return job
+
+async def enqueue_task_wrapper(name: str):
+    await init_mongo()
+    return await enqueue_task(name)
+
+async def get_latest_runs_wrapper(tasks):
+    await init_mongo()
+    return await latest_runs(tasks)
+
+async def toggle_bookmark_wrapper(arxiv_id: str):
+    await init_databases()
     return await service.toggle_bookmark(arxiv_id)
 
 async def get_library_wrapper():
-    await init_mongo()
-    await init_postgres()
+    await init_databases()
     return await service.get_user_library()
 
 async def get_bookmark_status_wrapper(arxiv_id: str):
-    await init_mongo()
-    await init_postgres()
+    await init_databases()
     return await service.get_bookmark_status(arxiv_id)
 
+async def get_bookmark_statuses_wrapper(arxiv_ids):
+    await init_databases()
+    return await service.get_bookmark_statuses(arxiv_ids)
+
 async def get_papers_by_date_wrapper(date):
-    await init_mongo()
-    await init_postgres()
+    await init_databases()
     return await service.get_papers_by_date(date)
 
 async def get_digest_by_date_wrapper(date):
-    await init_mongo()
-    await init_postgres()
+    await init_databases()
     return await service.get_digest_by_date(date)
 
-async def get_all_papers_wrapper():
+async def get_archive_page_wrapper(cursor=None, **filters):
     await init_mongo()
-    return await service.get_all_papers_sorted()
+    return await service.get_archive_page(cursor=cursor, **filters)
+
+async def get_archive_facets_wrapper(**filters):
+    await init_mongo()
+    return await service.get_archive_facets(**filters)
+
+def clear_read_cache():
+    # Refresh buttons: also pick up writes made by other processes before the TTL runs out
+    read_cache.clear()
 
 # --- RSS Wrappers ---
 async def get_feeds_wrapper():
@@ -85,10 +109,6 @@ async def delete_feed_wrapper(name):
     await init_mongo()
     await service.delete_rss_feed(name)
 
-from src.seed_db import seed_data
-async def seed_data_wrapper(log_fn):
-    return await seed_data(days_back=30, log_fn=log_fn)
-
 async def get_changelogs_wrapper():
     await init_mongo()
     return await service.get_latest_changelogs()
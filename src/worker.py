@@ -0,0 +1,29 @@
+import argparse
+import asyncio
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.db.mongo import init_mongo
+from src.db.postgres import init_postgres
+from src.services.jobs import run_worker
+
+async def worker(concurrency: int):
+    print("Initializing databases...")
+    await init_mongo()
+    await init_postgres()
+    await run_worker(concurrency=concurrency)
+
+if __name__ == "__main__":
+    # Runs the jobs queued by the UI (Deep Analyze, digest generation).
+    # Start as many as you like; each job is claimed by exactly one worker.
+    parser = argparse.ArgumentParser(description="Run queued background jobs.")
+    parser.add_argument("--concurrency", type=int, default=None, help="jobs run at once (default: JOB_WORKER_CONCURRENCY)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(worker(args.concurrency))
+    except KeyboardInterrupt:
+        # Jobs interrupted here are re-queued once JOB_STALE_AFTER has passed
+        print("Worker stopped.")
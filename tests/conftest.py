@@ -0,0 +1,15 @@
+import pytest
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from src.db import mongo
+from src.db.models import Job, Paper, WorkItem
+
+@pytest.fixture
+async def db(monkeypatch):
+    """A fresh in-memory Mongo with the queue collections, standing in for init_mongo()."""
+    client = AsyncMongoMockClient()
+    # get_collection() goes through the module client for atomic find-and-modify
+    monkeypatch.setattr(mongo, "_client", client)
+    await init_beanie(database=client.researcher, document_models=[Job, Paper, WorkItem])
+    return client.researcher
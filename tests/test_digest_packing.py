@@ -0,0 +1,33 @@
+from src.ai.processor import pack_by_tokens
+
+def _words(sizes):
+    # estimate_tokens counts ~4 characters per token
+    return [f"{i}:" + "x" * (4 * size - len(f"{i}:")) for i, size in enumerate(sizes)]
+
+def test_every_item_once_in_order():
+    items = _words([30, 50, 20, 80, 10, 40, 60])
+    groups = pack_by_tokens(items, budget=100)
+    assert [item for group in groups for item in group] == items
+
+def test_groups_respect_budget():
+    groups = pack_by_tokens(_words([30, 50, 20, 80, 10, 40, 60]), budget=100)
+    assert all(sum(len(item) // 4 for item in group) <= 100 for group in groups)
+    assert len(groups) == 3
+
+def test_oversized_item_gets_its_own_group():
+    items = _words([10, 500, 10])
+    assert pack_by_tokens(items, budget=100) == [[items[0]], [items[1]], [items[2]]]
+
+def test_min_size_pairs_items():
+    items = _words([90, 90, 90, 90, 90])
+    groups = pack_by_tokens(items, budget=100, min_size=2)
+    assert all(len(group) >= 2 for group in groups[:-1])
+    assert [item for group in groups for item in group] == items
+
+def test_text_key():
+    items = [{"text": t} for t in _words([60, 60, 60])]
+    groups = pack_by_tokens(items, budget=100, text=lambda item: item["text"])
+    assert groups == [[items[0]], [items[1]], [items[2]]]
+
+def test_empty():
+    assert pack_by_tokens([], budget=100) == []
@@ -0,0 +1,118 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.ingestion_pipeline import _DONE, IngestionPipeline, StageStats
+
+class FakeArxiv:
+    def __init__(self, count):
+        self.count = count
+
+    def fetch_recent_papers(self, days_back=2):
+        return iter(range(self.count))
+
+    def get_paper_metadata(self, result):
+        return {"arxiv_id": f"arxiv-{result}"}
+
+class FakeRSS:
+    def __init__(self, feeds):
+        self.feeds = feeds # name -> number of posts
+        self.saved = []
+
+    async def get_active_feeds(self):
+        return [SimpleNamespace(name=name) for name in self.feeds]
+
+    async def stream_feeds(self, feeds, cutoff_date):
+        for feed in feeds:
+            posts = [{"unique_id": f"{feed.name}-{i}"} for i in range(self.feeds[feed.name])]
+            yield feed, posts, (f"etag-{feed.name}", None), None
+
+    async def save_validators(self, feed, validators):
+        self.saved.append(feed.name)
+
+def _pipeline(arxiv=0, feeds=None, workers=3, batch_size=4, fail=lambda item: False):
+    pipeline = IngestionPipeline(FakeArxiv(arxiv), FakeRSS(feeds or {}))
+    pipeline.log = lambda msg: None
+    stored = []
+
+    async def dedup(items):
+        await asyncio.sleep(0)
+        return items
+
+    async def summarize(item):
+        if fail(item):
+            raise RuntimeError("summary failed")
+        return item
+
+    async def persist(items):
+        stored.extend(item["unique_id"] for item in items)
+        return items
+
+    # Several workers per stage, small batches: every shutdown path gets exercised
+    pipeline.stages = [
+        ("dedup", dedup, workers, batch_size),
+        ("summarize", summarize, workers, 1),
+        ("persist", persist, workers, batch_size),
+    ]
+    return pipeline, stored
+
+async def test_every_item_reaches_the_last_stage():
+    pipeline, stored = _pipeline(arxiv=7, feeds={"blog": 5, "news": 9})
+    stats = await asyncio.wait_for(pipeline.run(max_papers=5), timeout=5)
+    assert stats == {"arxiv": 5, "blog": 5, "news": 9}
+    assert sorted(stored) == sorted([f"arxiv-{i}" for i in range(5)] + [f"blog-{i}" for i in range(5)] + [f"news-{i}" for i in range(9)])
+    assert pipeline.stage_stats["persist"].processed == 19
+
+@pytest.mark.parametrize("workers,batch_size", [(1, 2), (1, 50), (4, 2), (8, 3)])
+async def test_shuts_down_with_any_worker_and_batch_count(workers, batch_size):
+    pipeline, stored = _pipeline(feeds={"blog": 23}, workers=workers, batch_size=batch_size)
+    await asyncio.wait_for(pipeline.run(), timeout=5)
+    assert len(stored) == 23
+
+async def test_failed_items_hold_back_their_feeds_validators():
+    pipeline, stored = _pipeline(feeds={"blog": 3, "news": 3}, fail=lambda item: item["unique_id"] == "news-1")
+    await asyncio.wait_for(pipeline.run(), timeout=5)
+    assert "news-1" not in stored and len(stored) == 5
+    assert pipeline.stage_stats["summarize"].failed == 1
+    # news is fetched in full next time; blog's items are all stored
+    assert pipeline.rss_client.saved == ["blog"]
+
+async def test_a_failed_batch_does_not_stop_the_worker():
+    pipeline, stored = _pipeline(feeds={"blog": 10}, workers=1)
+    persist = pipeline.stages[2][1]
+    batches = []
+    async def flaky_persist(items):
+        batches.append(items)
+        if len(batches) == 1:
+            raise RuntimeError("mongo down")
+        return await persist(items)
+    pipeline.stages[2] = ("persist", flaky_persist, 1, 4)
+    await asyncio.wait_for(pipeline.run(), timeout=5)
+    assert len(stored) == 10 - len(batches[0])
+    assert pipeline.rss_client.saved == []
+
+def test_drain_takes_what_is_waiting():
+    queue = asyncio.Queue()
+    for item in (2, 3, 4):
+        queue.put_nowait(item)
+    assert IngestionPipeline._drain(queue, 1, 3) == ([1, 2, 3], False)
+    assert queue.qsize() == 1
+
+def test_drain_stops_at_done():
+    queue = asyncio.Queue()
+    for item in (2, _DONE, 3):
+        queue.put_nowait(item)
+    assert IngestionPipeline._drain(queue, 1, 10) == ([1, 2], True)
+    # The next worker's _DONE and items stay queued
+    assert queue.get_nowait() == 3
+
+async def test_worker_exits_on_done_consumed_in_a_batch():
+    pipeline, _ = _pipeline()
+    in_q, out_q = asyncio.Queue(), asyncio.Queue()
+    for item in ("a", "b", _DONE):
+        in_q.put_nowait(item)
+    async def upper(batch):
+        return [item.upper() for item in batch]
+    await asyncio.wait_for(pipeline._worker(StageStats("test", 1), upper, in_q, out_q, batch_size=10), timeout=1)
+    assert [out_q.get_nowait() for _ in range(out_q.qsize())] == ["A", "B"]
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+
+from src.core.config import settings
+from src.db.models import Job
+from src.services.jobs import claim_job, enqueue_digest, enqueue_job, run_job
+
+async def test_enqueue_job_joins_the_active_job(db):
+    first = await enqueue_job("analyze", "analyze:1", {"unique_id": "1"})
+    second = await enqueue_job("analyze", "analyze:1", {"unique_id": "1"})
+    assert second.id == first.id
+    assert await Job.count() == 1
+
+async def test_claim_job_takes_oldest_queued(db):
+    older = await enqueue_job("analyze", "analyze:1", {"unique_id": "1"})
+    await enqueue_job("analyze", "analyze:2", {"unique_id": "2"})
+    job = await claim_job("w1")
+    assert job.id == older.id
+    assert (job.status, job.worker_id, job.attempts) == ("running", "w1", 1)
+
+async def test_claim_job_leaves_live_jobs_alone(db):
+    await enqueue_job("analyze", "analyze:1", {"unique_id": "1"})
+    assert await claim_job("w1") is not None
+    assert await claim_job("w2") is None
+
+async def test_claim_job_reclaims_stale_heartbeat(db):
+    await enqueue_job("analyze", "analyze:1", {"unique_id": "1"})
+    job = await claim_job("w1")
+    stale = datetime.now(timezone.utc) - timedelta(seconds=settings.JOB_STALE_AFTER + 60)
+    await job.set({Job.heartbeat_at: stale})
+    reclaimed = await claim_job("w2")
+    assert reclaimed.id == job.id
+    assert (reclaimed.worker_id, reclaimed.attempts) == ("w2", 2)
+
+async def test_claim_job_reclaims_legacy_running_job(db):
+    # Claimed before heartbeats existed: only started_at is set
+    stale = datetime.now(timezone.utc) - timedelta(seconds=settings.JOB_STALE_AFTER + 60)
+    job = Job(key="digest:2024-05-01", kind="digest", status="running", worker_id="w1", started_at=stale, attempts=1)
+    await job.insert()
+    reclaimed = await claim_job("w2")
+    assert reclaimed.id == job.id
+    assert reclaimed.worker_id == "w2"
+
+class DigestService:
+    def __init__(self):
+        self.calls = []
+
+    async def generate_daily_digest(self, date, use_cache=True):
+        self.calls.append((date, use_cache))
+        return object()
+
+async def test_regenerate_bypasses_the_llm_cache(db):
+    service = DigestService()
+    for day, regenerate in ((1, False), (2, True)):
+        await enqueue_digest(datetime(2024, 5, day, 15, 30), regenerate=regenerate)
+        job = await claim_job("w1")
+        await run_job(service, job, "w1", log_fn=lambda message: None)
+        assert (await Job.get(job.id)).status == "done"
+    assert service.calls == [(datetime(2024, 5, 1), True), (datetime(2024, 5, 2), False)]
@@ -0,0 +1,63 @@
+import itertools
+
+import pytest
+
+from src.ai import cache as cache_module
+from src.ai.cache import LLMCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Distinct last_access stamps, so LRU order doesn't depend on timer resolution
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(cache_module.time, "time", lambda: float(next(ticks)))
+
+def _cache(tmp_path, max_bytes=1024, enabled=True):
+    return LLMCache(str(tmp_path / "llm_cache.sqlite3"), max_bytes=max_bytes, enabled=enabled)
+
+async def test_text_and_vectors_round_trip(tmp_path):
+    cache = _cache(tmp_path)
+    await cache.set_text("k", "summary_pass_1", "A summary ✓")
+    await cache.set_vectors({"v1": [0.5, -1.0], "v2": [2.0, 0.25]})
+    assert await cache.get_text("k") == "A summary ✓"
+    assert await cache.get_vectors(["v1", "v2", "missing"]) == {"v1": [0.5, -1.0], "v2": [2.0, 0.25]}
+    assert await cache.get_text("missing") is None
+    assert (cache.hits, cache.misses) == (3, 2)
+
+async def test_survives_reopen(tmp_path):
+    await _cache(tmp_path).set_text("k", "digest", "post")
+    assert await _cache(tmp_path).get_text("k") == "post"
+
+def test_key_depends_on_every_part():
+    base = ("summary_pass_1", "openai", "gpt-4o", "template", "text")
+    keys = {LLMCache.make_key(*base)}
+    for i in range(len(base)):
+        keys.add(LLMCache.make_key(*base[:i], base[i] + "!", *base[i + 1:]))
+    assert len(keys) == len(base) + 1
+    # Parts are delimited, so moving text across a boundary changes the key
+    assert LLMCache.make_key("a", "bc", "m", "t", "x") != LLMCache.make_key("ab", "c", "m", "t", "x")
+
+async def test_evicts_least_recently_used(tmp_path, clock):
+    cache = _cache(tmp_path, max_bytes=30)
+    await cache.set_text("a", "t", "a" * 10)
+    await cache.set_text("b", "t", "b" * 10)
+    await cache.set_text("c", "t", "c" * 10)
+    # Reading "a" makes "b" the least recently used
+    assert await cache.get_text("a") == "a" * 10
+    await cache.set_text("d", "t", "d" * 10)
+    assert await cache.get_text("b") is None
+    assert [await cache.get_text(k) for k in "acd"] == ["a" * 10, "c" * 10, "d" * 10]
+    assert cache.stats()["bytes"] == 30
+
+async def test_replacing_an_entry_counts_its_size_once(tmp_path, clock):
+    cache = _cache(tmp_path, max_bytes=30)
+    await cache.set_text("a", "t", "a" * 10)
+    await cache.set_text("a", "t", "a" * 20)
+    await cache.set_text("b", "t", "b" * 10)
+    assert cache.stats()["bytes"] == 30
+    assert await cache.get_text("a") == "a" * 20
+
+async def test_disabled_cache_stores_nothing(tmp_path):
+    cache = _cache(tmp_path, enabled=False)
+    await cache.set_text("k", "t", "value")
+    assert await cache.get_text("k") is None
+    assert not (tmp_path / "llm_cache.sqlite3").exists()
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from src.db.models import DailyDigest, Paper, RSSFeedConfig, UserAnnotation
+from src.db.mongo import merge_duplicate_keys
+
+MODELS = [Paper, DailyDigest, UserAnnotation, RSSFeedConfig]
+NOW = datetime(2026, 1, 2)
+
+def _paper(uid, **fields):
+    return {
+        "unique_id": uid, "title": uid, "abstract": "", "pdf_url": f"https://example.com/{uid}",
+        "published_date": NOW, "updated_date": NOW, **fields,
+    }
+
+@pytest.fixture
+def database():
+    """An old database: documents written before the unique indexes existed."""
+    return AsyncMongoMockClient().researcher
+
+async def test_merges_duplicates_so_unique_indexes_can_be_built(database):
+    await database.papers.insert_many([
+        _paper("2401.00001", categories=["cs.LG"]),
+        _paper("2401.00001", summary_pass_1="short", summary_pass_2="long"),
+        _paper("2401.00002"),
+    ])
+    await database.user_annotations.insert_many([
+        {"unique_id": "2401.00001", "is_bookmarked": True, "notes": "read later", "updated_at": NOW - timedelta(days=1)},
+        {"unique_id": "2401.00001", "is_bookmarked": False, "updated_at": NOW},
+    ])
+    await database.rss_feed_configs.insert_many([
+        {"name": "OpenAI", "url": "https://openai.com/rss"},
+        {"name": "OpenAI", "url": "https://openai.com/news/rss.xml"},
+    ])
+    logs = []
+
+    assert await merge_duplicate_keys(database, MODELS, log_fn=logs.append) == 3
+    assert len(logs) == 3
+
+    papers = await database.papers.find({"unique_id": "2401.00001"}).to_list(None)
+    assert len(papers) == 1
+    # The summarized copy survives and keeps the other copy's categories
+    assert papers[0]["summary_pass_2"] == "long"
+    assert papers[0]["categories"] == ["cs.LG"]
+    assert await database.papers.count_documents({}) == 2
+
+    (annotation,) = await database.user_annotations.find({}).to_list(None)
+    # Latest edit wins; the older note is kept rather than lost
+    assert annotation["is_bookmarked"] is False
+    assert annotation["notes"] == "read later"
+
+    (feed,) = await database.rss_feed_configs.find({}).to_list(None)
+    assert feed["url"] == "https://openai.com/rss"
+
+    # Startup now succeeds and the indexes are enforced
+    await init_beanie(database=database, document_models=MODELS)
+    assert (await database.papers.index_information())["unique_id"]["unique"]
+
+async def test_skips_collections_that_already_have_the_index(database):
+    await init_beanie(database=database, document_models=MODELS)
+    await database.papers.insert_one(_paper("2401.00001"))
+    logs = []
+
+    assert await merge_duplicate_keys(database, MODELS, log_fn=logs.append) == 0
+    assert logs == []
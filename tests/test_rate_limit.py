@@ -0,0 +1,105 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+import pytest
+
+from src.ai import rate_limit
+from src.ai.rate_limit import LLMCallFailed, ProviderLimiter, TokenBucket, call_with_retry, retry_after_seconds
+from src.core.config import settings
+
+class ProviderError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record the backoff sleeps of call_with_retry instead of waiting."""
+    delays = []
+    async def sleep(delay):
+        delays.append(delay)
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", sleep)
+    return delays
+
+def _flaky(*errors, result="ok"):
+    calls = []
+    async def fn():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    return fn, calls
+
+def _limiter():
+    return ProviderLimiter(rpm=60_000, tpm=10_000_000, max_concurrency=4)
+
+async def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(rate_per_minute=600, capacity=2) # 10 tokens/s
+    started = time.monotonic()
+    await bucket.acquire()
+    await bucket.acquire()
+    assert time.monotonic() - started < 0.05
+    await bucket.acquire()
+    assert time.monotonic() - started >= 0.08
+
+async def test_token_bucket_caps_oversized_requests():
+    bucket = TokenBucket(rate_per_minute=6000, capacity=10)
+    await asyncio.wait_for(bucket.acquire(50), timeout=1)
+
+async def test_concurrency_cap():
+    limiter = ProviderLimiter(rpm=60_000, tpm=10_000_000, max_concurrency=2)
+    running, peak = 0, 0
+    async def call():
+        nonlocal running, peak
+        async with limiter.slot():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+    await asyncio.gather(*(call() for _ in range(6)))
+    assert peak == 2
+
+async def test_retries_transient_errors(sleeps, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 3)
+    fn, calls = _flaky(ProviderError(429), ProviderError(503))
+    assert await call_with_retry(fn, _limiter()) == "ok"
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+
+async def test_honours_retry_after(sleeps):
+    fn, _ = _flaky(ProviderError(429, {"retry-after": "1.5"}), ProviderError(429, {"retry-after-ms": "250"}))
+    await call_with_retry(fn, _limiter(), max_retries=2)
+    assert sleeps == [1.5, 0.25]
+
+def test_retry_after_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    delay = retry_after_seconds(ProviderError(429, {"retry-after": format_datetime(when, usegmt=True)}))
+    assert 25 <= delay <= 30
+
+async def test_retry_after_is_capped(sleeps, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_DELAY", 5.0)
+    fn, _ = _flaky(ProviderError(429, {"retry-after": "3600"}))
+    await call_with_retry(fn, _limiter(), max_retries=1)
+    assert sleeps == [5.0]
+
+async def test_gives_up_after_max_retries(sleeps):
+    fn, calls = _flaky(*[ProviderError(500)] * 5)
+    with pytest.raises(LLMCallFailed):
+        await call_with_retry(fn, _limiter(), max_retries=2)
+    assert len(calls) == 3
+
+async def test_does_not_retry_client_errors(sleeps):
+    fn, calls = _flaky(ProviderError(400))
+    with pytest.raises(LLMCallFailed) as failed:
+        await call_with_retry(fn, _limiter(), max_retries=3)
+    assert len(calls) == 1
+    assert isinstance(failed.value.__cause__, ProviderError)
+
+async def test_retries_network_errors(sleeps):
+    fn, calls = _flaky(ConnectionError("reset"), asyncio.TimeoutError())
+    assert await call_with_retry(fn, _limiter(), max_retries=2) == "ok"
+    assert len(calls) == 3
@@ -0,0 +1,75 @@
+import asyncio
+
+from src.db import read_cache as read_cache_module
+from src.db.read_cache import ANNOTATIONS, PAPERS, ReadCache
+
+class Loader:
+    """Counts calls and returns a new value each time."""
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return self.calls
+
+async def test_hit_until_invalidated():
+    cache, load = ReadCache(ttl=60, max_entries=10), Loader()
+    assert await cache.get_or_load(PAPERS, "feed", load) == 1
+    assert await cache.get_or_load(PAPERS, "feed", load) == 1
+    cache.invalidate(PAPERS)
+    assert await cache.get_or_load(PAPERS, "feed", load) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+async def test_invalidation_is_per_namespace():
+    cache, papers, library = ReadCache(ttl=60, max_entries=10), Loader(), Loader()
+    await cache.get_or_load(PAPERS, "feed", papers)
+    await cache.get_or_load((ANNOTATIONS, PAPERS), "library", library)
+    cache.invalidate(ANNOTATIONS)
+    assert await cache.get_or_load(PAPERS, "feed", papers) == 1
+    assert await cache.get_or_load((ANNOTATIONS, PAPERS), "library", library) == 2
+    # An entry depending on several namespaces goes stale when any of them changes
+    cache.invalidate(PAPERS)
+    assert await cache.get_or_load((ANNOTATIONS, PAPERS), "library", library) == 3
+
+async def test_keys_are_scoped_by_namespace():
+    cache = ReadCache(ttl=60, max_entries=10)
+    await cache.get_or_load(PAPERS, "k", Loader())
+    assert await cache.get_or_load(ANNOTATIONS, "k", Loader()) == 1
+    assert cache.stats()["entries"] == 2
+
+async def test_result_read_during_invalidate_is_not_stored():
+    cache = ReadCache(ttl=60, max_entries=10)
+    async def stale_read():
+        # A write lands while the query is in flight
+        cache.invalidate(PAPERS)
+        return "stale"
+    assert await cache.get_or_load(PAPERS, "feed", stale_read) == "stale"
+    assert await cache.get_or_load(PAPERS, "feed", Loader()) == 1
+
+async def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(read_cache_module.time, "monotonic", lambda: now[0])
+    cache, load = ReadCache(ttl=30, max_entries=10), Loader()
+    await cache.get_or_load(PAPERS, "feed", load)
+    await cache.get_or_load(PAPERS, "short", load, ttl=5)
+    now[0] += 10
+    assert await cache.get_or_load(PAPERS, "feed", load) == 1
+    assert await cache.get_or_load(PAPERS, "short", load) == 3
+    now[0] += 30
+    assert await cache.get_or_load(PAPERS, "feed", load) == 4
+
+async def test_evicts_least_recently_used():
+    cache = ReadCache(ttl=60, max_entries=2)
+    for key in ("a", "b"):
+        await cache.get_or_load(PAPERS, key, Loader())
+    await cache.get_or_load(PAPERS, "a", Loader()) # "b" is now least recently used
+    await cache.get_or_load(PAPERS, "c", Loader())
+    load = Loader()
+    await cache.get_or_load(PAPERS, "a", load)
+    await cache.get_or_load(PAPERS, "b", load)
+    assert load.calls == 1
+
+async def test_disabled_always_loads():
+    cache, load = ReadCache(ttl=60, max_entries=10, enabled=False), Loader()
+    results = await asyncio.gather(*(cache.get_or_load(PAPERS, "feed", load) for _ in range(3)))
+    assert sorted(results) == [1, 2, 3]
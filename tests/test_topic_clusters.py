@@ -0,0 +1,48 @@
+import warnings
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.services.topic_clusters import _normalize, choose_clusters, cluster_papers, silhouette
+
+def _blobs(k, per_topic, dim=32, noise=0.05, seed=1):
+    rng = np.random.default_rng(seed)
+    centers = np.eye(k, dim) * np.sqrt(dim) # orthogonal topics
+    X = np.repeat(centers, per_topic, axis=0) + rng.normal(scale=noise, size=(k * per_topic, dim))
+    return _normalize(X.astype(np.float32)), np.repeat(np.arange(k), per_topic)
+
+def test_choose_clusters_finds_the_topics():
+    X, truth = _blobs(4, 6)
+    labels, centroids = choose_clusters(X, max_k=8)
+    assert len(centroids) == 4
+    # Same partition, whatever the cluster numbering
+    assert len({(t, l) for t, l in zip(truth, labels)}) == 4
+
+def test_identical_vectors_are_one_cluster():
+    X = _normalize(np.ones((6, 8), dtype=np.float32))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        labels, centroids = choose_clusters(X, max_k=4)
+    assert len(centroids) == 1
+    assert (labels == 0).all()
+
+def test_silhouette_zero_distances():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        score = silhouette(np.zeros((4, 4), dtype=np.float32), np.array([0, 0, 1, 1]), 2)
+    assert score == 0.0
+
+def test_silhouette_empty_cluster():
+    distances = np.array([[0, 1], [1, 0]], dtype=np.float32)
+    assert not np.isnan(silhouette(distances, np.array([0, 0]), 3))
+
+def test_cluster_papers_folds_duplicates():
+    X, truth = _blobs(3, 5, noise=0.15)
+    X = np.vstack([X, X[:1]]) # paper 15 repeats paper 0
+    papers = [SimpleNamespace(unique_id=str(i), title=f"topic {t} paper") for i, t in enumerate(list(truth) + [truth[0]])]
+    clusters = cluster_papers(papers, X, max_topics=5, duplicate_similarity=0.99)
+    assert len(clusters) == 3
+    kept = [p.unique_id for c in clusters for p in c.papers]
+    folded = [p.unique_id for c in clusters for dups in c.duplicates.values() for p in dups]
+    assert sorted(kept + folded, key=int) == [str(i) for i in range(16)]
+    assert len(folded) == 1 and folded[0] in ("0", "15")
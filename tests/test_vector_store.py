@@ -0,0 +1,87 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from src.db.vector_store import NumpyIndex, NumpyVectorStore
+
+DIM = 8
+
+def _row(uid, vector, **meta):
+    return {"unique_id": uid, "embedding": list(vector), "title": f"Paper {uid}", **meta}
+
+def _axis(i):
+    v = np.zeros(DIM, dtype=np.float32)
+    v[i] = 1
+    return v
+
+@pytest.mark.parametrize("quantization", ["none", "halfvec", "int8", "binary"])
+def test_add_then_search(tmp_path, quantization):
+    index = NumpyIndex(str(tmp_path), dim=DIM, quantization=quantization)
+    assert index.add([_row(str(i), _axis(i)) for i in range(4)]) == 4
+    hits = index.search(_axis(2), 2, 0, None, None, None, None)
+    assert hits[0].unique_id == "2"
+    assert hits[0].title == "Paper 2"
+    assert hits[0].score == pytest.approx(1.0, abs=1e-3)
+
+def test_add_skips_known_and_repeated_ids(tmp_path):
+    index = NumpyIndex(str(tmp_path), dim=DIM)
+    assert index.add([_row("a", _axis(0)), _row("a", _axis(1)), _row("b", _axis(1))]) == 2
+    assert index.add([_row("a", _axis(2)), _row("c", _axis(2))]) == 1
+    assert len(index) == 3
+    assert index.missing(["a", "b", "c", "d"]) == {"d"}
+
+def test_survives_reopen(tmp_path):
+    NumpyIndex(str(tmp_path), dim=DIM).add([_row("a", _axis(0), published_date=datetime(2024, 5, 1))])
+    index = NumpyIndex(str(tmp_path), dim=DIM)
+    [hit] = index.search(_axis(0), 1, 0, None, None, None, None)
+    assert (hit.unique_id, hit.published_date) == ("a", datetime(2024, 5, 1))
+
+def test_sees_rows_appended_by_another_process(tmp_path):
+    reader = NumpyIndex(str(tmp_path), dim=DIM, quantization="int8")
+    writer = NumpyIndex(str(tmp_path), dim=DIM, quantization="int8")
+    writer.add([_row("a", _axis(0))])
+    assert [h.unique_id for h in reader.search(_axis(0), 5, 0, None, None, None, None)] == ["a"]
+    writer.add([_row("b", _axis(1))])
+    assert reader.search(_axis(1), 1, 0, None, None, None, None)[0].unique_id == "b"
+    # And the reader, writing next, does not re-add or misalign the writer's rows
+    assert reader.add([_row("b", _axis(1)), _row("c", _axis(2))]) == 1
+    assert writer.vectors(["a", "b", "c"])["c"] == pytest.approx(_axis(2))
+
+def test_failed_write_leaves_index_aligned(tmp_path, monkeypatch):
+    index = NumpyIndex(str(tmp_path), dim=DIM, quantization="halfvec")
+    index.add([_row("a", _axis(0))])
+    def fail(matrix):
+        raise OSError("disk full")
+    # The last of the three files fails, after vectors.bin and rows.jsonl were written
+    with monkeypatch.context() as m:
+        m.setattr(index, "_write_quantized", fail)
+        with pytest.raises(OSError):
+            index.add([_row("b", _axis(1))])
+    assert index.missing(["b"]) == {"b"}
+    assert os.path.getsize(tmp_path / "vectors.bin") == DIM * 4
+    index.add([_row("b", _axis(1))])
+    reopened = NumpyIndex(str(tmp_path), dim=DIM, quantization="halfvec")
+    assert [h.unique_id for h in reopened.search(_axis(1), 2, 0, None, None, None, None)] == ["b", "a"]
+
+def test_ignores_interrupted_append(tmp_path):
+    index = NumpyIndex(str(tmp_path), dim=DIM)
+    index.add([_row("a", _axis(0))])
+    # A crash mid-append: half a vector and half a row line
+    with open(tmp_path / "vectors.bin", "ab") as f:
+        f.write(b"\0" * 10)
+    with open(tmp_path / "rows.jsonl", "a") as f:
+        f.write('{"unique_id": "bro')
+    fresh = NumpyIndex(str(tmp_path), dim=DIM)
+    assert len(fresh) == 1
+    fresh.add([_row("b", _axis(1))])
+    assert NumpyIndex(str(tmp_path), dim=DIM).vectors(["a", "b"])["b"] == pytest.approx(_axis(1))
+
+async def test_store_round_trip(tmp_path):
+    store = NumpyVectorStore(str(tmp_path))
+    await store.register_model("mock:test", DIM)
+    assert await store.add([{**_row("a", _axis(0)), "model_id": "mock:test"}]) == 1
+    [hit] = await store.search(_axis(0), "mock:test", limit=1)
+    assert hit.unique_id == "a"
+    assert await store.missing(["a", "b"], "mock:test") == {"b"}
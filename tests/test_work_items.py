@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+
+from src.core.config import settings
+from src.db.models import Paper, WorkItem
+from src.services.work_items import _release, claim_items, queue_items
+
+def _item(uid):
+    now = datetime.now(timezone.utc)
+    return {
+        "unique_id": uid, "title": f"Paper {uid}", "abstract": "An abstract.",
+        "published_date": now, "updated_date": now, "pdf_url": f"https://arxiv.org/pdf/{uid}"
+    }
+
+async def _queue(*unique_ids):
+    start = datetime.now(timezone.utc)
+    for i, uid in enumerate(unique_ids):
+        await WorkItem(unique_id=uid, item=_item(uid), created_at=start + timedelta(seconds=i)).insert()
+
+async def test_claim_items_leases_oldest_first(db):
+    await _queue("a", "b", "c")
+    items = await claim_items("w1", 2)
+    assert [item.unique_id for item in items] == ["a", "b"]
+    assert all(item.status == "leased" and item.lease_owner == "w1" and item.attempts == 1 for item in items)
+    assert [item.unique_id for item in await claim_items("w2", 5)] == ["c"]
+    assert await claim_items("w3", 5) == []
+
+async def test_expired_lease_is_reclaimed(db):
+    await _queue("a")
+    [item] = await claim_items("w1", 1)
+    await item.set({WorkItem.lease_expires_at: datetime.now(timezone.utc) - timedelta(seconds=1)})
+    [again] = await claim_items("w2", 1)
+    assert (again.unique_id, again.lease_owner, again.attempts) == ("a", "w2", 2)
+
+async def test_release_requeues_then_stores_for_retry(db, monkeypatch):
+    monkeypatch.setattr(settings, "WORK_MAX_ATTEMPTS", 2)
+    await _queue("a")
+    [item] = await claim_items("w1", 1)
+    await _release("w1", [item], "boom")
+    stored = await WorkItem.find_one(WorkItem.unique_id == "a")
+    assert (stored.status, stored.lease_owner, stored.error) == ("queued", None, "boom")
+
+    [item] = await claim_items("w1", 1)
+    await _release("w1", [item], "boom again")
+    # Out of attempts: the paper is kept, flagged for retry_failed_items
+    assert await WorkItem.find_one(WorkItem.unique_id == "a") is None
+    paper = await Paper.find_one(Paper.unique_id == "a")
+    assert (paper.needs_retry, paper.last_error) == (True, "boom again")
+
+async def test_release_keeps_unstorable_item_as_failed(db, monkeypatch):
+    monkeypatch.setattr(settings, "WORK_MAX_ATTEMPTS", 1)
+    await WorkItem(unique_id="bad", item={"unique_id": "bad"}).insert()
+    [item] = await claim_items("w1", 1)
+    await _release("w1", [item], "boom", log_fn=lambda message: None)
+    stored = await WorkItem.find_one(WorkItem.unique_id == "bad")
+    assert (stored.status, stored.error) == ("failed", "boom")
+    assert await claim_items("w1", 1) == []
+
+async def test_queue_items_revives_failed_items(db, monkeypatch):
+    monkeypatch.setattr(settings, "WORK_MAX_ATTEMPTS", 1)
+    await WorkItem(unique_id="a", item=_item("a"), status="failed", attempts=1, error="boom").insert()
+    assert await queue_items([_item("a"), _item("b")]) == 2
+    revived = await WorkItem.find_one(WorkItem.unique_id == "a")
+    assert (revived.status, revived.attempts, revived.error) == ("queued", 0, None)
+    # Queued items are not queued twice, stored papers not at all
+    await Paper(**_item("c")).insert()
+    assert await queue_items([_item("a"), _item("c")]) == 0
+    assert await WorkItem.count() == 2
+
+async def test_release_ignores_items_leased_to_someone_else(db):
+    await _queue("a")
+    [item] = await claim_items("w1", 1)
+    await item.set({WorkItem.lease_expires_at: datetime.now(timezone.utc) - timedelta(seconds=1)})
+    await claim_items("w2", 1)
+    # w1's lease expired and w2 took the item; w1 failing late must not requeue it
+    await _release("w1", [item], "late")
+    stored = await WorkItem.find_one(WorkItem.unique_id == "a")
+    assert (stored.status, stored.lease_owner, stored.error) == ("leased", "w2", None)